@@ -1,6 +1,8 @@
 import argparse
 from datetime import datetime
 
+from . import instrumentation
+
 __all__ = ["runner"]
 
 
@@ -59,6 +61,4 @@ def runner() -> None:
         "upgrade_time", help="The local time of the deployment in HH:MM format."
     )
 
-    args = parser.parse_args()
-
-    main(args)
+    instrumentation.run(parser, main)
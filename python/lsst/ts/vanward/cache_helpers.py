@@ -0,0 +1,79 @@
+"""Local cache helpers.
+
+Attributes
+----------
+CACHE_DIR_ENV : `str`
+    The environment variable that overrides the cache directory.
+DEFAULT_CACHE_DIR : `str`
+    The default location of the vanward cache directory.
+"""
+
+import json
+import os
+import pathlib
+import tempfile
+from typing import Any
+
+__all__ = [
+    "CACHE_DIR_ENV",
+    "DEFAULT_CACHE_DIR",
+    "get_cache_dir",
+    "read_json_cache",
+    "write_json_cache",
+]
+
+CACHE_DIR_ENV = "VANWARD_CACHE_DIR"
+DEFAULT_CACHE_DIR = "~/.cache/vanward"
+
+
+def get_cache_dir() -> pathlib.Path:
+    """Get the vanward cache directory, creating it if necessary.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The full path of the cache directory.
+    """
+    cache_dir = pathlib.Path(os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR))
+    cache_dir = cache_dir.expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def read_json_cache(name: str) -> dict[str, Any]:
+    """Read a JSON cache file from the cache directory.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the cache file.
+
+    Returns
+    -------
+    `dict`
+        The cache contents. Missing or unreadable caches are empty.
+    """
+    try:
+        with open(get_cache_dir() / name) as cfile:
+            return json.load(cfile)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json_cache(name: str, contents: dict[str, Any]) -> None:
+    """Atomically write a JSON cache file into the cache directory.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the cache file.
+    contents : `dict`
+        The cache contents.
+    """
+    cache_file = get_cache_dir() / name
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=cache_file.parent, delete=False, suffix=".tmp"
+    ) as tfile:
+        json.dump(contents, tfile, indent=1)
+    os.replace(tfile.name, cache_file)
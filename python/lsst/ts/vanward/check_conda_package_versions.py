@@ -7,6 +7,12 @@ CYCLE_REPO : `str`
     The name of the cycle build repository.
 ENV_FILE : `str`
     The file containing the cycle versions.
+CONDA_CHANNEL : `str`
+    The conda channel of the TSSW packages.
+CONDA_PLATFORM : `str`
+    The platform of the searched conda packages.
+SKIPPED_PACKAGES : `list`
+    The conda names of the cycle packages that are not searched.
 
 Notes
 -----
@@ -16,15 +22,42 @@ This script requires conda to be installed.
 import argparse
 import json
 import pathlib
-from subprocess import run
+import subprocess
+
+from . import check_helpers, git_mirror, instrumentation, metrics_helpers
 
 CYCLE_REPO = "ts_cycle_build"
 ENV_FILE = "cycle/cycle.env"
+CONDA_CHANNEL = "lsstts"
+CONDA_PLATFORM = "linux-64"
+SKIPPED_PACKAGES = [
+    "ts-xml",
+    "ts-sal",
+    "ts-idl-git",
+    "ts-dds-community",
+    "ts-dds-community-conda-build",
+    "ts-dds-private",
+    "ts-dds-private-conda-build",
+    "ts-pointing-common",
+    "ts-m1m3support",
+    "ts-cRIOcpp",
+    "ts-mtaos",
+    "ts-wep",
+    "ts-phosim",
+    "ts-observing-utilities",
+    "ts-config-atcalsys",
+    "ts-config-attcs",
+    "ts-config-eas",
+    "ts-config-latiss",
+    "ts-config-mtcalsys",
+    "ts-config-mttcs",
+    "ts-config-ocs",
+]
 
 __all__ = ["runner"]
 
 
-def main(opts: argparse.Namespace) -> None:
+def run_check(opts: argparse.Namespace, metrics: metrics_helpers.CheckMetrics) -> None:
     """Read the CYCLE env file and look up the specified TSSW packages and
     versions in the conda repository. Finally print a list of the packages and
     the versions that could not be found.
@@ -33,71 +66,69 @@ def main(opts: argparse.Namespace) -> None:
     ----------
     opts : `argparse.Namespace`
         The script command-line arguments and options.
+    metrics : `metrics_helpers.CheckMetrics`
+        The collector of the check metrics.
     """
     sal_version = "0.0"
     xml_version = "0.0"
     packages_not_found = {}
-    packages_to_skip = [
-        "ts-xml",
-        "ts-sal",
-        "ts-idl-git",
-        "ts-dds-community",
-        "ts-dds-community-conda-build",
-        "ts-dds-private",
-        "ts-dds-private-conda-build",
-        "ts-pointing-common",
-        "ts-m1m3support",
-        "ts-cRIOcpp",
-        "ts-mtaos",
-        "ts-wep",
-        "ts-phosim",
-        "ts-observing-utilities",
-        "ts-config-atcalsys",
-        "ts-config-attcs",
-        "ts-config-eas",
-        "ts-config-latiss",
-        "ts-config-mtcalsys",
-        "ts-config-mttcs",
-        "ts-config-ocs",
-    ]
-
-    with open(opts.cycle_build_dir / CYCLE_REPO / ENV_FILE) as c:
-        lines = c.readlines()
+
+    with metrics.stage("git_mirror"):
+        cycle_build_dir = git_mirror.resolve_parent_dir(
+            opts.cycle_build_dir, opts.git_mirror, [CYCLE_REPO]
+        )
+
+    with metrics.stage("read_cycle"):
+        lines = check_helpers.read_repository_file(
+            cycle_build_dir, CYCLE_REPO, ENV_FILE, opts.ref
+        ).splitlines()
 
     print("Searching TSSW conda packages. Please be patient. This may take a while.")
-    for line in lines:
-        line = line.strip()
-        if line[0:3] == "ts_":
-            line = line.replace("_", "-").replace("=", "==")
-            items = line.split("==")
-            if "ts-xml==" in line:
-                xml_version = items[1]
-            if "ts-sal==" in line:
-                sal_version = items[1]
-            if "ts-idl==" in line:
-                line = line + f"={xml_version}" + f"_{sal_version}"
-            if "ts-ATMCSSimulator==" in line:
-                line = line.replace("ts-ATMCSSimulator", "ts-atmcs-simulator")
-                items[0] = items[0].replace("ts-ATMCSSimulator", "ts-atmcs-simulator")
-
-            if items[0] not in packages_to_skip:
-                proc = run(
-                    [
-                        "conda",
-                        "search",
-                        "--json",
-                        "-c",
-                        "lsstts",
-                        "--platform",
-                        "linux-64",
-                        f"{line}",
-                    ],
-                    text=True,
-                    capture_output=True,
-                )
-                conda_info = json.loads(proc.stdout)
-                if not items[0].lower() in conda_info:
-                    packages_not_found[line] = conda_info
+    num_searches = 0
+    with metrics.stage("conda_search"):
+        for line in lines:
+            line = line.strip()
+            if line[0:3] == "ts_":
+                line = line.replace("_", "-").replace("=", "==")
+                items = line.split("==")
+                if "ts-xml==" in line:
+                    xml_version = items[1]
+                if "ts-sal==" in line:
+                    sal_version = items[1]
+                if "ts-idl==" in line:
+                    line = line + f"={xml_version}" + f"_{sal_version}"
+                if "ts-ATMCSSimulator==" in line:
+                    line = line.replace("ts-ATMCSSimulator", "ts-atmcs-simulator")
+                    items[0] = items[0].replace(
+                        "ts-ATMCSSimulator", "ts-atmcs-simulator"
+                    )
+
+                if items[0] not in SKIPPED_PACKAGES:
+                    num_searches += 1
+                    proc = subprocess.run(
+                        [
+                            "conda",
+                            "search",
+                            "--json",
+                            "-c",
+                            CONDA_CHANNEL,
+                            "--platform",
+                            CONDA_PLATFORM,
+                            f"{line}",
+                        ],
+                        text=True,
+                        capture_output=True,
+                    )
+                    conda_info = json.loads(proc.stdout)
+                    found = items[0].lower() in conda_info
+                    if not found:
+                        packages_not_found[line] = conda_info
+                    metrics.set(
+                        "package_missing",
+                        0 if found else 1,
+                        "1 if the cycle version of the package is not in conda.",
+                        {"package": items[0], "version": items[1]},
+                    )
 
     if len(packages_not_found):
         print("Didn't find these packages and versions:")
@@ -105,6 +136,40 @@ def main(opts: argparse.Namespace) -> None:
     else:
         print("Done. All packages were found with the provided version.")
 
+    metrics.set(
+        "conda_searches",
+        num_searches,
+        "Number of conda searches made by the check.",
+    )
+    metrics.set(
+        "packages_checked",
+        num_searches,
+        "Number of packages checked.",
+    )
+    metrics.set(
+        "packages_missing",
+        len(packages_not_found),
+        "Number of packages whose cycle version is not in conda.",
+    )
+
+
+def main(opts: argparse.Namespace) -> None:
+    """
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    metrics = metrics_helpers.CheckMetrics("conda_package_versions")
+    success = False
+    try:
+        run_check(opts, metrics)
+        success = True
+    finally:
+        if opts.metrics_file is not None:
+            metrics.set("check_success", int(success), "1 if the check run succeeded.")
+            metrics.write(opts.metrics_file)
+
 
 def runner() -> None:
     parser = argparse.ArgumentParser()
@@ -114,11 +179,29 @@ def runner() -> None:
     )
 
     parser.add_argument(
-        "cycle_build_dir",
+        "--metrics-file",
         type=pathlib.Path,
-        help=f"Path to where the {CYCLE_REPO} directory lives.",
+        default=None,
+        help="Write the check results and timings to this file in the OpenMetrics "
+        "text format, e.g. for the node_exporter textfile collector.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--ref",
+        default=None,
+        help=f"Read {ENV_FILE} at this branch, tag or commit of {CYCLE_REPO} "
+        "instead of from the working tree. The repository can be bare.",
+    )
+
+    git_mirror.add_mirror_arguments(parser)
+
+    parser.add_argument(
+        "cycle_build_dir",
+        type=pathlib.Path,
+        nargs="?",
+        default=None,
+        help=f"Path to where the {CYCLE_REPO} directory lives. "
+        "Not needed with --git-mirror.",
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
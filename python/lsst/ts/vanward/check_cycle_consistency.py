@@ -0,0 +1,463 @@
+"""Script to check the cycle versions against both the GitHub tags and the
+conda channel.
+
+The cycle build environment file is read once, then the latest GitHub tags
+and the conda channel packages are fetched concurrently, so the run takes
+about as long as the slower of the two sources.
+
+Attributes
+----------
+CONDA_NAME_MAP : `dict`
+    Mapping of the cycle packages to conda package names that do not follow
+    the naming convention.
+IDL_PACKAGE : `str`
+    The cycle package whose conda build string is the XML and SAL versions.
+REPOSITORY_OWNERS : `dict`
+    Mapping of the GitHub repositories outside of the organization to their
+    owners.
+TAG_BATCH_SIZE : `int`
+    The number of repositories whose latest tags are queried per request.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import pathlib
+import subprocess
+from dataclasses import dataclass, field
+
+from packaging.version import InvalidVersion
+
+from . import (
+    check_conda_package_versions,
+    check_helpers,
+    check_software_releases,
+    git_mirror,
+    instrumentation,
+    metrics_helpers,
+)
+
+CONDA_NAME_MAP = {"ts_ATMCSSimulator": "ts-atmcs-simulator"}
+REPOSITORY_OWNERS = {
+    "rubin_scheduler": "lsst",
+    "ctrl_oods": "lsst-dm",
+    "phosim_utils": "lsst-dm",
+}
+IDL_PACKAGE = "ts_idl"
+TAG_BATCH_SIZE = 50
+
+__all__ = ["runner"]
+
+
+@dataclass
+class PackageConsistency:
+    """Holder for the versions of a cycle package in each source."""
+
+    pinned: str
+    latest: str | None = None
+    conda_name: str | None = None
+    conda_builds: list[tuple[str, str]] = field(default_factory=list)
+    conda_build: str | None = None
+
+    def get_flags(self) -> list[str]:
+        """Find the inconsistencies between the sources.
+
+        Returns
+        -------
+        `list`
+            The descriptions of the inconsistencies.
+        """
+        flags = []
+        if self.latest is None:
+            flags.append("no tag")
+        else:
+            try:
+                if not check_helpers.SoftwareVersions(
+                    self.pinned, self.latest
+                ).is_latest():
+                    flags.append("outdated")
+            except InvalidVersion:
+                flags.append("unknown version")
+        if self.conda_name is not None:
+            conda_versions = {version for version, _ in self.conda_builds}
+            if self.latest is not None and self.latest not in conda_versions:
+                flags.append("tagged but not built")
+            pinned = self.pinned.replace("_", "-")
+            if self.conda_build is None:
+                published = pinned in conda_versions
+            else:
+                published = (pinned, self.conda_build) in self.conda_builds
+            if not published:
+                flags.append("pinned but not published")
+        return flags
+
+
+def get_conda_name(package: str) -> str | None:
+    """Get the conda name of a cycle package.
+
+    Parameters
+    ----------
+    package : `str`
+        The cycle package.
+
+    Returns
+    -------
+    `str` or None
+        The conda package name or None if the package is not searched in
+        the conda channel.
+    """
+    if not package.startswith("ts_"):
+        return None
+    name = package.replace("_", "-")
+    if name in check_conda_package_versions.SKIPPED_PACKAGES:
+        return None
+    return CONDA_NAME_MAP.get(package, name.lower())
+
+
+def get_repository(package: str) -> tuple[str, str]:
+    """Get the GitHub repository of a cycle package.
+
+    Parameters
+    ----------
+    package : `str`
+        The cycle package.
+
+    Returns
+    -------
+    `tuple`
+        The GitHub owner and name of the repository.
+    """
+    name = check_helpers.REPOSITORY_MAP.get(package, package)
+    return REPOSITORY_OWNERS.get(name, check_helpers.ORG_LIST[0]), name
+
+
+def get_latest_versions(
+    opts: argparse.Namespace, packages: list[str], metrics: metrics_helpers.CheckMetrics
+) -> dict[str, str | None]:
+    """Get the latest GitHub tags of the cycle packages.
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    packages : `list`
+        The cycle packages.
+    metrics : `metrics_helpers.CheckMetrics`
+        The collector of the check metrics.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the packages to their latest tags, as conda versions.
+    """
+    repositories = list(dict.fromkeys(get_repository(package) for package in packages))
+    latest_tags: dict[str, str | None] = {}
+    with metrics.stage("github"):
+        client = check_software_releases.create_github_client(opts.token_file)
+        num_requests = 0
+        for start in range(0, len(repositories), TAG_BATCH_SIZE):
+            end = start + TAG_BATCH_SIZE
+            tags = check_software_releases.get_latest_tags(
+                client, repositories[start:end]
+            )
+            num_requests += 1
+            latest_tags.update((name.lower(), tag) for name, tag in tags.items())
+    metrics.set(
+        "github_requests",
+        num_requests,
+        "Number of GitHub GraphQL requests made by the check.",
+    )
+    return {
+        package: check_software_releases.fixup_version(
+            latest_tags.get(get_repository(package)[1].lower())
+        )
+        for package in packages
+    }
+
+
+def get_conda_builds(
+    metrics: metrics_helpers.CheckMetrics,
+) -> dict[str, list[tuple[str, str]]]:
+    """Get the TSSW packages of the conda channel with one search.
+
+    Parameters
+    ----------
+    metrics : `metrics_helpers.CheckMetrics`
+        The collector of the check metrics.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the conda package names to their versions and build
+        strings.
+
+    Raises
+    ------
+    RuntimeError
+        If the search fails.
+    """
+    with metrics.stage("conda"):
+        proc = subprocess.run(
+            [
+                "conda",
+                "search",
+                "--json",
+                "--override-channels",
+                "-c",
+                check_conda_package_versions.CONDA_CHANNEL,
+                "--platform",
+                check_conda_package_versions.CONDA_PLATFORM,
+                "ts-*",
+            ],
+            text=True,
+            capture_output=True,
+        )
+    metrics.set("conda_searches", 1, "Number of conda searches made by the check.")
+    conda_info = json.loads(proc.stdout or "{}")
+    if "error" in conda_info or proc.returncode != 0:
+        raise RuntimeError(
+            f"Cannot search the conda channel: {conda_info.get('error', proc.stderr)}"
+        )
+    return {
+        name: [(record["version"], record["build"]) for record in records]
+        for name, records in conda_info.items()
+    }
+
+
+def read_recipe_versions(
+    cycle_build_dir: pathlib.Path, recipes_ref: str | None
+) -> dict[str, str]:
+    """Read the versions of the packages handled with the conda recipes.
+
+    Parameters
+    ----------
+    cycle_build_dir : `pathlib.Path`
+        The directory holding the recipes repository.
+    recipes_ref : `str` or None
+        The ref to read the recipes at or None for the working tree.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the cycle packages to the recipe versions.
+    """
+    recipe_files = check_helpers.read_repository_files(
+        cycle_build_dir,
+        check_software_releases.RECIPES_REPO,
+        [
+            check_software_releases.get_recipe_path(recipe)
+            for recipe in check_helpers.RECIPES_HANDLING
+        ],
+        recipes_ref,
+    )
+    versions = {}
+    for recipe in check_helpers.RECIPES_HANDLING:
+        recipe_text = recipe_files[check_software_releases.get_recipe_path(recipe)]
+        if recipe_text is None:
+            print(f"Cannot find the {recipe} recipe.")
+            continue
+        package = check_helpers.RECIPE_MAP.get(recipe, recipe)
+        versions[package] = check_software_releases.get_version_from_recipe(recipe_text)
+    return versions
+
+
+def print_table(packages: dict[str, PackageConsistency], problems: bool) -> None:
+    """Print the versions of the packages in each source.
+
+    Parameters
+    ----------
+    packages : `dict`
+        Mapping of the cycle packages to their versions.
+    problems : `bool`
+        If True, only print the packages with inconsistencies.
+    """
+    rows = [("Package", "Pinned", "Latest tag", "Conda", "Flags")]
+    for package, consistency in packages.items():
+        flags = consistency.get_flags()
+        if problems and not flags:
+            continue
+        if consistency.conda_name is None:
+            conda = "-"
+        elif consistency.conda_builds:
+            # The search lists the builds from the oldest version.
+            num_builds = len(consistency.conda_builds)
+            conda = (
+                f"{consistency.conda_builds[-1][0]} "
+                f"({num_builds} build{'s' if num_builds > 1 else ''})"
+            )
+        else:
+            conda = "none"
+        pinned = consistency.pinned
+        if consistency.conda_build is not None:
+            pinned += f"={consistency.conda_build}"
+        rows.append(
+            (
+                package,
+                pinned,
+                consistency.latest or "-",
+                conda,
+                ", ".join(flags),
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+    for row in rows:
+        cells = [cell.ljust(width) for cell, width in zip(row, widths)]
+        print("  ".join(cells + [row[-1]]).rstrip())
+
+
+def run_check(opts: argparse.Namespace, metrics: metrics_helpers.CheckMetrics) -> None:
+    """Compare the cycle versions with the GitHub tags and the conda channel.
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    metrics : `metrics_helpers.CheckMetrics`
+        The collector of the check metrics.
+    """
+    with metrics.stage("git_mirror"):
+        cycle_build_dir = git_mirror.resolve_parent_dir(
+            opts.cycle_build_dir,
+            opts.git_mirror,
+            [check_software_releases.CYCLE_REPO, check_software_releases.RECIPES_REPO],
+        )
+
+    with metrics.stage("read_cycle"):
+        cycle_env = check_helpers.parse_cycle_env_text(
+            check_helpers.read_repository_file(
+                cycle_build_dir,
+                check_software_releases.CYCLE_REPO,
+                check_software_releases.ENV_FILE,
+                opts.ref,
+            )
+        )
+        packages = {
+            package: PackageConsistency(version, conda_name=get_conda_name(package))
+            for package, version in cycle_env.items()
+            if package not in check_helpers.IGNORE_LIST
+        }
+        recipe_versions = read_recipe_versions(cycle_build_dir, opts.recipes_ref)
+    if IDL_PACKAGE in packages:
+        # The IDL is built for a pair of XML and SAL versions.
+        xml_version = cycle_env.get("ts_xml", "").replace("_", "-")
+        sal_version = cycle_env.get("ts_sal", "").replace("_", "-")
+        packages[IDL_PACKAGE].conda_build = f"{xml_version}_{sal_version}"
+
+    tag_packages = [package for package in packages if package not in recipe_versions]
+
+    # The two sources are independent, so they are fetched at the same time,
+    # each with its own metrics collector.
+    github_metrics = metrics_helpers.CheckMetrics(metrics.check)
+    conda_metrics = metrics_helpers.CheckMetrics(metrics.check)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        github_future = executor.submit(
+            get_latest_versions, opts, tag_packages, github_metrics
+        )
+        conda_future = executor.submit(get_conda_builds, conda_metrics)
+    metrics.update(github_metrics)
+    metrics.update(conda_metrics)
+    latest_versions = github_future.result()
+    conda_builds = conda_future.result()
+
+    for package, consistency in packages.items():
+        consistency.latest = recipe_versions.get(package, latest_versions.get(package))
+        if consistency.conda_name is not None:
+            consistency.conda_builds = conda_builds.get(consistency.conda_name, [])
+
+    print_table(packages, opts.problems)
+
+    flag_counts: dict[str, int] = {}
+    for consistency in packages.values():
+        for flag in consistency.get_flags():
+            flag_counts[flag] = flag_counts.get(flag, 0) + 1
+    metrics.set("packages_checked", len(packages), "Number of packages checked.")
+    for flag in [
+        "outdated",
+        "unknown version",
+        "no tag",
+        "tagged but not built",
+        "pinned but not published",
+    ]:
+        metrics.set(
+            "packages_flagged",
+            flag_counts.get(flag, 0),
+            "Number of packages with an inconsistency.",
+            {"flag": flag},
+        )
+
+
+def main(opts: argparse.Namespace) -> None:
+    """
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    metrics = metrics_helpers.CheckMetrics("cycle_consistency")
+    success = False
+    try:
+        run_check(opts, metrics)
+        success = True
+    finally:
+        if opts.metrics_file is not None:
+            metrics.set("check_success", int(success), "1 if the check run succeeded.")
+            metrics.write(opts.metrics_file)
+
+
+def runner() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the cycle versions with the GitHub tags and the "
+        "conda channel in one run."
+    )
+
+    parser.add_argument(
+        "-t",
+        "--token-file",
+        type=pathlib.Path,
+        default="~/.gh_token",
+        help="Specify path to GitHub token file.",
+    )
+
+    parser.add_argument(
+        "--problems",
+        action="store_true",
+        help="Only show the packages with inconsistencies.",
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        type=pathlib.Path,
+        default=None,
+        help="Write the check results and timings to this file in the OpenMetrics "
+        "text format, e.g. for the node_exporter textfile collector.",
+    )
+
+    parser.add_argument(
+        "--ref",
+        default=None,
+        help=f"Read {check_software_releases.ENV_FILE} at this branch, tag or "
+        f"commit of {check_software_releases.CYCLE_REPO} instead of from the "
+        "working tree. The repository can be bare.",
+    )
+
+    parser.add_argument(
+        "--recipes-ref",
+        default=None,
+        help="Read the recipes at this branch, tag or commit of "
+        f"{check_software_releases.RECIPES_REPO} instead of from the working tree. "
+        "The repository can be bare.",
+    )
+
+    git_mirror.add_mirror_arguments(parser)
+
+    parser.add_argument(
+        "cycle_build_dir",
+        type=pathlib.Path,
+        nargs="?",
+        default=None,
+        help=f"Path to where the {check_software_releases.CYCLE_REPO} and "
+        f"{check_software_releases.RECIPES_REPO} directories live. "
+        "Not needed with --git-mirror.",
+    )
+
+    instrumentation.run(parser, main)
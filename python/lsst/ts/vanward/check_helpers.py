@@ -14,10 +14,13 @@ REPOSITORY_MAP : `dict`
     Mapping of packages to GitHub repository names.
 """
 
+import pathlib
 from dataclasses import dataclass
 
 from packaging.version import Version
 
+from . import git_helpers
+
 __all__ = [
     "IGNORE_LIST",
     "ORG_LIST",
@@ -25,6 +28,10 @@ __all__ = [
     "RECIPE_MAP",
     "REPOSITORY_MAP",
     "SoftwareVersions",
+    "parse_cycle_env",
+    "parse_cycle_env_text",
+    "read_repository_file",
+    "read_repository_files",
 ]
 
 
@@ -47,6 +54,126 @@ class SoftwareVersions:
         return Version(self.current) >= Version(self.latest)
 
 
+def parse_cycle_env(env_file: pathlib.Path) -> dict[str, str]:
+    """Read the package versions from a cycle build environment file.
+
+    Parameters
+    ----------
+    env_file : `pathlib.Path`
+        The cycle build environment file.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the variable names to their values in file order.
+    """
+    with open(env_file) as ifile:
+        return parse_cycle_env_text(ifile.read())
+
+
+def parse_cycle_env_text(text: str) -> dict[str, str]:
+    """Read the package versions from the contents of a cycle build
+    environment file.
+
+    Parameters
+    ----------
+    text : `str`
+        The contents of the cycle build environment file.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the variable names to their values in file order.
+    """
+    variables = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#"):
+            continue
+        parts = line.split("=")
+        # Skip blank lines
+        if len(parts) < 2:
+            continue
+        variables[parts[0]] = parts[1]
+    return variables
+
+
+def read_repository_files(
+    parent_dir: pathlib.Path,
+    repository: str,
+    paths: list[str],
+    ref: str | None = None,
+) -> dict[str, str | None]:
+    """Read files from a repository working tree or from its git objects.
+
+    Parameters
+    ----------
+    parent_dir : `pathlib.Path`
+        The directory holding the repository.
+    repository : `str`
+        The name of the repository.
+    paths : `list`
+        The paths of the files relative to the repository root.
+    ref : `str` or None, optional
+        The branch, tag or commit to read the files at. If None, the files
+        are read from the working tree of the clone, or at HEAD when there
+        is only a bare repository.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the paths to the file contents. Missing files are None.
+    """
+    repository_dir = git_helpers.get_repository_dir(parent_dir, repository)
+    if ref is None and repository_dir.name != repository and repository_dir.exists():
+        ref = "HEAD"
+    if ref is not None:
+        return git_helpers.read_files(repository_dir, ref, paths)
+
+    files: dict[str, str | None] = {}
+    for path in paths:
+        try:
+            with open(parent_dir.expanduser() / repository / path) as ifile:
+                files[path] = ifile.read()
+        except FileNotFoundError:
+            files[path] = None
+    return files
+
+
+def read_repository_file(
+    parent_dir: pathlib.Path, repository: str, path: str, ref: str | None = None
+) -> str:
+    """Read a file from a repository working tree or from its git objects.
+
+    Parameters
+    ----------
+    parent_dir : `pathlib.Path`
+        The directory holding the repository.
+    repository : `str`
+        The name of the repository.
+    path : `str`
+        The path of the file relative to the repository root.
+    ref : `str` or None, optional
+        The branch, tag or commit to read the file at. If None, the file is
+        read from the working tree of the clone.
+
+    Returns
+    -------
+    `str`
+        The file contents.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist.
+    """
+    text = read_repository_files(parent_dir, repository, [path], ref)[path]
+    if text is None:
+        location = "working tree" if ref is None else ref
+        raise FileNotFoundError(f"Cannot find {path} in {repository} at {location}.")
+    return text
+
+
 ORG_LIST = ["lsst-ts"]
 
 IGNORE_LIST = [
@@ -13,15 +13,17 @@ RECIPES_REPO : `str`
 """
 
 import argparse
+import datetime
+import functools
 import io
-import os
 import pathlib
+from typing import TYPE_CHECKING
 
-import gql
-import gql.transport.requests
-import yaml
+from . import check_helpers, git_mirror, instrumentation, metrics_helpers
 
-from . import check_helpers
+if TYPE_CHECKING:
+    import gql
+    import gql.client
 
 CYCLE_REPO = "ts_cycle_build"
 RECIPES_REPO = "ts_recipes"
@@ -61,7 +63,7 @@ def fixup_version(version_str: str | None) -> str | None:
     return fixed_version
 
 
-def specific_graphql_query() -> gql.gql:
+def specific_graphql_query() -> "gql.gql":
     """Create a GraphQL query for a specific repository.
 
     Returns
@@ -69,6 +71,8 @@ def specific_graphql_query() -> gql.gql:
     `gql.gql`
         The GraphQL query to execute.
     """
+    import gql
+
     return gql.gql(
         """
         query($owner: String!, $name: String!) {
@@ -91,7 +95,7 @@ def specific_graphql_query() -> gql.gql:
     )
 
 
-def graphql_query(org_name: str, cursor: str | None = None) -> gql.gql:
+def graphql_query(org_name: str, cursor: str | None = None) -> "gql.gql":
     """Create a GraphQL query for the GitHub API.
 
     Parameters
@@ -106,6 +110,8 @@ def graphql_query(org_name: str, cursor: str | None = None) -> gql.gql:
     `gql.gql`
         The GraphQL query to execute.
     """
+    import gql
+
     if cursor is None:
         repo_str = f"repositories(first: {NUMBER_OF_RESULTS_TO_FETCH})"
     else:
@@ -148,8 +154,82 @@ def graphql_query(org_name: str, cursor: str | None = None) -> gql.gql:
     )
 
 
+def latest_tags_graphql_query(repositories: list[tuple[str, str]]) -> "gql.gql":
+    """Create a GraphQL query for the latest tags of several repositories.
+
+    Parameters
+    ----------
+    repositories : `list`
+        The GitHub owner and name of each repository.
+
+    Returns
+    -------
+    `gql.gql`
+        The GraphQL query to execute.
+    """
+    import gql
+
+    repository_queries = "".join(
+        f"""
+          repository{i}: repository(owner: "{owner}", name: "{name}") {{
+            name
+            refs(
+              refPrefix: "refs/tags/"
+              first: 1
+              orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}
+            ) {{
+              edges {{
+                node {{
+                  name
+                }}
+              }}
+            }}
+          }}"""
+        for i, (owner, name) in enumerate(repositories)
+    )
+    return gql.gql(f"query {{{repository_queries}\n}}")
+
+
+def get_latest_tags(
+    client: "gql.client.SyncClientSession", repositories: list[tuple[str, str]]
+) -> dict[str, str | None]:
+    """Query the latest tags of several repositories in a single request.
+
+    Parameters
+    ----------
+    client : `gql.client.SyncClientSession`
+        The GraphQL session to use.
+    repositories : `list`
+        The GitHub owner and name of each repository.
+
+    Returns
+    -------
+    `dict`
+        Mapping of repository name to the latest tag. Repositories that cannot
+        be found are left out.
+    """
+    import gql.transport.exceptions
+
+    if not repositories:
+        return {}
+    try:
+        results = client.execute(latest_tags_graphql_query(repositories))
+    except gql.transport.exceptions.TransportQueryError as e:
+        # Missing repositories are reported as errors next to the results.
+        if e.data is None:
+            raise
+        results = e.data
+    repository_versions = {}
+    for result in results.values():
+        if result is None:
+            continue
+        refs = result["refs"]["edges"]
+        repository_versions[result["name"]] = refs[0]["node"]["name"] if refs else None
+    return repository_versions
+
+
 def add_specific_repository_version(
-    client: gql.Client,
+    client: "gql.client.SyncClientSession",
     repository_versions: dict[str, str | None],
     owner: str,
     name: str,
@@ -158,8 +238,8 @@ def add_specific_repository_version(
 
     Parameters
     ----------
-    client : `gql.Client`
-        The GraphQL client to use.
+    client : `gql.client.SyncClientSession`
+        The GraphQL session to use.
     repository_versions : `dict`
         Mapping of repository name to the latest tag.
     owner : `str`
@@ -206,152 +286,309 @@ def read_secrets(secret_file: pathlib.Path) -> str:
     return token.strip()
 
 
-def get_version_from_recipe(recipe_file: io.TextIOWrapper) -> str:
+@functools.cache
+def create_github_client(
+    token_file: pathlib.Path,
+) -> "gql.client.SyncClientSession":
+    """Create a session with the GitHub GraphQL API.
+
+    The session is created once per process and stays connected, so a long
+    running process such as the vanward daemon only fetches the GitHub schema
+    once and reuses the HTTP connections of the transport.
+
+    Parameters
+    ----------
+    token_file : `pathlib.Path`
+        The GitHub token file.
+
+    Returns
+    -------
+    `gql.client.SyncClientSession`
+        The connected GraphQL session.
+    """
+    import gql
+    import gql.transport.requests
+
+    gh_token = read_secrets(token_file.expanduser())
+
+    header_token = f"Bearer {gh_token}"
+    header = {"Authorization": header_token}
+    transport = gql.transport.requests.RequestsHTTPTransport(
+        GITHUB_GRAPHQL_ENDPOINT, headers=header, retries=3
+    )
+    client = gql.Client(transport=transport, fetch_schema_from_transport=True)
+    # Client.execute connects and closes the transport, and so opens a new
+    # requests session, for every query.
+    return client.connect_sync()
+
+
+def get_recipe_path(recipe: str) -> str:
+    """Get the path of a conda recipe in the recipes repository.
+
+    Parameters
+    ----------
+    recipe : `str`
+        The name of the recipe.
+
+    Returns
+    -------
+    `str`
+        The path of the recipe meta package configuration file.
+    """
+    return f"{recipe}/conda/meta.yaml"
+
+
+def get_version_from_recipe(recipe_file: io.TextIOWrapper | str) -> str:
     """Retrieve a version from a conda meta package.
 
     Parameters
     ----------
-    recipe_file : `io.TextIOWrapper`
-        The conda meta package configuration file.
+    recipe_file : `io.TextIOWrapper` or `str`
+        The conda meta package configuration file or its contents.
 
     Returns
     -------
     `str`
         The container meta package version.
     """
+    import yaml
+
     values = yaml.safe_load(recipe_file)
     return values["package"]["version"]
 
 
-def main(opts: argparse.Namespace) -> None:
-    """Function that does all the heavy lifting.
+def run_check(opts: argparse.Namespace, metrics: metrics_helpers.CheckMetrics) -> None:
+    """Compare the cycle build versions with the latest tags.
 
     Parameters
     ----------
     opts : `argparse.Namespace`
         The script command-line arguments and options.
+    metrics : `metrics_helpers.CheckMetrics`
+        The collector of the check metrics.
     """
 
+    with metrics.stage("git_mirror"):
+        cycle_build_dir = git_mirror.resolve_parent_dir(
+            opts.cycle_build_dir, opts.git_mirror, [CYCLE_REPO, RECIPES_REPO]
+        )
+
     # Gather the cycle build versions
-    software_versions = {}
-    with open(opts.cycle_build_dir / CYCLE_REPO / ENV_FILE) as ifile:
-        for line in ifile.readlines():
-            if line.startswith("#"):
-                continue
-            line = line.strip()
-            parts = line.split("=")
-            # Skip blank lines
-            if len(parts) < 2:
-                continue
-            if parts[0] in check_helpers.IGNORE_LIST:
-                continue
-            software_versions[parts[0]] = check_helpers.SoftwareVersions(parts[1])
+    with metrics.stage("read_cycle"):
+        cycle_env = check_helpers.parse_cycle_env_text(
+            check_helpers.read_repository_file(
+                cycle_build_dir, CYCLE_REPO, ENV_FILE, opts.ref
+            )
+        )
+        software_versions = {
+            package: check_helpers.SoftwareVersions(version)
+            for package, version in cycle_env.items()
+            if package not in check_helpers.IGNORE_LIST
+        }
 
     # Construct and call the repository queries
-    gh_token = read_secrets(opts.token_file.expanduser())
-
-    header_token = f"Bearer {gh_token}"
-    header = {"Authorization": header_token}
-    transport = gql.transport.requests.RequestsHTTPTransport(
-        GITHUB_GRAPHQL_ENDPOINT, headers=header, retries=3
-    )
-    client = gql.Client(transport=transport, fetch_schema_from_transport=True)
+    client = create_github_client(opts.token_file)
 
     repository_versions = {}
-    for organization in check_helpers.ORG_LIST:
-        has_next_page = True
-        cursor = None
-        while has_next_page:
-            try:
-                results = client.execute(graphql_query(organization, cursor))
-            except Exception:
-                print(graphql_query(organization, cursor))
-                raise
-            if opts.verbose:
-                print_rate_limit(results["rateLimit"])
-            has_next_page = results["organization"]["repositories"]["pageInfo"][
-                "hasNextPage"
-            ]
-            cursor = results["organization"]["repositories"]["pageInfo"]["endCursor"]
-            repos_list = results["organization"]["repositories"]["edges"]
-            for repo in repos_list:
-                key = repo["node"]["name"]
+    num_requests = 0
+    with metrics.stage("github_organizations"):
+        for organization in check_helpers.ORG_LIST:
+            has_next_page = True
+            cursor = None
+            while has_next_page:
                 try:
-                    version = repo["node"]["refs"]["edges"][0]["node"]["name"]
-                except IndexError:
-                    version = None
-                repository_versions[key] = version
+                    num_requests += 1
+                    results = client.execute(graphql_query(organization, cursor))
+                except Exception:
+                    print(graphql_query(organization, cursor))
+                    raise
+                if opts.verbose:
+                    print_rate_limit(results["rateLimit"])
+                set_rate_limit_metrics(metrics, results["rateLimit"])
+                has_next_page = results["organization"]["repositories"]["pageInfo"][
+                    "hasNextPage"
+                ]
+                cursor = results["organization"]["repositories"]["pageInfo"][
+                    "endCursor"
+                ]
+                repos_list = results["organization"]["repositories"]["edges"]
+                for repo in repos_list:
+                    key = repo["node"]["name"]
+                    try:
+                        version = repo["node"]["refs"]["edges"][0]["node"]["name"]
+                    except IndexError:
+                        version = None
+                    repository_versions[key] = version
 
     # Add the repository versions to the ones gathered from the cycle build.
     repository_map_keys = list(check_helpers.REPOSITORY_MAP.keys())
     recipe_map_values = list(check_helpers.RECIPE_MAP.values())
-    for package in software_versions:
-        if package in repository_map_keys:
-            repository_name = check_helpers.REPOSITORY_MAP[package]
-        else:
-            repository_name = package
-        if repository_name in ["rubin_scheduler", "ctrl_oods", "phosim_utils"]:
-            match repository_name:
-                case "rubin_scheduler":
-                    add_specific_repository_version(
-                        client, repository_versions, owner="lsst", name=repository_name
-                    )
-                case "ctrl_oods":
-                    add_specific_repository_version(
-                        client,
-                        repository_versions,
-                        owner="lsst-dm",
-                        name=repository_name,
-                    )
-                case "phosim_utils":
-                    add_specific_repository_version(
-                        client,
-                        repository_versions,
-                        owner="lsst-dm",
-                        name=repository_name,
-                    )
-        try:
-            software_versions[package].latest = fixup_version(
-                repository_versions[repository_name]
-            )
-        except KeyError:
-            if (
-                repository_name not in check_helpers.RECIPES_HANDLING
-                and repository_name not in recipe_map_values
-            ):
-                print(f"Cannot find {repository_name} in repository list.")
-
-    for recipe in check_helpers.RECIPES_HANDLING:
-        recipe_map_keys = list(check_helpers.RECIPE_MAP.keys())
-        if recipe in recipe_map_keys:
-            recipe_package = check_helpers.RECIPE_MAP[recipe]
-        else:
-            recipe_package = recipe
-        try:
-            with open(
-                os.path.join(
-                    opts.cycle_build_dir, RECIPES_REPO, recipe, "conda", "meta.yaml"
+    missing_packages = []
+    with metrics.stage("github_repositories"):
+        for package in software_versions:
+            if package in repository_map_keys:
+                repository_name = check_helpers.REPOSITORY_MAP[package]
+            else:
+                repository_name = package
+            if repository_name in ["rubin_scheduler", "ctrl_oods", "phosim_utils"]:
+                num_requests += 1
+                match repository_name:
+                    case "rubin_scheduler":
+                        add_specific_repository_version(
+                            client,
+                            repository_versions,
+                            owner="lsst",
+                            name=repository_name,
+                        )
+                    case "ctrl_oods":
+                        add_specific_repository_version(
+                            client,
+                            repository_versions,
+                            owner="lsst-dm",
+                            name=repository_name,
+                        )
+                    case "phosim_utils":
+                        add_specific_repository_version(
+                            client,
+                            repository_versions,
+                            owner="lsst-dm",
+                            name=repository_name,
+                        )
+            try:
+                software_versions[package].latest = fixup_version(
+                    repository_versions[repository_name]
+                )
+            except KeyError:
+                if (
+                    repository_name not in check_helpers.RECIPES_HANDLING
+                    and repository_name not in recipe_map_values
+                ):
+                    print(f"Cannot find {repository_name} in repository list.")
+                    missing_packages.append(package)
+    metrics.set(
+        "github_requests",
+        num_requests,
+        "Number of GitHub GraphQL requests made by the check.",
+    )
+
+    with metrics.stage("recipes"):
+        # All the recipes are read at once.
+        recipe_files = check_helpers.read_repository_files(
+            cycle_build_dir,
+            RECIPES_REPO,
+            [get_recipe_path(recipe) for recipe in check_helpers.RECIPES_HANDLING],
+            opts.recipes_ref,
+        )
+        for recipe in check_helpers.RECIPES_HANDLING:
+            recipe_map_keys = list(check_helpers.RECIPE_MAP.keys())
+            if recipe in recipe_map_keys:
+                recipe_package = check_helpers.RECIPE_MAP[recipe]
+            else:
+                recipe_package = recipe
+            recipe_text = recipe_files[get_recipe_path(recipe)]
+            if recipe_text is None:
+                raise FileNotFoundError(
+                    f"Cannot find {get_recipe_path(recipe)} in {RECIPES_REPO}."
                 )
-            ) as mfile:
+            try:
                 software_versions[recipe_package].latest = get_version_from_recipe(
-                    mfile
+                    recipe_text
                 )
-        except KeyError:
-            print(f"Cannot find {recipe} in repository list.")
-        except TypeError:
-            print(f"Cannot get latest version from {recipe}.")
+            except KeyError:
+                print(f"Cannot find {recipe} in repository list.")
+            except TypeError:
+                print(f"Cannot get latest version from {recipe}.")
 
     # Show version differences.
     if opts.verbose:
         print()
     all_ok = True
+    num_outdated = 0
     for package, versions in software_versions.items():
-        if not versions.is_latest():
+        is_latest = versions.is_latest()
+        if not is_latest:
             print(f"{package}: {versions}")
             all_ok = False
+            num_outdated += 1
+        metrics.set(
+            "package_outdated",
+            0 if is_latest else 1,
+            "1 if the cycle version of the package is not the latest.",
+            {"package": package},
+        )
+        # The versions change with every release, so they are kept out of the
+        # labels of package_outdated to keep its series stable.
+        metrics.set(
+            "package_version_info",
+            1,
+            "The cycle and latest versions of the package.",
+            {
+                "package": package,
+                "current": versions.current,
+                "latest": versions.latest or "",
+            },
+        )
     if all_ok:
         print("No software versions are out of date.")
 
+    metrics.set(
+        "packages_checked",
+        len(software_versions),
+        "Number of packages checked.",
+    )
+    metrics.set(
+        "packages_outdated",
+        num_outdated,
+        "Number of packages whose cycle version is not the latest.",
+    )
+    metrics.set(
+        "packages_unknown",
+        len(missing_packages),
+        "Number of packages whose latest version could not be found.",
+    )
+
+
+def set_rate_limit_metrics(metrics: metrics_helpers.CheckMetrics, info: dict) -> None:
+    """Record the GitHub API rate limit information.
+
+    Parameters
+    ----------
+    metrics : `metrics_helpers.CheckMetrics`
+        The collector of the check metrics.
+    info : `dict`
+        The API rate limit information from the GraphQL query.
+    """
+    reset_at = datetime.datetime.fromisoformat(info["resetAt"].replace("Z", "+00:00"))
+    metrics.set(
+        "github_rate_limit_remaining",
+        info["remaining"],
+        "Remaining GitHub GraphQL rate limit points.",
+    )
+    metrics.set(
+        "github_rate_limit_reset_timestamp_seconds",
+        reset_at.timestamp(),
+        "Time the GitHub GraphQL rate limit resets.",
+    )
+
+
+def main(opts: argparse.Namespace) -> None:
+    """Function that does all the heavy lifting.
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    metrics = metrics_helpers.CheckMetrics("software_releases")
+    success = False
+    try:
+        run_check(opts, metrics)
+        success = True
+    finally:
+        if opts.metrics_file is not None:
+            metrics.set("check_success", int(success), "1 if the check run succeeded.")
+            metrics.write(opts.metrics_file)
+
 
 def runner() -> None:
     parser = argparse.ArgumentParser()
@@ -369,11 +606,36 @@ def runner() -> None:
     )
 
     parser.add_argument(
-        "cycle_build_dir",
+        "--metrics-file",
         type=pathlib.Path,
-        help=f"Path to where the {CYCLE_REPO} and {RECIPES_REPO} directories live.",
+        default=None,
+        help="Write the check results and timings to this file in the OpenMetrics "
+        "text format, e.g. for the node_exporter textfile collector.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--ref",
+        default=None,
+        help=f"Read {ENV_FILE} at this branch, tag or commit of {CYCLE_REPO} "
+        "instead of from the working tree. The repository can be bare.",
+    )
+
+    parser.add_argument(
+        "--recipes-ref",
+        default=None,
+        help=f"Read the recipes at this branch, tag or commit of {RECIPES_REPO} "
+        "instead of from the working tree. The repository can be bare.",
+    )
+
+    git_mirror.add_mirror_arguments(parser)
+
+    parser.add_argument(
+        "cycle_build_dir",
+        type=pathlib.Path,
+        nargs="?",
+        default=None,
+        help=f"Path to where the {CYCLE_REPO} and {RECIPES_REPO} directories live. "
+        "Not needed with --git-mirror.",
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
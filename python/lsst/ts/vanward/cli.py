@@ -0,0 +1,99 @@
+"""Single entry point dispatching to the vanward scripts.
+
+Attributes
+----------
+COMMANDS : `dict`
+    Mapping of the subcommand names to the modules implementing them.
+"""
+
+import importlib
+import os
+import pathlib
+import sys
+
+from . import __version__, daemon, instrumentation
+
+COMMANDS = {
+    "broker_rollout_announcement": "Announce a Kafka broker rollout.",
+    "check_conda_package_versions": "Check cycle versions against conda.",
+    "check_cycle_consistency": "Check cycle versions against GitHub and conda.",
+    "check_software_releases": "Check cycle versions against GitHub tags.",
+    "collect_ticket_commits": "Collect the XML commits of tickets.",
+    "create_cap_release": "Create a CAP release and its ticket.",
+    "create_configuration_tickets": "Create the configuration tickets.",
+    "create_confluence_page": "Create or update a Cycle upgrade page.",
+    "create_summit_upgrade_ticket": "Create the summit upgrade ticket.",
+    "cycle_diff": "Compare the cycle versions between refs.",
+    "daemon": "Run commands in a long lived process.",
+    "find_merges_without_release_tickets": "Find XML merges without tickets.",
+    "git_mirror": "Create or refresh the bare git mirrors.",
+    "incremental_release_announcement": "Announce an incremental release.",
+    "move_bucket_ticket_links": "Move bucket ticket links.",
+    "release_announcement": "Announce a Cycle release.",
+    "release_tickets": "Show the tickets of an XML release.",
+}
+
+__all__ = ["COMMANDS", "run_command", "runner"]
+
+
+def print_usage() -> None:
+    """Print the list of subcommands."""
+    print("usage: vanward [-h] [--version] <command> [<args>]")
+    print()
+    print("commands:")
+    width = max(len(name) for name in COMMANDS)
+    for name, description in COMMANDS.items():
+        print(f"  {name:{width}}  {description}")
+    print()
+    print("Use vanward <command> --help for the options of a command.")
+
+
+def run_command(args: list[str], prog: str | None = None) -> None:
+    """Run a subcommand in this process.
+
+    Parameters
+    ----------
+    args : `list`
+        The subcommand name followed by its arguments.
+    prog : `str`, optional
+        The program name shown in the usage of the subcommand. By default
+        ``vanward <command>``.
+    """
+    if not args or args[0] in ("-h", "--help"):
+        print_usage()
+        return
+    if args[0] == "--version":
+        print(f"vanward {__version__}")
+        return
+
+    # Accept dashes as well as underscores in the command name.
+    command = args[0].replace("-", "_")
+    if command not in COMMANDS:
+        print_usage()
+        sys.exit(f"vanward: unknown command {args[0]!r}")
+
+    # Only the selected script and its dependencies are imported.
+    module = importlib.import_module(f".{command}", __package__)
+    if prog is None:
+        prog = f"vanward {command}"
+    token = instrumentation.COMMAND_LINE.set((prog, args[1:]))
+    try:
+        module.runner()
+    finally:
+        instrumentation.COMMAND_LINE.reset(token)
+
+
+def runner() -> None:
+    args = sys.argv[1:]
+    prog = None
+    # The script entry points also call this function, so they go through the
+    # daemon as well; they are told apart by the name they were started with.
+    name = pathlib.Path(sys.argv[0]).stem
+    if name in COMMANDS:
+        args = [name] + args
+        prog = name
+    if args and args[0] != "daemon" and not os.environ.get(daemon.NO_DAEMON_ENV):
+        exit_code = daemon.run_remote(args, prog)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    run_command(args, prog)
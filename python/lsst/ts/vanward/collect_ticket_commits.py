@@ -1,17 +1,23 @@
 """Script to find commit sha hashes for Jira tickets."""
 
 import argparse
+import json
 import os
 import pathlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import git
+from . import git_helpers, git_mirror, instrumentation, xml_helpers
+
+if TYPE_CHECKING:
+    import git
 
 XML_DIR = "ts_xml"
 
 __all__ = ["runner"]
 
 
-def fetch_remote_branch(repo: git.Repo, branch: str) -> bool:
+def fetch_remote_branch(repo: "git.Repo", branch: str) -> bool:
     """Fetch a single branch from origin. Returns True if branch exists.
 
     Parameters
@@ -53,7 +59,9 @@ def extract_ticket_key(message: str) -> str:
     return message.split(os.linesep)[0].split("/")[-1]
 
 
-def get_merge_commits(xml_repo: git.Repo, previous_xml_version: str) -> set[git.Commit]:
+def get_merge_commits(
+    xml_repo: "git.Repo", previous_xml_version: str
+) -> set["git.Commit"]:
     """Get all merge commits from the previous XML version to develop.
 
     Parameters
@@ -93,9 +101,81 @@ def get_merge_commits(xml_repo: git.Repo, previous_xml_version: str) -> set[git.
     return merge_commits
 
 
+@dataclass
+class TicketChanges:
+    """Holder for the changes a ticket merged into the branch."""
+
+    files: set[str] = field(default_factory=set)
+    added: int = 0
+    removed: int = 0
+
+    @property
+    def cscs(self) -> set[str]:
+        """The CSCs whose interfaces the ticket changed."""
+        return {
+            csc
+            for csc in map(xml_helpers.get_csc_from_path, self.files)
+            if csc is not None
+        }
+
+
+def get_ticket_changes(
+    xml_repo: "git.Repo", revision_range: str, line_counts: bool = True
+) -> dict[str, TicketChanges]:
+    """Get the files and lines each merged ticket changed.
+
+    All the merges into the branch are read with one ``git log`` pass,
+    comparing each merge with its first parent.
+
+    Parameters
+    ----------
+    xml_repo : `git.Repo`
+        The git Repo object for ts_xml.
+    revision_range : `str`
+        The range of the merges.
+    line_counts : `bool`, optional
+        If True, also count the added and removed lines with ``--numstat``.
+        This needs the file contents, which a mirror without them fetches
+        one file at a time, so only the names are read otherwise.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the ticket keys to their changes.
+    """
+    output = xml_repo.git.log(
+        "--merges",
+        "--first-parent",
+        "-m",
+        "--numstat" if line_counts else "--name-only",
+        "--no-renames",
+        "--format=%x00%s",
+        revision_range,
+    )
+    ticket_changes: dict[str, TicketChanges] = {}
+    for entry in output.split("\0")[1:]:
+        subject, *lines = entry.splitlines()
+        changes = ticket_changes.setdefault(
+            extract_ticket_key(subject), TicketChanges()
+        )
+        for line in lines:
+            if not line:
+                continue
+            if not line_counts:
+                changes.files.add(line)
+                continue
+            added, removed, path = line.split("\t", 2)
+            changes.files.add(path)
+            # Binary files have no line counts.
+            if added != "-":
+                changes.added += int(added)
+                changes.removed += int(removed)
+    return ticket_changes
+
+
 def match_commits_to_tickets(
-    merge_commits: set[git.Commit], tickets_keys: set[str]
-) -> tuple[list[git.Commit], set[str]]:
+    merge_commits: set["git.Commit"], tickets_keys: set[str]
+) -> tuple[list["git.Commit"], set[str]]:
     """Match commits to tickets.
 
     Parameters
@@ -124,6 +204,76 @@ def match_commits_to_tickets(
     return relevant_commits, tickets_with_commits
 
 
+def print_stats_table(
+    ticket_commits: list[tuple[str, str]], ticket_changes: dict[str, TicketChanges]
+) -> None:
+    """Print the commits of the tickets with their change statistics.
+
+    Parameters
+    ----------
+    ticket_commits : `list`
+        The ticket keys and commit sha hashes.
+    ticket_changes : `dict`
+        Mapping of the ticket keys to their changes.
+    """
+    rows = [("Ticket", "Commit", "Files", "Added", "Removed", "CSCs")]
+    for ticket_key, hexsha in ticket_commits:
+        changes = ticket_changes.get(ticket_key)
+        if changes is None:
+            # Merged into another ticket branch, counted with that ticket.
+            rows.append((ticket_key, hexsha[:10], "-", "-", "-", "-"))
+            continue
+        rows.append(
+            (
+                ticket_key,
+                hexsha[:10],
+                str(len(changes.files)),
+                f"+{changes.added}",
+                f"-{changes.removed}",
+                ", ".join(sorted(changes.cscs)),
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]) - 1)]
+    for row in rows:
+        cells = [cell.ljust(width) for cell, width in zip(row, widths)]
+        print("  ".join(cells + [row[-1]]).rstrip())
+
+
+def print_json(
+    ticket_commits: list[tuple[str, str]],
+    tickets_with_no_commits: set[str],
+    ticket_changes: dict[str, TicketChanges],
+) -> None:
+    """Print the commits of the tickets with their changes as JSON.
+
+    Parameters
+    ----------
+    ticket_commits : `list`
+        The ticket keys and commit sha hashes.
+    tickets_with_no_commits : `set`
+        The tickets without commits.
+    ticket_changes : `dict`
+        Mapping of the ticket keys to their changes.
+    """
+    commits = []
+    for ticket_key, hexsha in ticket_commits:
+        entry: dict = {"ticket": ticket_key, "commit": hexsha}
+        changes = ticket_changes.get(ticket_key)
+        if changes is not None:
+            entry.update(
+                files=sorted(changes.files),
+                added=changes.added,
+                removed=changes.removed,
+                cscs=sorted(changes.cscs),
+            )
+        commits.append(entry)
+    print(
+        json.dumps(
+            {"commits": commits, "missing": sorted(tickets_with_no_commits)}, indent=2
+        )
+    )
+
+
 def main(opts: argparse.Namespace) -> None:
     """
     Parameters
@@ -131,7 +281,10 @@ def main(opts: argparse.Namespace) -> None:
     opts : `argparse.Namespace`
         The script command-line arguments and options.
     """
-    xml_repo = git.Repo(opts.xml_dir / XML_DIR)
+    import git
+
+    xml_dir = git_mirror.resolve_parent_dir(opts.xml_dir, opts.git_mirror, [XML_DIR])
+    xml_repo = git.Repo(git_helpers.get_repository_dir(xml_dir, XML_DIR))
     # get all merge commits from the previous XML version to develop
     # and the ones merged into them
     merge_commits = get_merge_commits(xml_repo, opts.previous_xml_version)
@@ -145,17 +298,39 @@ def main(opts: argparse.Namespace) -> None:
     )
 
     tickets_with_no_commits = tickets_keys - tickets_with_commits
+    ticket_commits = [
+        (extract_ticket_key(relevant_commit.message), relevant_commit.hexsha)
+        for relevant_commit in relevant_commits
+    ]
+
+    ticket_changes = {}
+    if opts.cscs or opts.stats or opts.json:
+        ticket_changes = get_ticket_changes(
+            xml_repo,
+            f"{opts.previous_xml_version}..develop",
+            line_counts=opts.stats or opts.json,
+        )
+
+    if opts.json:
+        print_json(ticket_commits, tickets_with_no_commits, ticket_changes)
+        return
 
     if tickets_with_no_commits:
         print(
             f"No commits found for the following tickets: {', '.join(tickets_with_no_commits)}"
         )
 
+    if opts.stats:
+        print_stats_table(ticket_commits, ticket_changes)
+        return
+
     print("Found commits for the following tickets:")
-    for relevant_commit in relevant_commits:
-        print(
-            f"{extract_ticket_key(relevant_commit.message)}: {relevant_commit.hexsha}"
-        )
+    for ticket_key, hexsha in ticket_commits:
+        line = f"{ticket_key}: {hexsha}"
+        if opts.cscs and ticket_key in ticket_changes:
+            cscs = ticket_changes[ticket_key].cscs
+            line += f" ({', '.join(sorted(cscs)) or 'no CSCs'})"
+        print(line)
 
 
 def runner() -> None:
@@ -168,13 +343,35 @@ def runner() -> None:
     parser.add_argument(
         "xml_dir",
         type=pathlib.Path,
-        help=f"Path to where the {XML_DIR} directory lives.",
+        nargs="?",
+        default=None,
+        help=f"Path to where the {XML_DIR} directory lives. "
+        "Not needed with --git-mirror.",
     )
 
     parser.add_argument(
         "previous_xml_version", help="Provide the previous Git XML version."
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--cscs",
+        action="store_true",
+        help="Also show the CSCs whose interfaces each ticket merged into develop changed.",
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Show a table of the files and lines each ticket merged into develop "
+        "changed, and the affected CSCs.",
+    )
+
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the commits with the changes of the tickets as JSON.",
+    )
+
+    git_mirror.add_mirror_arguments(parser)
 
-    main(args)
+    instrumentation.run(parser, main)
@@ -0,0 +1,397 @@
+"""Helpers for editing Confluence pages section by section.
+
+Attributes
+----------
+ANCHOR_PREFIX : `str`
+    The prefix of the anchor names marking the managed page sections.
+ANCHOR_REGEX : `re.Pattern`
+    Regular expression matching a section anchor macro.
+END_ANCHOR_PREFIX : `str`
+    The prefix of the anchor names marking the end of the managed page
+    sections, followed by the section name.
+LEGACY_HEADING_REGEXES : `list`
+    Regular expressions matching the headings of sections created before the
+    anchors were added, with the section names they correspond to.
+PAGE_BODY_DIR : `str`
+    The directory within the cache directory holding the last seen page
+    bodies.
+PAGE_CACHE_FILE : `str`
+    The name of the page index within the cache directory.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from . import cache_helpers
+
+if TYPE_CHECKING:
+    import atlassian
+
+ANCHOR_PREFIX = "vanward-"
+ANCHOR_REGEX = re.compile(
+    r'<ac:structured-macro[^>]*ac:name="anchor"[^>]*>\s*'
+    rf'<ac:parameter ac:name="">{ANCHOR_PREFIX}([\w-]+)</ac:parameter>\s*'
+    r"</ac:structured-macro>"
+)
+END_ANCHOR_PREFIX = "end-"
+LEGACY_HEADING_REGEXES = [
+    (re.compile(r"<h2>\s*<u>Incremental Release Revision (\d+)</u>"), "revision-{}"),
+    (re.compile(r"<h2>\s*<u>Requests for next incremental upgrade</u>"), "requests"),
+]
+PAGE_BODY_DIR = "confluence_pages"
+PAGE_CACHE_FILE = "confluence_pages.json"
+
+__all__ = [
+    "ANCHOR_PREFIX",
+    "END_ANCHOR_PREFIX",
+    "PAGE_CACHE_FILE",
+    "PageInfo",
+    "PageSection",
+    "PageSections",
+    "get_body_hash",
+    "get_content",
+    "get_page",
+    "record_page",
+]
+
+
+def get_body_hash(body: str) -> str:
+    """Create the content hash of a page body.
+
+    Parameters
+    ----------
+    body : `str`
+        The page body in storage format.
+
+    Returns
+    -------
+    `str`
+        The hex digest of the body.
+    """
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+@dataclass
+class PageInfo:
+    """Holder for the Confluence page information."""
+
+    id: str
+    version: int
+    body: str
+
+    @classmethod
+    def from_content(cls, content: dict[str, Any]) -> "PageInfo":
+        """Create the page information from a content API response.
+
+        Parameters
+        ----------
+        content : `dict`
+            The page content, including the version and storage body.
+
+        Returns
+        -------
+        `PageInfo`
+            The page information.
+        """
+        return cls(
+            id=str(content["id"]),
+            version=content["version"]["number"],
+            body=content["body"]["storage"]["value"],
+        )
+
+
+def get_page_cache_key(space: str, title: str) -> str:
+    """Create the key of a page in the page index.
+
+    Parameters
+    ----------
+    space : `str`
+        The key of the Confluence space.
+    title : `str`
+        The title of the page.
+
+    Returns
+    -------
+    `str`
+        The space and title of the page.
+    """
+    return f"{space}:{title}"
+
+
+def record_page(space: str, title: str, page: PageInfo) -> None:
+    """Remember the Id, version and body of a page locally.
+
+    Parameters
+    ----------
+    space : `str`
+        The key of the Confluence space.
+    title : `str`
+        The title of the page.
+    page : `PageInfo`
+        The page information.
+    """
+    body_dir = cache_helpers.get_cache_dir() / PAGE_BODY_DIR
+    body_dir.mkdir(exist_ok=True)
+    with open(body_dir / f"{page.id}.html", "w") as bfile:
+        bfile.write(page.body)
+    index = cache_helpers.read_json_cache(PAGE_CACHE_FILE)
+    index[get_page_cache_key(space, title)] = dict(
+        id=page.id, version=page.version, body_hash=get_body_hash(page.body)
+    )
+    cache_helpers.write_json_cache(PAGE_CACHE_FILE, index)
+
+
+def read_cached_body(page_id: str, body_hash: str) -> str | None:
+    """Read the local copy of a page body.
+
+    Parameters
+    ----------
+    page_id : `str`
+        The Id of the page.
+    body_hash : `str`
+        The expected hash of the body.
+
+    Returns
+    -------
+    `str` or None
+        The page body or None if the copy is missing or does not match the
+        hash.
+    """
+    try:
+        with open(
+            cache_helpers.get_cache_dir() / PAGE_BODY_DIR / f"{page_id}.html"
+        ) as bfile:
+            body = bfile.read()
+    except OSError:
+        return None
+    return body if get_body_hash(body) == body_hash else None
+
+
+def get_content(
+    confluence: "atlassian.Confluence", path: str, params: dict[str, Any]
+) -> dict[str, Any]:
+    """Get a resource from the Confluence content API.
+
+    Parameters
+    ----------
+    confluence : `atlassian.Confluence`
+        The Confluence server instance.
+    path : `str`
+        The path of the resource.
+    params : `dict`
+        The query parameters.
+
+    Returns
+    -------
+    `dict`
+        The decoded response.
+
+    Raises
+    ------
+    RuntimeError
+        If the response is empty.
+    """
+    content = confluence.get(path, params=params)
+    if content is None:
+        raise RuntimeError(f"Empty response from Confluence for {path}.")
+    return content
+
+
+def get_page(
+    confluence: "atlassian.Confluence", space: str, title: str
+) -> PageInfo | None:
+    """Get a Confluence page, downloading its body only when it changed.
+
+    A page seen before is checked with a version only request and its body
+    is taken from the local copy if the version did not change. Unknown
+    pages are looked up by title.
+
+    Parameters
+    ----------
+    confluence : `atlassian.Confluence`
+        The Confluence server instance.
+    space : `str`
+        The key of the Confluence space.
+    title : `str`
+        The title of the page.
+
+    Returns
+    -------
+    `PageInfo` or None
+        The page information or None if the page does not exist.
+    """
+    import requests
+
+    index = cache_helpers.read_json_cache(PAGE_CACHE_FILE)
+    cached = index.get(get_page_cache_key(space, title))
+    if cached is not None:
+        path = f"/rest/api/content/{cached['id']}"
+        content: dict[str, Any] | None
+        try:
+            content = get_content(confluence, path, {"expand": "version"})
+        except requests.HTTPError:
+            # The page was deleted or moved, look it up by title again.
+            content = None
+        if content is not None and content["title"] == title:
+            if content["version"]["number"] == cached["version"]:
+                body = read_cached_body(cached["id"], cached["body_hash"])
+                if body is not None:
+                    return PageInfo(cached["id"], cached["version"], body)
+            content = get_content(confluence, path, {"expand": "version,body.storage"})
+            page = PageInfo.from_content(content)
+            record_page(space, title, page)
+            return page
+
+    results = get_content(
+        confluence,
+        "/rest/api/content",
+        {
+            "spaceKey": space,
+            "title": title,
+            "type": "page",
+            "expand": "version,body.storage",
+        },
+    )["results"]
+    if not results:
+        return None
+    page = PageInfo.from_content(results[0])
+    record_page(space, title, page)
+    return page
+
+
+@dataclass
+class PageSection:
+    """Holder for a managed section of a Confluence page.
+
+    The tail holds the content following the end anchor of the section that
+    does not belong to any managed section, e.g. text added by hand.
+    """
+
+    name: str
+    content: str
+    tail: str = ""
+
+
+class PageSections:
+    """Confluence page body split into its managed sections.
+
+    A managed section starts at an anchor macro named after the section, or
+    at the heading of a section created before the anchors were added. It
+    ends at its end anchor, or if it has none, at the next managed section.
+    Everything before the first managed section is kept as the page head.
+
+    Parameters
+    ----------
+    body : `str`
+        The page body in storage format.
+    """
+
+    def __init__(self, body: str) -> None:
+        boundaries = []
+        end_anchors: dict[str, list[int]] = {}
+        for match in ANCHOR_REGEX.finditer(body):
+            name = match.group(1)
+            if name.startswith(END_ANCHOR_PREFIX):
+                end_name = name.removeprefix(END_ANCHOR_PREFIX)
+                end_anchors.setdefault(end_name, []).append(match.end())
+            else:
+                boundaries.append((match.start(), match.end(), name))
+        for regex, name_format in LEGACY_HEADING_REGEXES:
+            boundaries.extend(
+                (match.start(), match.end(), name_format.format(*match.groups()))
+                for match in regex.finditer(body)
+            )
+        boundaries.sort()
+
+        starts: list[tuple[int, str]] = []
+        last_end = 0
+        for start, end, name in boundaries:
+            # The heading directly following an anchor belongs to it.
+            if starts and starts[-1][1] == name and not body[last_end:start].strip():
+                last_end = end
+                continue
+            starts.append((start, name))
+            last_end = end
+
+        self.head = body[: starts[0][0]] if starts else body
+        self.sections = []
+        for i, (start, name) in enumerate(starts):
+            next_start = starts[i + 1][0] if i + 1 < len(starts) else len(body)
+            end = next(
+                (end for end in end_anchors.get(name, []) if start < end <= next_start),
+                next_start,
+            )
+            if body.startswith("\n", end) and end < next_start:
+                end += 1
+            self.sections.append(
+                PageSection(name, body[start:end], body[end:next_start])
+            )
+
+    @property
+    def body(self) -> str:
+        """The page body in storage format."""
+        return self.head + "".join(
+            section.content + section.tail for section in self.sections
+        )
+
+    def get_names(self) -> list[str]:
+        """Get the names of the sections in page order.
+
+        Returns
+        -------
+        `list`
+            The section names.
+        """
+        return [section.name for section in self.sections]
+
+    def set_section(
+        self,
+        name: str,
+        content: str,
+        replace: bool = False,
+        before: str | None = None,
+    ) -> bool:
+        """Insert a section or replace an existing one.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the section.
+        content : `str`
+            The section content, starting with its anchor and ending with its
+            end anchor.
+        replace : `bool`, optional
+            If True, replace an existing section with the same name and
+            remove any duplicates of it. The content following the replaced
+            sections is kept.
+        before : `str` or None, optional
+            The name of the section to insert a new section in front of. New
+            sections are appended if it is not present.
+
+        Returns
+        -------
+        `bool`
+            True if the page was changed.
+        """
+        if not content.endswith("\n"):
+            content += "\n"
+
+        indexes = [i for i, section in enumerate(self.sections) if section.name == name]
+        if indexes:
+            if not replace:
+                return False
+            first = indexes[0]
+            self.sections[first].content = content
+            for i in reversed(indexes[1:]):
+                self.sections[i - 1].tail += self.sections[i].tail
+                del self.sections[i]
+            return True
+
+        if self.head and not self.head.endswith("\n"):
+            self.head += "\n"
+        names = self.get_names()
+        index = names.index(before) if before in names else len(self.sections)
+        self.sections.insert(index, PageSection(name, content))
+        return True
@@ -11,9 +11,7 @@ JIRA_TEAM : `str`
 import argparse
 import pathlib
 
-from jira import JIRA
-
-from . import ticket_helpers
+from . import instrumentation, issue_plans, ticket_helpers
 
 SITE_LIST = ["Tucson test stand", "Base test stand", "summit"]
 JIRA_TEAM = "Deployment"
@@ -28,9 +26,6 @@ def main(opts: argparse.Namespace) -> None:
     opts : `argparse.Namespace`
         The script command-line arguments and options.
     """
-    jira_auth = ticket_helpers.get_jira_credentials(opts.token_file)
-    js = JIRA(server=ticket_helpers.JIRA_SERVER, basic_auth=jira_auth)
-
     release_name = f"ts_xml {opts.release}"
     release_description = ""
     if opts.cycle:
@@ -38,13 +33,6 @@ def main(opts: argparse.Namespace) -> None:
         if opts.revision:
             release_description += f" revision {opts.revision}"
 
-    js.create_version(
-        name=release_name,
-        project="CAP",
-        description=release_description,
-    )
-    print(f"Created release '{release_name}' in CAP project.")
-
     issue_fields = dict(
         project={"key": "CAP"},
         issuetype={"name": "Story"},
@@ -53,12 +41,37 @@ def main(opts: argparse.Namespace) -> None:
         components=[{"name": "None"}],
     )
 
+    if opts.plan:
+        # Nothing is sent in plan mode, so users are not resolved.
+        if opts.assignee:
+            issue_fields["assignee"] = {"name": opts.assignee}
+        issue_plans.print_version_plan("CAP", release_name, release_description)
+        issue_plans.print_issue_plans(
+            [issue_plans.IssuePlan(role="catch-all", fields=issue_fields)]
+        )
+        return
+
+    js = ticket_helpers.get_jira_client(opts.token_file)
+
     if opts.assignee:
-        assignee = ticket_helpers.get_user_ids(opts.assignee, js)
+        assignee = ticket_helpers.get_user_ids(opts.assignee, js)[0]
         issue_fields["assignee"] = {"id": assignee}
 
-    issue = js.create_issue(**issue_fields)
-    print(f"Created ticket {issue.key}: {issue.fields.summary}")
+    plans = [issue_plans.IssuePlan(role="catch-all", fields=issue_fields)]
+
+    if issue_plans.create_missing_version(js, "CAP", release_name, release_description):
+        print(f"Created release '{release_name}' in CAP project.")
+    else:
+        print(f"Release '{release_name}' already exists in CAP project.")
+
+    results = issue_plans.create_missing_issues(js, plans, release_name)
+    result = results["catch-all"]
+    if not result.ok:
+        raise RuntimeError(f"Cannot create catch-all ticket: {result.error}")
+    if result.existed:
+        print(f"Ticket {result.key} already exists: {issue_fields['summary']}")
+    else:
+        print(f"Created ticket {result.key}: {issue_fields['summary']}")
 
 
 def runner() -> None:
@@ -102,6 +115,10 @@ def runner() -> None:
         help="The assignee for the catch-all ticket. Default: aibsen@lsst.org.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the release and ticket payloads without contacting Jira.",
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
@@ -11,9 +11,7 @@ JIRA_TEAM : `str`
 import argparse
 import pathlib
 
-from jira import JIRA
-
-from . import ticket_helpers
+from . import instrumentation, issue_plans, ticket_helpers
 
 SITE_LIST = ["Tucson test stand", "Base test stand", "summit"]
 JIRA_TEAM = "Deployment"
@@ -28,24 +26,43 @@ def main(opts: argparse.Namespace) -> None:
     opts : `argparse.Namespace`
         The script command-line arguments and options.
     """
-    jira_auth = ticket_helpers.get_jira_credentials(opts.token_file)
-    js = JIRA(server=ticket_helpers.JIRA_SERVER, basic_auth=jira_auth)
-
-    assignee = ticket_helpers.get_user_ids(opts.assignee, js)
-
+    if opts.plan:
+        # Nothing is sent in plan mode, so users are not resolved.
+        assignee = {"name": opts.assignee}
+    else:
+        js = ticket_helpers.get_jira_client(opts.token_file)
+        assignee = {"id": ticket_helpers.get_user_ids(opts.assignee, js)[0]}
+
+    plans = []
     for site in SITE_LIST:
         summary = f"Ready {site} deployment configuration for Cycle {opts.cycle_number}"
 
-        issue = js.create_issue(
-            project={"key": "OSW"},
-            issuetype={"name": "Story"},
-            summary=summary,
-            assignee={"id": assignee},
-            # RubinTeam
-            customfield_10056={"value": JIRA_TEAM},
+        plans.append(
+            issue_plans.IssuePlan(
+                role=site,
+                fields=dict(
+                    project={"key": "OSW"},
+                    issuetype={"name": "Story"},
+                    summary=summary,
+                    assignee=assignee,
+                    # RubinTeam
+                    customfield_10056={"value": JIRA_TEAM},
+                ),
+            )
         )
 
-        print(f"{site}: {issue.key}")
+    if opts.plan:
+        issue_plans.print_issue_plans(plans)
+        return
+
+    results = issue_plans.create_missing_issues(js, plans, f"Cycle {opts.cycle_number}")
+    for site, result in results.items():
+        if result.existed:
+            print(f"{site}: {result.key} (already exists)")
+        elif result.ok:
+            print(f"{site}: {result.key}")
+        else:
+            print(f"{site}: Failed with {result.error}")
 
 
 def runner() -> None:
@@ -68,9 +85,13 @@ def runner() -> None:
     )
 
     parser.add_argument(
-        "cycle_number", type=int, help="The cycle number to create tickets for."
+        "--plan",
+        action="store_true",
+        help="Print the ticket payloads without contacting Jira.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "cycle_number", type=int, help="The cycle number to create tickets for."
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
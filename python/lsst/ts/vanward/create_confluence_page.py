@@ -1,45 +1,163 @@
-"""Script to create/update Cycle upgrade Confluence page."""
+"""Script to create/update Cycle upgrade Confluence page.
+
+Attributes
+----------
+LATEST_TAG_REPOSITORIES : `dict`
+    Mapping of the cycle build packages shown on the page to the GitHub owner
+    and name of their repositories.
+UNKNOWN_VERSION : `str`
+    The placeholder shown for the versions that are not known, including the
+    versions derived from them.
+"""
 
 import argparse
 import datetime
 import pathlib
 from typing import Any
 
-from atlassian import Confluence
-from jinja2 import Environment, FileSystemLoader
+from packaging.version import InvalidVersion
 
-from . import ticket_helpers
+from . import (
+    check_helpers,
+    check_software_releases,
+    confluence_helpers,
+    instrumentation,
+    template_helpers,
+    ticket_helpers,
+)
 
 SPACE_KEY = "LSSTCOM"
 PARENT_PAGE_ID = "53752125"
+LATEST_TAG_REPOSITORIES = {
+    "librdkafka": ("confluentinc", "librdkafka"),
+    "python_confluent_kafka": ("confluentinc", "confluent-kafka-python"),
+    "ts_xml": ("lsst-ts", "ts_xml"),
+    "ts_sal": ("lsst-ts", "ts_sal"),
+    "ts_salobj": ("lsst-ts", "ts_salobj"),
+}
+UNKNOWN_VERSION = "unknown"
 
 __all__ = ["runner"]
 
 
-def prepare_template(opts: argparse.Namespace, template_name: str) -> str:
-    script_dir = pathlib.Path(__file__).resolve().parent
-    templates_dir = script_dir / "templates"
-    env = Environment(loader=FileSystemLoader(templates_dir))
-    template = env.get_template(template_name)
+def get_software_versions(opts: argparse.Namespace) -> dict[str, str]:
+    """Gather the software versions shown on the Cycle upgrade page.
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the template version fields to their values. Unknown
+        versions are shown as `UNKNOWN_VERSION`.
+    """
+    versions = {package: UNKNOWN_VERSION for package in LATEST_TAG_REPOSITORIES}
+    if opts.cycle_build_dir is not None:
+        cycle_env = check_helpers.parse_cycle_env(
+            opts.cycle_build_dir
+            / check_software_releases.CYCLE_REPO
+            / check_software_releases.ENV_FILE
+        )
+        for package in versions:
+            versions[package] = cycle_env.get(package, UNKNOWN_VERSION)
+
+    xml = versions["ts_xml"]
+    sal = versions["ts_sal"]
+    derived_versions = dict.fromkeys(
+        ["sal_rpm", "csc_rpms", "csc_jars"], UNKNOWN_VERSION
+    )
+    if sal != UNKNOWN_VERSION:
+        derived_versions["sal_rpm"] = f"{sal}-1"
+        if xml != UNKNOWN_VERSION:
+            derived_versions["csc_rpms"] = f"{xml}-{sal}"
+            derived_versions["csc_jars"] = f"{xml}_{sal}"
+
+    if opts.check_latest:
+        client = check_software_releases.create_github_client(opts.gh_token_file)
+        repositories = [
+            LATEST_TAG_REPOSITORIES[package]
+            for package, version in versions.items()
+            if version != UNKNOWN_VERSION
+        ]
+        latest_tags = check_software_releases.get_latest_tags(client, repositories)
+        for package, version in versions.items():
+            latest = check_software_releases.fixup_version(
+                latest_tags.get(LATEST_TAG_REPOSITORIES[package][1])
+            )
+            if version == UNKNOWN_VERSION or latest is None:
+                continue
+            software_versions = check_helpers.SoftwareVersions(version, latest)
+            try:
+                is_latest = software_versions.is_latest()
+            except InvalidVersion:
+                # Versions that cannot be compared are shown as they are.
+                continue
+            if not is_latest:
+                versions[package] = f"{version} (latest: {latest})"
+
+    versions.update(derived_versions)
+    return versions
+
+
+def get_template_context(opts: argparse.Namespace) -> dict[str, Any]:
+    """Create the template variables for the Confluence page sections.
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+
+    Returns
+    -------
+    `dict`
+        The template variables.
+    """
     template_vars = opts.__dict__.copy()
     template_vars["now"] = datetime.datetime.now().strftime("%Y-%m-%d")
-    return template.render(template_vars)
+    template_vars["versions"] = get_software_versions(opts)
+    if opts.cycle_build_dir is not None:
+        template_vars.setdefault("xml_version", template_vars["versions"]["ts_xml"])
+    return template_vars
+
+
+def record_updated_page(
+    title: str, content: dict[str, Any], payload: dict[str, Any]
+) -> None:
+    """Remember a page that was just created or updated.
+
+    Parameters
+    ----------
+    title : `str`
+        The title of the page.
+    content : `dict`
+        The content API response.
+    payload : `dict`
+        The payload sent to the content API.
+    """
+    # Prefer the body as stored by Confluence since it normalizes the markup.
+    body = content.get("body", {}).get("storage", {}).get("value")
+    if body is None:
+        body = payload["body"]["storage"]["value"]
+    page = confluence_helpers.PageInfo(
+        id=str(content["id"]), version=content["version"]["number"], body=body
+    )
+    confluence_helpers.record_page(SPACE_KEY, title, page)
 
 
 def main(opts: argparse.Namespace) -> None:
-    confluence_auth = ticket_helpers.get_jira_credentials(opts.token_file)
     cycle = opts.cycle_number
     revision = int(opts.revision)
 
-    confluence = Confluence(
-        url=ticket_helpers.JIRA_SERVER,
-        username=confluence_auth[0],
-        password=confluence_auth[1],
-    )
-    page = confluence.get_page_by_title(space=SPACE_KEY, title=f"Cycle {cycle} Upgrade")
+    confluence = ticket_helpers.get_confluence_client(opts.token_file)
+    title = f"Cycle {cycle} Upgrade"
+    page = confluence_helpers.get_page(confluence, SPACE_KEY, title)
+    context = get_template_context(opts)
 
     payload: dict[str, Any] = {
-        "title": f"Cycle {cycle} Upgrade",
+        "title": title,
         "type": "page",
         "body": {"storage": {"value": "", "representation": "storage"}},
         "version": {},
@@ -52,36 +170,50 @@ def main(opts: argparse.Namespace) -> None:
     }
     try:
         if page:
-            page = confluence.get_page_by_id(page["id"], expand="version,body.storage")
-            current_body = page["body"]["storage"]["value"]
-            current_version = page["version"]["number"]
-            combined_body = current_body
+            sections = confluence_helpers.PageSections(page.body)
 
             if revision > 0:
-                combined_body = (
-                    combined_body
-                    + "\n"
-                    + prepare_template(opts, "incremental_upgrade_section.html")
+                sections.set_section(
+                    f"revision-{revision}",
+                    template_helpers.render_template(
+                        "incremental_upgrade_section.html", context
+                    ),
+                    replace=opts.replace,
+                    before="requests",
                 )
 
             if opts.add_request_section:
-                combined_body = (
-                    combined_body
-                    + "\n"
-                    + prepare_template(opts, "request_incremental_upgrade_section.html")
+                sections.set_section(
+                    "requests",
+                    template_helpers.render_template(
+                        "request_incremental_upgrade_section.html", context
+                    ),
+                    replace=opts.replace,
                 )
 
-            payload["body"]["storage"]["value"] = combined_body
-            payload["version"]["number"] = current_version + 1
-            confluence.put(f"/rest/api/content/{page['id']}", data=payload)
+            new_body = sections.body
+            new_hash = confluence_helpers.get_body_hash(new_body)
+            if new_hash == confluence_helpers.get_body_hash(page.body):
+                print(f"Page {title} is up to date.")
+                return
+
+            payload["body"]["storage"]["value"] = new_body
+            payload["version"]["number"] = page.version + 1
+            content = confluence.put(f"/rest/api/content/{page.id}", data=payload)
+            if content is not None:
+                record_updated_page(title, content, payload)
 
         else:
-            new_html = prepare_template(opts, "cycle_upgrade_page.html")
+            new_html = template_helpers.render_template(
+                "cycle_upgrade_page.html", context
+            )
             payload["version"] = {"number": 1}
             payload["space"] = {"key": SPACE_KEY}
             payload["ancestors"] = [{"id": PARENT_PAGE_ID}]
             payload["body"]["storage"]["value"] = new_html
-            confluence.post("/rest/api/content/", data=payload)
+            content = confluence.post("/rest/api/content/", data=payload)
+            if content is not None:
+                record_updated_page(title, content, payload)
     except Exception as e:
         print(f"Error creating/updating page: {e}")
         raise
@@ -98,7 +230,8 @@ def runner() -> None:
         "--revision",
         type=int,
         default=0,
-        help="Revision number. If > 0, append incremental upgrade section.",
+        help="Revision number. If > 0, add the incremental upgrade section for the "
+        "revision unless the page already has it.",
     )
 
     parser.add_argument(
@@ -151,12 +284,40 @@ def runner() -> None:
         help="The date for the TTS deployment in YYYY-MM-DD format.",
     )
 
+    parser.add_argument(
+        "--cycle-build-dir",
+        type=pathlib.Path,
+        default=None,
+        help=f"Path to where the {check_software_releases.CYCLE_REPO} directory "
+        "lives. Fill the software versions on a new page from its cycle.env file.",
+    )
+
+    parser.add_argument(
+        "--check-latest",
+        action="store_true",
+        help="Show the latest GitHub tag next to the software versions that are "
+        "not up to date.",
+    )
+
+    parser.add_argument(
+        "--gh-token-file",
+        type=pathlib.Path,
+        default="~/.gh_token",
+        help="Specify path to GitHub token file. Used with --check-latest.",
+    )
+
     parser.add_argument(
         "--add-request-section",
         action="store_true",
-        help="Append the request for incremental upgrades section to the end of the page.",
+        help="Add the request for incremental upgrades section to the end of the page "
+        "unless the page already has it.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="Replace the requested sections if the page already has them. "
+        "Any edits made to those sections on the page are lost.",
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
@@ -20,9 +20,7 @@ import pathlib
 import re
 from datetime import datetime, time
 
-from jira import JIRA
-
-from . import ticket_helpers
+from . import instrumentation, issue_plans, ticket_helpers, xml_helpers
 
 INPUT_DATE_FORMAT = "%Y-%m-%d"
 INPUT_DATE_FORMAT_PLAIN = "YYYY-mm-dd"
@@ -109,17 +107,14 @@ def parse_cscs(cscs: str) -> str:
     Returns
     -------
     `str`
-        A formatted string of CSC names.
+        A formatted string of CSC names, empty if there are none.
     """
-    if cscs != "":
-        items = cscs.split(",")
-        if len(items) == 1:
-            return f" and {items[0]}"
-        else:
-            return f", {', '.join(items[:-1])} and {items[-1]}"
-    else:
-        msg = "Must specify at least one CSC for an incremental upgrade."
-        raise argparse.ArgumentTypeError(msg)
+    items = [item for item in cscs.split(",") if item]
+    if not items:
+        return ""
+    if len(items) == 1:
+        return f" and {items[0]}"
+    return f", {', '.join(items[:-1])} and {items[-1]}"
 
 
 def main(opts: argparse.Namespace) -> None:
@@ -129,9 +124,6 @@ def main(opts: argparse.Namespace) -> None:
     opts : `argparse.Namespace`
         The script command-line arguments and options.
     """
-    jira_auth = ticket_helpers.get_jira_credentials(opts.token_file)
-    js = JIRA(server=ticket_helpers.JIRA_SERVER, basic_auth=jira_auth)
-
     revision = opts.revision
     if revision == 0:
         summary = f"Control System Cycle {opts.cycle_number} Upgrade"
@@ -144,7 +136,14 @@ def main(opts: argparse.Namespace) -> None:
         summary = (
             f"Incremental XML Upgrade (Cycle {opts.cycle_number} Revision {revision})"
         )
-        cycle_text = f"ScriptQueues{parse_cscs(opts.cscs)}"
+        if not opts.cscs:
+            raise instrumentation.UsageError(
+                "Must specify at least one CSC for an incremental upgrade."
+            )
+        # The CSCs derived from ts_xml can be empty, in which case only the
+        # ScriptQueues are upgraded.
+        cscs = xml_helpers.resolve_cscs(opts.cscs, opts, opts.xml_version)
+        cycle_text = f"ScriptQueues{parse_cscs(cscs)}"
         description = [
             f"Upgrade of {cycle_text} for XML ({opts.xml_version}) on the summit.",
             f"To occur at {opts.start_time} CLT.",
@@ -153,12 +152,21 @@ def main(opts: argparse.Namespace) -> None:
         msg = "Not a valid revision number. Must be 0 or greater."
         raise argparse.ArgumentTypeError(msg)
 
-    assignee = ticket_helpers.get_user_ids(opts.assignee, js)
-    task_participants = ticket_helpers.get_user_ids(opts.task_participants, js)
-    issue = js.create_issue(
+    participants = [
+        user.strip() for user in opts.task_participants.split(",") if user.strip()
+    ]
+    users = [opts.assignee] + participants
+    if opts.plan:
+        # Nothing is sent in plan mode, so users are not resolved.
+        user_fields = {user: {"name": user} for user in users}
+    else:
+        js = ticket_helpers.get_jira_client(opts.token_file)
+        user_ids = ticket_helpers.resolve_user_ids(users, js)
+        user_fields = {user: {"id": user_ids[user]} for user in users}
+    fields = dict(
         project={"key": "SUMMIT"},
         issuetype={"name": "Task"},
-        assignee={"id": assignee},
+        assignee=user_fields[opts.assignee],
         summary=summary,
         description=(os.linesep * 2).join(description),
         labels=LABELS,
@@ -169,12 +177,24 @@ def main(opts: argparse.Namespace) -> None:
         # End date
         customfield_10061=opts.upgrade_date,
         # Task or Event Participants
-        customfield_10151=[{"id": n} for n in task_participants],
+        customfield_10151=[user_fields[user] for user in participants],
         # Discipline
         customfield_10141=[{"value": v} for v in DISCIPLINES],
     )
-
-    print(f"{issue.key}")
+    plans = [issue_plans.IssuePlan(role="summit upgrade", fields=fields)]
+
+    if opts.plan:
+        issue_plans.print_issue_plans(plans)
+        return
+
+    results = issue_plans.create_missing_issues(js, plans, f"Cycle {opts.cycle_number}")
+    result = results["summit upgrade"]
+    if not result.ok:
+        raise RuntimeError(f"Cannot create summit upgrade ticket: {result.error}")
+    if result.existed:
+        print(f"{result.key} (already exists)")
+    else:
+        print(f"{result.key}")
 
 
 def runner() -> None:
@@ -225,7 +245,17 @@ def runner() -> None:
         "--cscs",
         type=str,
         default="",
-        help="A comma-delimited string of CSCs affected. Only relevant for incremental upgrades.",
+        help="A comma-delimited string of CSCs affected. Only relevant for incremental upgrades. "
+        f"Use {xml_helpers.AUTO} to derive them from the interfaces changed since --previous-xml-version; "
+        "a change to an interface file shared by all CSCs selects every CSC.",
+    )
+
+    xml_helpers.add_xml_arguments(parser)
+
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the ticket payload without contacting Jira.",
     )
 
     parser.add_argument(
@@ -242,6 +272,4 @@ def runner() -> None:
         help=f"The date in {INPUT_DATE_FORMAT_PLAIN} format for the cycle upgrade.",
     )
 
-    args = parser.parse_args()
-
-    main(args)
+    instrumentation.run(parser, main)
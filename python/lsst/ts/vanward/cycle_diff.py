@@ -0,0 +1,415 @@
+"""Script to compare the cycle versions between ts_cycle_build refs.
+
+The cycle build environment file of every compared ref is read with a single
+batched read of the git objects, so no checkout is needed and long histories
+are compared in seconds.
+
+Attributes
+----------
+CHANGE_KINDS : `list`
+    The kinds of version changes, in report order.
+"""
+
+import argparse
+import datetime
+import json
+import pathlib
+import subprocess
+from dataclasses import asdict, dataclass, field
+
+from packaging.version import InvalidVersion, Version
+
+from . import check_helpers, check_software_releases, git_helpers, instrumentation
+
+CHANGE_KINDS = ["major", "minor", "patch", "other", "downgrade", "added", "removed"]
+
+__all__ = [
+    "CHANGE_KINDS",
+    "CyclePoint",
+    "VersionChange",
+    "diff_versions",
+    "get_change_kind",
+    "get_cycle_points",
+    "runner",
+]
+
+
+@dataclass
+class VersionChange:
+    """Holder for the change of a package version between two refs."""
+
+    package: str
+    old: str | None
+    new: str | None
+    kind: str
+
+
+@dataclass
+class CyclePoint:
+    """Holder for the cycle versions at a ts_cycle_build ref."""
+
+    ref: str
+    commit: str
+    date: str
+    versions: dict[str, str] = field(default_factory=dict)
+
+
+def get_change_kind(old: str | None, new: str | None) -> str:
+    """Classify the change between two versions of a package.
+
+    Parameters
+    ----------
+    old : `str` or None
+        The old version or None if the package was added.
+    new : `str` or None
+        The new version or None if the package was removed.
+
+    Returns
+    -------
+    `str`
+        One of the `CHANGE_KINDS`. Versions that are not PEP 440 versions,
+        or differ beyond the release numbers, are ``other``.
+    """
+    if old is None:
+        return "added"
+    if new is None:
+        return "removed"
+    try:
+        old_version = Version(old)
+        new_version = Version(new)
+    except InvalidVersion:
+        return "other"
+    if new_version < old_version:
+        return "downgrade"
+    old_release = old_version.release + (0, 0)
+    new_release = new_version.release + (0, 0)
+    if old_release[0] != new_release[0]:
+        return "major"
+    if old_release[1] != new_release[1]:
+        return "minor"
+    if old_release[2] != new_release[2]:
+        return "patch"
+    return "other"
+
+
+def diff_versions(old: dict[str, str], new: dict[str, str]) -> list[VersionChange]:
+    """Compare two sets of cycle versions.
+
+    Parameters
+    ----------
+    old : `dict`
+        The old package versions.
+    new : `dict`
+        The new package versions.
+
+    Returns
+    -------
+    `list`
+        The changed packages in the order of the new and then removed
+        packages.
+    """
+    changes = []
+    for package, version in new.items():
+        old_version = old.get(package)
+        if old_version != version:
+            changes.append(
+                VersionChange(
+                    package, old_version, version, get_change_kind(old_version, version)
+                )
+            )
+    for package, version in old.items():
+        if package not in new:
+            changes.append(VersionChange(package, version, None, "removed"))
+    return changes
+
+
+def get_range_refs(repository_dir: pathlib.Path, revision_range: str) -> list[str]:
+    """List the commits of a range that changed the cycle versions.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The ts_cycle_build repository.
+    revision_range : `str`
+        The range as ``<start>..<end>``.
+
+    Returns
+    -------
+    `list`
+        The start of the range followed by the first parent commits changing
+        the environment file, oldest first.
+
+    Raises
+    ------
+    instrumentation.UsageError
+        If the range is not of the ``<start>..<end>`` form, e.g. a symmetric
+        difference ``<start>...<end>``, which has no single start.
+    """
+    if "..." in revision_range:
+        raise instrumentation.UsageError(
+            f"symmetric difference {revision_range!r} is not supported, "
+            "use <start>..<end>"
+        )
+    start, _, end = revision_range.partition("..")
+    if not start or not end or ".." in end:
+        raise instrumentation.UsageError(
+            f"range {revision_range!r} is not of the form <start>..<end>"
+        )
+    proc = subprocess.run(
+        [
+            "git",
+            "-C",
+            str(repository_dir),
+            "rev-list",
+            "--reverse",
+            "--first-parent",
+            revision_range,
+            "--",
+            check_software_releases.ENV_FILE,
+        ],
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    return [start] + proc.stdout.split()
+
+
+def get_tag_refs(repository_dir: pathlib.Path, pattern: str) -> list[str]:
+    """List the tags matching a pattern in version order.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The ts_cycle_build repository.
+    pattern : `str`
+        The glob pattern of the tags.
+
+    Returns
+    -------
+    `list`
+        The matching tags, oldest version first.
+    """
+    proc = subprocess.run(
+        [
+            "git",
+            "-C",
+            str(repository_dir),
+            "tag",
+            "--list",
+            "--sort=version:refname",
+            pattern,
+        ],
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    return proc.stdout.split()
+
+
+def get_commit_date(commit: str) -> str:
+    """Get the committer date of a commit object.
+
+    Parameters
+    ----------
+    commit : `str`
+        The raw commit object.
+
+    Returns
+    -------
+    `str`
+        The date in ISO format.
+    """
+    for line in commit.splitlines():
+        if line.startswith("committer "):
+            timestamp = int(line.split()[-2])
+            return (
+                datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+                .date()
+                .isoformat()
+            )
+        if not line:
+            break
+    return ""
+
+
+def get_cycle_points(repository_dir: pathlib.Path, refs: list[str]) -> list[CyclePoint]:
+    """Read the cycle versions at several refs with one batched read.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The ts_cycle_build repository, a clone or a bare repository.
+    refs : `list`
+        The branches, tags or commits to read.
+
+    Returns
+    -------
+    `list`
+        The cycle versions at each ref, in the given order.
+
+    Raises
+    ------
+    ValueError
+        If a ref does not exist or has no environment file.
+    """
+    env_file = check_software_releases.ENV_FILE
+    specs = []
+    for ref in refs:
+        specs += [f"{ref}^{{commit}}", f"{ref}:{env_file}"]
+    objects = git_helpers.read_objects(repository_dir, specs)
+
+    points = []
+    for ref in refs:
+        commit = objects[f"{ref}^{{commit}}"]
+        env = objects[f"{ref}:{env_file}"]
+        if commit is None or env is None:
+            raise ValueError(f"Cannot find {env_file} at {ref} in {repository_dir}.")
+        commit_id, commit_object = commit
+        # Abbreviated commits are used as the names of the range commits.
+        name = ref[:10] if len(ref) == 40 else ref
+        points.append(
+            CyclePoint(
+                ref=name,
+                commit=commit_id,
+                date=get_commit_date(commit_object.decode()),
+                versions=check_helpers.parse_cycle_env_text(env[1].decode()),
+            )
+        )
+    return points
+
+
+def format_counts(changes: list[VersionChange]) -> str:
+    """Summarize the changes between two refs by kind.
+
+    Parameters
+    ----------
+    changes : `list`
+        The version changes.
+
+    Returns
+    -------
+    `str`
+        The number of changes of each kind that occurred.
+    """
+    counts = {kind: 0 for kind in CHANGE_KINDS}
+    for change in changes:
+        counts[change.kind] += 1
+    parts = [f"{count} {kind}" for kind, count in counts.items() if count]
+    return ", ".join(parts) if parts else "no changes"
+
+
+def print_report(points: list[CyclePoint], summary: bool) -> None:
+    """Print the version changes between consecutive refs.
+
+    Parameters
+    ----------
+    points : `list`
+        The cycle versions at each ref.
+    summary : `bool`
+        If True, only print the number of changes of each kind.
+    """
+    for old, new in zip(points, points[1:]):
+        changes = diff_versions(old.versions, new.versions)
+        print(
+            f"{old.ref} ({old.date}) -> {new.ref} ({new.date}): "
+            f"{format_counts(changes)}"
+        )
+        if summary or not changes:
+            continue
+        width = max(len(change.package) for change in changes)
+        for change in changes:
+            transition = f"{change.old or '-'} -> {change.new or '-'}"
+            print(f"  {change.package:{width}}  {transition:30}  {change.kind}")
+
+
+def main(opts: argparse.Namespace) -> None:
+    """
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    repository_dir = git_helpers.get_repository_dir(
+        opts.cycle_build_dir, check_software_releases.CYCLE_REPO
+    )
+    refs = []
+    for ref in opts.refs:
+        if ".." in ref:
+            refs += get_range_refs(repository_dir, ref)
+        else:
+            refs.append(ref)
+    if opts.tags is not None:
+        tags = get_tag_refs(repository_dir, opts.tags)
+        start = max(len(tags) - opts.last, 0) if opts.last else 0
+        refs += tags[start:]
+    if len(refs) < 2:
+        raise SystemExit("At least two refs are needed for a comparison.")
+
+    points = get_cycle_points(repository_dir, refs)
+
+    if opts.json:
+        steps = [
+            {
+                "from": old.ref,
+                "to": new.ref,
+                "from_commit": old.commit,
+                "to_commit": new.commit,
+                "from_date": old.date,
+                "to_date": new.date,
+                "changes": [
+                    asdict(change)
+                    for change in diff_versions(old.versions, new.versions)
+                ],
+            }
+            for old, new in zip(points, points[1:])
+        ]
+        print(json.dumps(steps, indent=2))
+    else:
+        print_report(points, opts.summary)
+
+
+def runner() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the cycle versions between ts_cycle_build refs."
+    )
+
+    parser.add_argument(
+        "cycle_build_dir",
+        type=pathlib.Path,
+        help=f"Path to where the {check_software_releases.CYCLE_REPO} directory "
+        "lives. The repository can be bare.",
+    )
+
+    parser.add_argument(
+        "refs",
+        nargs="*",
+        help="The branches, tags or commits to compare, in order. A range "
+        "<start>..<end> adds every commit of the range changing the versions; "
+        "symmetric differences <start>...<end> are not supported.",
+    )
+
+    parser.add_argument(
+        "--tags",
+        default=None,
+        metavar="PATTERN",
+        help="Also compare the tags matching this glob pattern, in version order.",
+    )
+
+    parser.add_argument(
+        "--last",
+        type=int,
+        default=None,
+        help="Only compare the last LAST tags matching the --tags pattern.",
+    )
+
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="Only print the number of changes of each kind between refs.",
+    )
+
+    parser.add_argument(
+        "--json", action="store_true", help="Print the changes as JSON."
+    )
+
+    instrumentation.run(parser, main)
@@ -0,0 +1,462 @@
+"""Local daemon running vanward commands with warm clients.
+
+The daemon listens on a Unix socket in the cache directory. The ``vanward``
+command sends its arguments, working directory and environment to the daemon
+when it is running and prints the output streamed back, otherwise it runs the
+command itself. Commands are run one at a time inside the daemon process, so
+the Jira, Confluence and GitHub clients and the other per-process caches are
+reused between commands. A client whose environment differs from the one of
+the daemon, or that connects while a command runs, runs its command itself. A
+command whose client disconnects, e.g. after a Ctrl-C, is cancelled.
+
+Attributes
+----------
+CANCEL_SIGNAL : `int`
+    The signal interrupting the running command when its client disconnects.
+COMMAND_LOCK : `threading.Lock`
+    The lock held while a command runs. Commands change the working
+    directory and the output streams of the whole daemon process, so they
+    must never overlap.
+ENV_NAMES : `list`
+    The environment variables that must match between a client and the
+    daemon for the daemon to run the command.
+ENV_PREFIXES : `tuple`
+    The prefixes of the other environment variables that must match.
+NO_DAEMON_ENV : `str`
+    The environment variable that, when set, disables the use of the daemon.
+SOCKET_FILE : `str`
+    The name of the daemon socket within the cache directory.
+WATCH_INTERVAL : `float`
+    The interval between the checks of the client connection, in seconds.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import pathlib
+import queue
+import select
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from . import __version__, cache_helpers, instrumentation
+
+CANCEL_SIGNAL = signal.SIGUSR1
+COMMAND_LOCK = threading.Lock()
+ENV_NAMES = [
+    "CURL_CA_BUNDLE",
+    "HOME",
+    "HTTPS_PROXY",
+    "HTTP_PROXY",
+    "LANG",
+    "NO_PROXY",
+    "PATH",
+    "REQUESTS_CA_BUNDLE",
+    "SSL_CERT_FILE",
+    "TZ",
+    "https_proxy",
+    "http_proxy",
+    "no_proxy",
+]
+ENV_PREFIXES = ("GIT_", "LC_", "VANWARD_")
+NO_DAEMON_ENV = "VANWARD_NO_DAEMON"
+SOCKET_FILE = "vanward.sock"
+WATCH_INTERVAL = 0.5
+
+__all__ = [
+    "CANCEL_SIGNAL",
+    "COMMAND_LOCK",
+    "ENV_NAMES",
+    "ENV_PREFIXES",
+    "NO_DAEMON_ENV",
+    "SOCKET_FILE",
+    "WATCH_INTERVAL",
+    "is_running",
+    "run_remote",
+    "runner",
+]
+
+
+def get_socket_file() -> pathlib.Path:
+    """Get the location of the daemon socket.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The full path of the socket.
+    """
+    return cache_helpers.get_cache_dir() / SOCKET_FILE
+
+
+def get_command_env(environ: Mapping[str, str]) -> dict[str, str]:
+    """Select the environment variables that can change a command result.
+
+    Parameters
+    ----------
+    environ : `collections.abc.Mapping`
+        The environment.
+
+    Returns
+    -------
+    `dict`
+        The variables in `ENV_NAMES` or starting with one of `ENV_PREFIXES`.
+    """
+    return {
+        name: value
+        for name, value in environ.items()
+        if name in ENV_NAMES or name.startswith(ENV_PREFIXES)
+    }
+
+
+def send_message(wfile: io.BufferedIOBase, **message: Any) -> None:
+    """Send a JSON line message over the socket.
+
+    Parameters
+    ----------
+    wfile : `io.BufferedIOBase`
+        The socket file to write to.
+    **message
+        The message contents.
+    """
+    wfile.write((json.dumps(message) + "\n").encode())
+    wfile.flush()
+
+
+class StreamWriter(io.TextIOBase):
+    """Text stream forwarding everything written to a daemon client.
+
+    Parameters
+    ----------
+    wfile : `io.BufferedIOBase`
+        The socket file to write to.
+    name : `str`
+        The name of the stream on the client side.
+    """
+
+    def __init__(self, wfile: io.BufferedIOBase, name: str) -> None:
+        self.wfile = wfile
+        self.name = name
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: str) -> int:
+        if data:
+            send_message(self.wfile, stream=self.name, data=data)
+        return len(data)
+
+
+class CommandCancelled(BaseException):
+    """Raised in a running command when its client disconnects.
+
+    It is not an `Exception` so that the broad exception handlers of the
+    scripts do not swallow it.
+    """
+
+
+@dataclass
+class Job:
+    """Holder for a command request waiting to be run."""
+
+    request: dict[str, Any]
+    wfile: io.BufferedIOBase
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Server accepting the connections while a command runs.
+
+    Each connection is handled in its own thread, but the commands are run
+    one at a time in the main thread of the daemon, which takes them from
+    ``jobs``. A connection arriving while a command runs is told the daemon
+    is busy, so its client runs the command itself rather than wait. The
+    same happens when the environment of the client differs from the one of
+    the daemon.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_file: str) -> None:
+        super().__init__(socket_file, CommandHandler)
+        self.jobs: queue.Queue[Job | None] = queue.Queue()
+        self.busy = threading.Lock()
+        self.main_thread_id = threading.get_ident()
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    """Pass a single command request to the daemon and watch its client."""
+
+    server: DaemonServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            # A connection only checking that the daemon is running.
+            return
+        request = json.loads(line)
+        if request.get("stop"):
+            send_message(self.wfile, exit=0)
+            self.server.jobs.put(None)
+            return
+        if request.get("status"):
+            send_message(
+                self.wfile, version=__version__, busy=self.server.busy.locked()
+            )
+            return
+
+        if request.get("env") != get_command_env(os.environ):
+            send_message(self.wfile, declined="environment")
+            return
+        if not self.server.busy.acquire(blocking=False):
+            send_message(self.wfile, declined="busy")
+            return
+        try:
+            job = Job(request, self.wfile)
+            self.server.jobs.put(job)
+            while not job.done.wait(timeout=WATCH_INTERVAL):
+                if self.is_disconnected():
+                    # Interrupt the command, which runs in the main thread.
+                    signal.pthread_kill(self.server.main_thread_id, CANCEL_SIGNAL)
+                    job.done.wait()
+        finally:
+            self.server.busy.release()
+
+    def is_disconnected(self) -> bool:
+        """Check whether the client closed its end of the connection.
+
+        Returns
+        -------
+        `bool`
+            True if the client went away.
+        """
+        readable, _, _ = select.select([self.connection], [], [], 0)
+        if not readable:
+            return False
+        try:
+            # The client sends nothing after its request, so a readable
+            # socket means it was closed.
+            return self.connection.recv(1, socket.MSG_PEEK) == b""
+        except ConnectionResetError:
+            return True
+
+
+def run_job(job: Job) -> None:
+    """Run a command request and stream its output back.
+
+    The command runs in the working directory of its client, with its output
+    streams sent to the client, while holding `COMMAND_LOCK`.
+
+    Parameters
+    ----------
+    job : `Job`
+        The command request.
+    """
+    from . import cli
+
+    stdout = StreamWriter(job.wfile, "stdout")
+    stderr = StreamWriter(job.wfile, "stderr")
+    exit_code: int | str | None = 0
+    cwd = os.getcwd()
+    try:
+        with (
+            COMMAND_LOCK,
+            contextlib.redirect_stdout(stdout),
+            contextlib.redirect_stderr(stderr),
+        ):
+            try:
+                os.chdir(job.request["cwd"])
+                cli.run_command(job.request["args"], job.request.get("prog"))
+            except SystemExit as e:
+                exit_code = e.code
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os.chdir(cwd)
+        if isinstance(exit_code, str):
+            stderr.write(exit_code + "\n")
+            exit_code = 1
+        send_message(job.wfile, exit=exit_code or 0)
+    except (BrokenPipeError, ConnectionResetError):
+        # The client went away, e.g. it was interrupted.
+        pass
+
+
+def is_running() -> bool:
+    """Check whether a daemon is listening.
+
+    Returns
+    -------
+    `bool`
+        True if a daemon accepted a connection.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(get_socket_file()))
+        except OSError:
+            return False
+    return True
+
+
+def run_remote(args: list[str], prog: str | None = None) -> int | None:
+    """Run a command in the daemon if it is running and idle.
+
+    Parameters
+    ----------
+    args : `list`
+        The command name and its arguments.
+    prog : `str`, optional
+        The program name shown in the usage of the command.
+
+    Returns
+    -------
+    `int` or None
+        The exit code of the command or None if the daemon is not running,
+        is busy with another command or runs in a different environment.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(get_socket_file()))
+    except OSError:
+        sock.close()
+        return None
+
+    with sock, sock.makefile("rwb") as sfile:
+        send_message(
+            sfile,
+            args=args,
+            prog=prog,
+            cwd=os.getcwd(),
+            env=get_command_env(os.environ),
+        )
+        for line in sfile:
+            message = json.loads(line)
+            if "declined" in message:
+                return None
+            if "exit" in message:
+                return message["exit"]
+            stream = sys.stdout if message["stream"] == "stdout" else sys.stderr
+            stream.write(message["data"])
+            stream.flush()
+    print("vanward: the daemon closed the connection.", file=sys.stderr)
+    return 1
+
+
+def serve() -> None:
+    """Run the daemon until it is asked to stop."""
+    socket_file = get_socket_file()
+    if is_running():
+        sys.exit(f"vanward: a daemon is already listening on {socket_file}")
+    socket_file.unlink(missing_ok=True)
+
+    with DaemonServer(str(socket_file)) as server:
+        os.chmod(socket_file, 0o600)
+        running = False
+
+        def cancel_command(signum: int, frame: Any) -> None:
+            nonlocal running
+            # Only cancel once, and never outside of a command.
+            if running:
+                running = False
+                raise CommandCancelled()
+
+        signal.signal(CANCEL_SIGNAL, cancel_command)
+        threading.Thread(
+            target=server.serve_forever, kwargs=dict(poll_interval=0.5), daemon=True
+        ).start()
+        print(f"Listening on {socket_file}")
+        try:
+            # The commands run in the main thread, where the signals arrive.
+            while (job := server.jobs.get()) is not None:
+                try:
+                    running = True
+                    run_job(job)
+                    running = False
+                except CommandCancelled:
+                    pass
+                job.done.set()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            socket_file.unlink(missing_ok=True)
+
+
+def send_request(**request: Any) -> dict[str, Any] | None:
+    """Send a request answered with a single message to the daemon.
+
+    Parameters
+    ----------
+    **request
+        The request contents.
+
+    Returns
+    -------
+    `dict` or None
+        The reply or None if the daemon is not running.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(get_socket_file()))
+    except OSError:
+        sock.close()
+        return None
+    with sock, sock.makefile("rwb") as sfile:
+        send_message(sfile, **request)
+        return json.loads(sfile.readline())
+
+
+def stop() -> None:
+    """Ask a running daemon to stop."""
+    if send_request(stop=True) is None:
+        print("No vanward daemon is running.")
+    else:
+        print("Stopped the vanward daemon.")
+
+
+def main(opts: argparse.Namespace) -> None:
+    """
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    if opts.stop:
+        stop()
+    elif opts.status:
+        status = send_request(status=True)
+        if status is None:
+            print("No vanward daemon is running.")
+        else:
+            print(f"vanward {status['version']}")
+            if status["busy"]:
+                print("The vanward daemon is busy running a command.")
+    else:
+        serve()
+
+
+def runner() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run vanward commands in a long lived local process."
+    )
+
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon.")
+
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Print the version of the running daemon, if any.",
+    )
+
+    args = instrumentation.parse_args(parser)
+
+    main(args)
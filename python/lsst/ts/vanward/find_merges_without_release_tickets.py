@@ -10,10 +10,7 @@ import argparse
 import os
 import pathlib
 
-import git
-from jira import JIRA
-
-from . import ticket_helpers
+from . import git_helpers, git_mirror, instrumentation, jira_mirror, ticket_helpers
 
 XML_DIR = "ts_xml"
 
@@ -27,23 +24,26 @@ def main(opts: argparse.Namespace) -> None:
     opts : `argparse.Namespace`
         The script command-line arguments and options.
     """
-    jira_auth = ticket_helpers.get_jira_credentials(opts.token_file)
-    js = JIRA(server=ticket_helpers.JIRA_SERVER, basic_auth=jira_auth)
+    import git
 
     xml_version = f"{XML_DIR} {opts.xml_version}"
 
-    query = f'project = CAP AND fixVersion = "{xml_version}"'
-    issues = js.search_issues(query)
-    # print(f"Number of issues: {len(issues)}")
+    # Without a mirror database, a throwaway one is filled from Jira.
+    db_file = jira_mirror.get_mirror_file(opts.jira_db)
     release_tickets = []
-    for issue in issues:
-        release_tickets.append(issue.key)
-        more_tickets = ticket_helpers.get_linked_tickets(issue, js)
-        if more_tickets:
-            for ticket in more_tickets:
-                release_tickets.append(ticket.key)
-
-    xml_repo = git.Repo(opts.xml_dir / XML_DIR)
+    with jira_mirror.JiraMirror(db_file) as mirror:
+        if opts.jira_db is None or opts.sync:
+            js = ticket_helpers.get_jira_client(opts.token_file)
+            mirror.sync_release(
+                js, xml_version, **ticket_helpers.get_link_options(opts)
+            )
+        graph = mirror.get_release_graph(
+            xml_version, **ticket_helpers.get_link_options(opts)
+        )
+        release_tickets.extend(graph.get_keys())
+
+    xml_dir = git_mirror.resolve_parent_dir(opts.xml_dir, opts.git_mirror, [XML_DIR])
+    xml_repo = git.Repo(git_helpers.get_repository_dir(xml_dir, XML_DIR))
     gitc = xml_repo.git
     commits = gitc.log(
         "--merges", "--pretty=oneline", f"{opts.previous_xml_version}...HEAD"
@@ -88,10 +88,31 @@ def runner() -> None:
         help="Specify path to Jira credentials file.",
     )
 
+    parser.add_argument(
+        "--jira-db",
+        type=pathlib.Path,
+        nargs="?",
+        const=jira_mirror.get_default_mirror_file,
+        default=None,
+        help="Answer from a local Jira mirror database. Without a file, "
+        "the default mirror in the vanward cache directory is used.",
+    )
+
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Incrementally synchronize the Jira mirror before comparing.",
+    )
+
+    ticket_helpers.add_link_arguments(parser)
+
     parser.add_argument(
         "xml_dir",
         type=pathlib.Path,
-        help=f"Path to where the {XML_DIR} directory lives.",
+        nargs="?",
+        default=None,
+        help=f"Path to where the {XML_DIR} directory lives. "
+        "Not needed with --git-mirror.",
     )
     parser.add_argument(
         "xml_version",
@@ -103,6 +124,6 @@ def runner() -> None:
         "previous_xml_version", help="Provide the previous Git XML version."
     )
 
-    args = parser.parse_args()
+    git_mirror.add_mirror_arguments(parser)
 
-    main(args)
+    instrumentation.run(parser, main)
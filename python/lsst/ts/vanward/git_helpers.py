@@ -0,0 +1,159 @@
+"""Helpers for reading files straight from git repositories.
+
+Files are read from the git objects at any ref, without checking them out,
+through a single ``git cat-file --batch`` process per call. This works on
+bare repositories and mirrors as well as on clones.
+
+Attributes
+----------
+BARE_SUFFIX : `str`
+    The suffix of bare repository and mirror directories.
+"""
+
+import pathlib
+import subprocess
+
+BARE_SUFFIX = ".git"
+
+__all__ = [
+    "BARE_SUFFIX",
+    "get_repository_dir",
+    "read_blobs",
+    "read_files",
+    "read_objects",
+]
+
+
+def get_repository_dir(parent_dir: pathlib.Path, name: str) -> pathlib.Path:
+    """Find a repository by name, as a clone or as a bare repository.
+
+    Parameters
+    ----------
+    parent_dir : `pathlib.Path`
+        The directory holding the repository.
+    name : `str`
+        The name of the repository.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The clone directory if it exists, otherwise the bare repository
+        directory with the ``.git`` suffix.
+    """
+    repository_dir = parent_dir.expanduser() / name
+    if repository_dir.exists():
+        return repository_dir
+    return repository_dir.with_name(name + BARE_SUFFIX)
+
+
+def read_objects(
+    repository_dir: pathlib.Path, specs: list[str]
+) -> dict[str, tuple[str, bytes] | None]:
+    """Read objects and their Ids with one ``git cat-file`` process.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The repository, a clone or a bare repository.
+    specs : `list`
+        The objects to read, e.g. ``<ref>:<path>`` or ``<ref>^{commit}``.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the specs to the object Ids and contents. Missing objects
+        are None.
+
+    Raises
+    ------
+    RuntimeError
+        If git cannot read the repository.
+    """
+    unique_specs = list(dict.fromkeys(specs))
+    if not unique_specs:
+        return {}
+    # All requests are written up front, git streams back only these objects.
+    proc = subprocess.run(
+        ["git", "-C", str(repository_dir), "cat-file", "--batch"],
+        input="".join(f"{spec}\n" for spec in unique_specs).encode(),
+        capture_output=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"Cannot read objects from {repository_dir}: "
+            f"{proc.stderr.decode().strip()}"
+        )
+
+    output = proc.stdout
+    position = 0
+    objects: dict[str, tuple[str, bytes] | None] = {}
+    for spec in unique_specs:
+        end = output.index(b"\n", position)
+        # The header is <id> <type> <size>, or <spec> missing.
+        header = output[position:end].decode().split()
+        position = end + 1
+        if header[-1] in ("missing", "ambiguous"):
+            objects[spec] = None
+            continue
+        object_end = position + int(header[2])
+        objects[spec] = (header[0], output[position:object_end])
+        # Each object is followed by a newline.
+        position = object_end + 1
+    return objects
+
+
+def read_blobs(
+    repository_dir: pathlib.Path, specs: list[str]
+) -> dict[str, bytes | None]:
+    """Read objects from a repository with one ``git cat-file`` process.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The repository, a clone or a bare repository.
+    specs : `list`
+        The objects to read, usually as ``<ref>:<path>``.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the specs to the object contents. Missing objects are
+        None.
+
+    Raises
+    ------
+    RuntimeError
+        If git cannot read the repository.
+    """
+    return {
+        spec: None if item is None else item[1]
+        for spec, item in read_objects(repository_dir, specs).items()
+    }
+
+
+def read_files(
+    repository_dir: pathlib.Path, ref: str, paths: list[str]
+) -> dict[str, str | None]:
+    """Read text files from a repository at a ref.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The repository, a clone or a bare repository.
+    ref : `str`
+        The branch, tag or commit to read the files at.
+    paths : `list`
+        The paths of the files relative to the repository root.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the paths to the file contents. Files missing at the ref
+        are None.
+    """
+    blobs = read_blobs(repository_dir, [f"{ref}:{path}" for path in paths])
+    files = {}
+    for path in paths:
+        blob = blobs[f"{ref}:{path}"]
+        files[path] = None if blob is None else blob.decode()
+    return files
@@ -0,0 +1,311 @@
+"""Script and helpers to manage local bare mirrors of the git repositories.
+
+The mirrors are partial bare clones, without any file contents until they
+are needed, kept in the vanward cache directory. They are refreshed with one
+``git fetch --prune`` per repository, run in parallel, and keep a commit-graph
+with changed-path Bloom filters, so the history walks and path-limited logs
+of the scripts stay fast. Each mirror is updated while holding a lock on a
+file next to it, so concurrent runs, e.g. from cron and by hand, do not
+clone or fetch the same mirror at the same time.
+
+Attributes
+----------
+MIRROR_DIR : `str`
+    The name of the mirrors directory in the vanward cache directory.
+MIRROR_REPOS : `list`
+    The repositories mirrored by default.
+REMOTE_BASE_ENV : `str`
+    The environment variable that overrides the base URL of the remotes.
+DEFAULT_REMOTE_BASE : `str`
+    The default base URL of the remotes.
+FETCH_REFSPECS : `list`
+    The refs kept in the mirrors. Pull request refs are left out.
+"""
+
+import argparse
+import concurrent.futures
+import fcntl
+import os
+import pathlib
+import subprocess
+import time
+
+from . import cache_helpers, git_helpers, instrumentation
+
+MIRROR_DIR = "git-mirrors"
+MIRROR_REPOS = ["ts_xml", "ts_cycle_build", "ts_recipes"]
+REMOTE_BASE_ENV = "VANWARD_GIT_REMOTE_BASE"
+DEFAULT_REMOTE_BASE = "https://github.com/lsst-ts"
+FETCH_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+__all__ = [
+    "DEFAULT_REMOTE_BASE",
+    "FETCH_REFSPECS",
+    "MIRROR_DIR",
+    "MIRROR_REPOS",
+    "REMOTE_BASE_ENV",
+    "add_mirror_arguments",
+    "get_mirror_root",
+    "resolve_parent_dir",
+    "runner",
+    "update_mirrors",
+]
+
+
+def get_mirror_root() -> pathlib.Path:
+    """Get the directory holding the mirrors, creating it if necessary.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The full path of the mirrors directory.
+    """
+    mirror_root = cache_helpers.get_cache_dir() / MIRROR_DIR
+    mirror_root.mkdir(parents=True, exist_ok=True)
+    return mirror_root
+
+
+def get_remote_url(name: str, remote_base: str | None = None) -> str:
+    """Get the URL of the remote repository of a mirror.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the repository.
+    remote_base : `str` or None, optional
+        The base URL of the remotes. If None, the environment variable or
+        the default base is used.
+
+    Returns
+    -------
+    `str`
+        The remote URL.
+    """
+    if remote_base is None:
+        remote_base = os.environ.get(REMOTE_BASE_ENV, DEFAULT_REMOTE_BASE)
+    return f"{remote_base.rstrip('/')}/{name}"
+
+
+def run_git(args: list[str]) -> str:
+    """Run a git command.
+
+    Parameters
+    ----------
+    args : `list`
+        The git arguments.
+
+    Returns
+    -------
+    `str`
+        The standard output of the command.
+
+    Raises
+    ------
+    RuntimeError
+        If the command fails.
+    """
+    proc = subprocess.run(["git"] + args, text=True, capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def create_mirror(mirror_dir: pathlib.Path, url: str) -> None:
+    """Create a partial bare mirror.
+
+    Parameters
+    ----------
+    mirror_dir : `pathlib.Path`
+        The directory of the mirror.
+    url : `str`
+        The URL of the remote repository.
+    """
+    run_git(["clone", "--bare", "--filter=blob:none", url, str(mirror_dir)])
+    # A bare clone does not track the remote branches, which the fetches of
+    # the scripts need to refresh them.
+    for refspec in FETCH_REFSPECS:
+        run_git(
+            ["-C", str(mirror_dir), "config", "--add", "remote.origin.fetch", refspec]
+        )
+
+
+def update_mirror(name: str, remote_base: str | None = None) -> float:
+    """Create or refresh the mirror of a repository.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the repository.
+    remote_base : `str` or None, optional
+        The base URL of the remote used to create the mirror. Existing
+        mirrors keep their remote.
+
+    Returns
+    -------
+    `float`
+        The time taken, in seconds, including the wait for the mirror lock.
+    """
+    start = time.perf_counter()
+    mirror_dir = get_mirror_root() / f"{name}{git_helpers.BARE_SUFFIX}"
+    lock_file = mirror_dir.with_name(f"{mirror_dir.name}.lock")
+    with open(lock_file, "w") as lfile:
+        # Wait for any other process updating the same mirror.
+        fcntl.flock(lfile, fcntl.LOCK_EX)
+        if mirror_dir.exists():
+            run_git(["-C", str(mirror_dir), "fetch", "--prune", "--quiet", "origin"])
+        else:
+            create_mirror(mirror_dir, get_remote_url(name, remote_base))
+        run_git(
+            [
+                "-C",
+                str(mirror_dir),
+                "commit-graph",
+                "write",
+                "--reachable",
+                "--changed-paths",
+            ]
+        )
+    return time.perf_counter() - start
+
+
+def update_mirrors(
+    names: list[str], remote_base: str | None = None
+) -> dict[str, float]:
+    """Create or refresh the mirrors of several repositories in parallel.
+
+    Parameters
+    ----------
+    names : `list`
+        The names of the repositories.
+    remote_base : `str` or None, optional
+        The base URL of the remotes used to create missing mirrors.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the repository names to the update times in seconds.
+
+    Raises
+    ------
+    RuntimeError
+        If any of the updates failed.
+    """
+    if not names:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(names)) as executor:
+        futures = {
+            name: executor.submit(update_mirror, name, remote_base) for name in names
+        }
+    errors = [
+        str(future.exception())
+        for future in futures.values()
+        if future.exception() is not None
+    ]
+    if errors:
+        raise RuntimeError(
+            "Cannot update the git mirrors:" + "".join(f"\n  {e}" for e in errors)
+        )
+    return {name: future.result() for name, future in futures.items()}
+
+
+def get_disk_usage(directory: pathlib.Path) -> int:
+    """Get the size of the files in a directory.
+
+    Parameters
+    ----------
+    directory : `pathlib.Path`
+        The directory.
+
+    Returns
+    -------
+    `int`
+        The total size in bytes.
+    """
+    return sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+
+
+def add_mirror_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the option to use the git mirrors to a script.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script parser.
+    """
+    parser.add_argument(
+        "--git-mirror",
+        action="store_true",
+        help="Refresh and use the bare git mirrors in the vanward cache directory "
+        "instead of the clones. See vanward git_mirror.",
+    )
+
+
+def resolve_parent_dir(
+    parent_dir: pathlib.Path | None, use_mirror: bool, names: list[str]
+) -> pathlib.Path:
+    """Get the directory holding the repositories of a script.
+
+    Parameters
+    ----------
+    parent_dir : `pathlib.Path` or None
+        The directory holding the clones given to the script.
+    use_mirror : `bool`
+        If True, refresh the mirrors of the repositories and use them.
+    names : `list`
+        The names of the repositories the script uses.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The directory holding the repositories.
+
+    Raises
+    ------
+    instrumentation.UsageError
+        If neither a directory nor the mirrors are given.
+    """
+    if use_mirror:
+        update_mirrors(names)
+        return get_mirror_root()
+    if parent_dir is None:
+        raise instrumentation.UsageError(
+            "a repository directory or --git-mirror is required"
+        )
+    return parent_dir
+
+
+def main(opts: argparse.Namespace) -> None:
+    """
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    times = update_mirrors(opts.repos, opts.remote_base)
+    mirror_root = get_mirror_root()
+    for name, duration in times.items():
+        size = get_disk_usage(mirror_root / f"{name}{git_helpers.BARE_SUFFIX}")
+        print(f"{name}: updated in {duration:.1f} s, {size / 2**20:.1f} MiB")
+
+
+def runner() -> None:
+    parser = argparse.ArgumentParser(
+        description="Create or refresh the bare git mirrors used with --git-mirror."
+    )
+
+    parser.add_argument(
+        "repos",
+        nargs="*",
+        default=MIRROR_REPOS,
+        help=f"The repositories to mirror. Default: {' '.join(MIRROR_REPOS)}.",
+    )
+
+    parser.add_argument(
+        "--remote-base",
+        default=None,
+        help="The base URL of the remotes of new mirrors, e.g. a file:// URL. "
+        f"Default: the {REMOTE_BASE_ENV} environment variable or "
+        f"{DEFAULT_REMOTE_BASE}.",
+    )
+
+    instrumentation.run(parser, main)
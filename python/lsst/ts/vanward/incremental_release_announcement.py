@@ -1,6 +1,8 @@
 import argparse
 from datetime import datetime
 
+from . import instrumentation, xml_helpers
+
 __all__ = ["runner"]
 
 
@@ -31,9 +33,13 @@ def main(opts: argparse.Namespace) -> None:
     else:
         announcement.append(".")
     announcement.append(f" The deployment will begin at {opts.upgrade_time} CLT.")
-    components_affected_phrase = (
-        f" We will be restarting {opts.components} and all the ScriptQueues."
-    )
+    components = xml_helpers.resolve_cscs(opts.components, opts, opts.xml_version)
+    if components:
+        components_affected_phrase = (
+            f" We will be restarting {components} and all the ScriptQueues."
+        )
+    else:
+        components_affected_phrase = " We will be restarting all the ScriptQueues."
 
     announcement.append(components_affected_phrase)
 
@@ -41,6 +47,8 @@ def main(opts: argparse.Namespace) -> None:
 
     if not opts.summit:
         end_phrase = f" We will then use {opts.test_sq} and the aforementioned components for testing."
+        if not components:
+            end_phrase = f" We will then use {opts.test_sq} for testing."
         announcement.append(end_phrase)
     if opts.summit:
         end_phrase = (
@@ -95,14 +103,21 @@ def runner() -> None:
         "--components",
         required=True,
         type=str,
-        help="A comma separated list of the components being upgraded.",
+        help="A comma separated list of the components being upgraded. "
+        f"Use {xml_helpers.AUTO} to derive them from the interfaces changed between "
+        "--previous-xml-version and --xml-version; a change to an interface file "
+        "shared by all CSCs selects every CSC.",
     )
+    parser.add_argument(
+        "--xml-version",
+        default=None,
+        help=f"The XML version being deployed, needed with {xml_helpers.AUTO}.",
+    )
+    xml_helpers.add_xml_arguments(parser)
     parser.add_argument(
         "--test_sq",
         default="MTQueue",
         help="The ScriptQueue to be used for testing after deployment (only for non-summit deployments).",
     )
 
-    args = parser.parse_args()
-
-    main(args)
+    instrumentation.run(parser, main)
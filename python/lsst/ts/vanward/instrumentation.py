@@ -0,0 +1,559 @@
+"""Instrumentation of the external calls made by the scripts.
+
+Every HTTP request (Jira, Confluence and GitHub clients all use requests),
+git command and subprocess run during a script is recorded with its
+duration, payload sizes and status. The records can be written as a
+Chrome trace, which opens in Perfetto or ``chrome://tracing``, and
+summarized in a table.
+
+The scripts can also be profiled, either writing a cProfile dump or printing
+the functions with the largest cumulative time, along with the peak memory
+use of the run, and their HTTP traffic recorded to or replayed from a
+cassette file.
+
+Attributes
+----------
+COMMAND_LINE : `contextvars.ContextVar`
+    The program name and arguments of the script run by the vanward command,
+    or None if the script was run from its own entry point.
+ID_REGEX : `re.Pattern`
+    Regular expression matching URL path segments that identify a single
+    resource, which are collapsed when grouping calls.
+PROFILE_MODES : `tuple`
+    The supported values of the ``--profile`` option.
+PROFILE_STATS_LIMIT : `int`
+    The number of functions printed by the ``stats`` profile mode.
+"""
+
+import argparse
+import contextlib
+import contextvars
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from . import recording
+
+COMMAND_LINE: contextvars.ContextVar[tuple[str, list[str]] | None] = (
+    contextvars.ContextVar("COMMAND_LINE", default=None)
+)
+ID_REGEX = re.compile(r"^(?:[A-Za-z]+-)?\d+$|^[0-9a-f]{7,40}$")
+PROFILE_MODES = ("cprofile", "stats")
+PROFILE_STATS_LIMIT = 30
+
+__all__ = [
+    "COMMAND_LINE",
+    "CallRecord",
+    "Tracer",
+    "UsageError",
+    "add_instrumentation_arguments",
+    "parse_args",
+    "profiling",
+    "run",
+    "tracing",
+]
+
+
+class UsageError(ValueError):
+    """Error in the script arguments found while running the script.
+
+    `run` reports it with the script usage, as argparse does.
+    """
+
+
+@dataclass
+class CallRecord:
+    """Holder for the information about one external call."""
+
+    category: str
+    name: str
+    group: str
+    start: float
+    duration: float
+    thread: int
+    status: str = ""
+    request_size: int = 0
+    response_size: int = 0
+
+    @property
+    def failed(self) -> bool:
+        """True if the call raised or returned an error status."""
+        return not self.status.isdigit() or int(self.status) >= 400
+
+
+@dataclass
+class Tracer:
+    """Collector of the external calls made while it is installed."""
+
+    records: list[CallRecord] = field(default_factory=list)
+    start: float = field(default_factory=time.perf_counter)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, record: CallRecord) -> None:
+        """Add a call record.
+
+        Parameters
+        ----------
+        record : `CallRecord`
+            The call record.
+        """
+        with self.lock:
+            self.records.append(record)
+
+    @contextlib.contextmanager
+    def record(self, category: str, name: str, group: str) -> Iterator[CallRecord]:
+        """Time a call and add its record.
+
+        Parameters
+        ----------
+        category : `str`
+            The kind of call, e.g. http or git.
+        name : `str`
+            The full description of the call.
+        group : `str`
+            The description of the call used to group similar calls.
+
+        Yields
+        ------
+        `CallRecord`
+            The record to fill in the status and sizes on.
+        """
+        record = CallRecord(
+            category=category,
+            name=name,
+            group=group,
+            start=time.perf_counter() - self.start,
+            duration=0.0,
+            thread=threading.get_ident(),
+        )
+        begin = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            if not record.status:
+                record.status = type(e).__name__
+            raise
+        finally:
+            record.duration = time.perf_counter() - begin
+            self.add(record)
+
+    def write_chrome_trace(self, trace_file: pathlib.Path, title: str) -> None:
+        """Write the calls in the Chrome trace event format.
+
+        Parameters
+        ----------
+        trace_file : `pathlib.Path`
+            The output file.
+        title : `str`
+            The name of the event covering the whole run.
+        """
+        pid = os.getpid()
+        threads: dict[int, int] = {}
+        events = [
+            {
+                "name": title,
+                "cat": "run",
+                "ph": "X",
+                "ts": 0,
+                "dur": round((time.perf_counter() - self.start) * 1e6),
+                "pid": pid,
+                "tid": 0,
+            }
+        ]
+        for record in self.records:
+            tid = threads.setdefault(record.thread, len(threads) + 1)
+            events.append(
+                {
+                    "name": record.name,
+                    "cat": record.category,
+                    "ph": "X",
+                    "ts": round(record.start * 1e6),
+                    "dur": round(record.duration * 1e6),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {
+                        "status": record.status,
+                        "request_size": record.request_size,
+                        "response_size": record.response_size,
+                    },
+                }
+            )
+        with open(trace_file.expanduser(), "w") as tfile:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, tfile)
+
+    def print_summary(self) -> None:
+        """Print a table of the calls grouped by kind."""
+        groups: dict[tuple[str, str], list[CallRecord]] = {}
+        for record in self.records:
+            groups.setdefault((record.category, record.group), []).append(record)
+        total = time.perf_counter() - self.start
+        print()
+        print(f"{len(self.records)} external calls in {total:.2f} s")
+        if not groups:
+            return
+        rows = [
+            (
+                f"{category} {group}",
+                len(records),
+                sum(record.duration for record in records),
+                max(record.duration for record in records),
+                sum(record.response_size for record in records),
+                sum(record.failed for record in records),
+            )
+            for (category, group), records in groups.items()
+        ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        width = max(len(row[0]) for row in rows)
+        print(
+            f"{'call':{width}}  {'count':>6}  {'total s':>8}  {'max ms':>8}  "
+            f"{'bytes':>10}  {'errors':>6}"
+        )
+        for name, count, duration, longest, size, errors in rows:
+            print(
+                f"{name:{width}}  {count:>6}  {duration:>8.2f}  "
+                f"{longest * 1000:>8.0f}  {size:>10}  {errors:>6}"
+            )
+
+
+def get_url_group(url: str) -> str:
+    """Collapse the resource identifiers of a URL.
+
+    Parameters
+    ----------
+    url : `str`
+        The request URL.
+
+    Returns
+    -------
+    `str`
+        The host and path of the URL with identifiers replaced by ``*``.
+    """
+    parts = urllib.parse.urlsplit(url)
+    segments = [
+        "*" if ID_REGEX.match(segment) else segment for segment in parts.path.split("/")
+    ]
+    return parts.netloc + "/".join(segments)
+
+
+def get_command_name(args: Any) -> str:
+    """Create a short description of a command line.
+
+    Parameters
+    ----------
+    args : `list` or `str`
+        The command line.
+
+    Returns
+    -------
+    `str`
+        The program name followed by its first argument.
+    """
+    if isinstance(args, (str, bytes, os.PathLike)):
+        args = str(args).split()
+    args = [str(arg) for arg in args]
+    return " ".join([os.path.basename(args[0])] + args[1:2]) if args else ""
+
+
+@contextlib.contextmanager
+def tracing(tracer: Tracer) -> Iterator[Tracer]:
+    """Record the external calls made inside the context.
+
+    Parameters
+    ----------
+    tracer : `Tracer`
+        The collector of the calls.
+
+    Yields
+    ------
+    `Tracer`
+        The collector of the calls.
+    """
+    import requests
+
+    patches: list[tuple[Any, str, Callable]] = []
+
+    def patch(owner: Any, name: str, wrapper: Callable) -> None:
+        patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, wrapper)
+
+    send = requests.Session.send
+
+    def traced_send(
+        session: requests.Session, request: requests.PreparedRequest, **kwargs: Any
+    ) -> requests.Response:
+        url = request.url or ""
+        with tracer.record(
+            "http",
+            f"{request.method} {url.split('?')[0]}",
+            f"{request.method} {get_url_group(url)}",
+        ) as record:
+            body = request.body or b""
+            record.request_size = len(body)
+            response = send(session, request, **kwargs)
+            record.status = str(response.status_code)
+            if not kwargs.get("stream"):
+                record.response_size = len(response.content)
+        return response
+
+    patch(requests.Session, "send", traced_send)
+
+    run = subprocess.run
+
+    def traced_run(args: Any, *pargs: Any, **kwargs: Any) -> Any:
+        name = get_command_name(args)
+        with tracer.record("subprocess", name, name) as record:
+            result = run(args, *pargs, **kwargs)
+            record.status = str(result.returncode)
+            if isinstance(result.stdout, (str, bytes)):
+                record.response_size = len(result.stdout)
+        return result
+
+    patch(subprocess, "run", traced_run)
+
+    try:
+        import git.cmd
+    except ImportError:
+        pass
+    else:
+        execute = git.cmd.Git.execute
+
+        def traced_execute(
+            gitc: git.cmd.Git, command: Any, *pargs: Any, **kwargs: Any
+        ) -> Any:
+            name = get_command_name(command)
+            with tracer.record("git", name, name) as record:
+                result = execute(gitc, command, *pargs, **kwargs)
+                # The status is 0 unless the command raised.
+                record.status = "0"
+                output = result[1] if isinstance(result, tuple) else result
+                if isinstance(output, (str, bytes)):
+                    record.response_size = len(output)
+            return result
+
+        patch(git.cmd.Git, "execute", traced_execute)
+
+    try:
+        yield tracer
+    finally:
+        for owner, name, original in reversed(patches):
+            setattr(owner, name, original)
+
+
+def get_peak_rss() -> int:
+    """Get the peak resident set size of the process.
+
+    Returns
+    -------
+    `int`
+        The peak resident set size in bytes.
+    """
+    import resource
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@contextlib.contextmanager
+def profiling(mode: str, profile_file: pathlib.Path) -> Iterator[None]:
+    """Profile the code run inside the context.
+
+    Parameters
+    ----------
+    mode : `str`
+        Either ``cprofile`` to write the profile to ``profile_file`` or
+        ``stats`` to print the functions with the largest cumulative time.
+    profile_file : `pathlib.Path`
+        The output file of the ``cprofile`` mode.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print()
+        if mode == "cprofile":
+            profiler.dump_stats(profile_file)
+            print(f"Wrote profile to {profile_file}")
+        else:
+            stats = pstats.Stats(profiler, stream=sys.stdout)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_STATS_LIMIT)
+        # Within the daemon the peak RSS covers all commands run so far.
+        print(
+            f"Peak RSS {get_peak_rss() / 2**20:.1f} MiB, "
+            f"peak Python allocations {peak_traced / 2**20:.1f} MiB"
+        )
+
+
+def add_instrumentation_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the instrumentation options to a script parser.
+
+    Options the script already defines, like ``--verbose``, are kept.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script argument parser.
+    """
+    group = parser.add_argument_group("instrumentation")
+
+    group.add_argument(
+        "--trace",
+        type=pathlib.Path,
+        default=None,
+        metavar="FILE",
+        help="Write the external calls made by the script to FILE in the "
+        "Chrome trace format.",
+    )
+
+    group.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile the script. cprofile writes the profile to <script>.prof "
+        "in the current directory, for snakeviz or pstats, and stats prints the "
+        "functions with the largest cumulative time. Both print the peak memory "
+        "use.",
+    )
+
+    cassette_group = group.add_mutually_exclusive_group()
+
+    cassette_group.add_argument(
+        "--record",
+        type=pathlib.Path,
+        default=None,
+        metavar="FILE",
+        help="Record the HTTP responses, without credentials or personal data, to "
+        "the cassette FILE.",
+    )
+
+    cassette_group.add_argument(
+        "--replay",
+        type=pathlib.Path,
+        default=None,
+        metavar="FILE",
+        help="Serve the HTTP requests from the cassette FILE instead of the "
+        "network.",
+    )
+
+    group.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Delay added to every replayed response.",
+    )
+
+    with contextlib.suppress(argparse.ArgumentError):
+        group.add_argument(
+            "-v", "--verbose", action="store_true", help="Make script more verbose."
+        )
+
+
+def run_main(
+    parser: argparse.ArgumentParser,
+    main: Callable[[argparse.Namespace], None],
+    args: argparse.Namespace,
+) -> None:
+    """Run the script main function, reporting usage errors.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script argument parser.
+    main : `Callable`
+        The script main function.
+    args : `argparse.Namespace`
+        The parsed arguments.
+    """
+    try:
+        main(args)
+    except UsageError as e:
+        parser.error(str(e))
+
+
+def parse_args(parser: argparse.ArgumentParser) -> argparse.Namespace:
+    """Parse the script arguments.
+
+    The arguments are taken from `COMMAND_LINE` when the vanward command runs
+    the script, and from `sys.argv` otherwise.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script argument parser.
+
+    Returns
+    -------
+    `argparse.Namespace`
+        The parsed arguments.
+    """
+    command_line = COMMAND_LINE.get()
+    if command_line is None:
+        return parser.parse_args()
+    parser.prog, args = command_line
+    return parser.parse_args(args)
+
+
+def run(
+    parser: argparse.ArgumentParser, main: Callable[[argparse.Namespace], None]
+) -> None:
+    """Parse the script arguments and run the script with instrumentation.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script argument parser.
+    main : `Callable`
+        The script main function.
+    """
+    add_instrumentation_arguments(parser)
+    args = parse_args(parser)
+
+    if (
+        args.trace is None
+        and not args.verbose
+        and args.profile is None
+        and args.record is None
+        and args.replay is None
+    ):
+        run_main(parser, main, args)
+        return
+
+    tracer = Tracer()
+    try:
+        with contextlib.ExitStack() as stack:
+            if args.profile is not None:
+                profile_file = pathlib.Path(f"{parser.prog.split()[-1]}.prof")
+                stack.enter_context(profiling(args.profile, profile_file))
+            if args.record is not None:
+                stack.enter_context(recording.recording(args.record))
+            if args.replay is not None:
+                stack.enter_context(
+                    recording.replaying(args.replay, args.replay_latency)
+                )
+            if args.trace is not None or args.verbose:
+                stack.enter_context(tracing(tracer))
+            run_main(parser, main, args)
+    finally:
+        if args.trace is not None:
+            tracer.write_chrome_trace(args.trace, parser.prog)
+        if args.verbose:
+            tracer.print_summary()
@@ -0,0 +1,284 @@
+"""Plan and apply layer for creating Jira issues in bulk.
+
+Attributes
+----------
+BULK_BATCH_SIZE : `int`
+    The maximum number of issues Jira accepts in a single bulk request.
+EXISTING_INDEX_FILE : `str`
+    The name of the index of existing issues within the cache directory.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from . import cache_helpers, ticket_helpers
+
+if TYPE_CHECKING:
+    import jira
+
+BULK_BATCH_SIZE = 50
+EXISTING_INDEX_FILE = "existing_issues.json"
+
+__all__ = [
+    "BULK_BATCH_SIZE",
+    "EXISTING_INDEX_FILE",
+    "IssuePlan",
+    "IssueResult",
+    "apply_issue_plans",
+    "create_missing_issues",
+    "create_missing_version",
+    "find_existing_issues",
+    "print_issue_plans",
+    "print_version_plan",
+    "record_issues",
+]
+
+
+@dataclass
+class IssuePlan:
+    """Holder for the description of a Jira issue to create."""
+
+    role: str
+    fields: dict[str, Any]
+
+
+@dataclass
+class IssueResult:
+    """Holder for the outcome of creating a planned Jira issue."""
+
+    plan: IssuePlan
+    key: str | None = None
+    error: Any = None
+    existed: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """True if the issue was created or already existed."""
+        return self.key is not None
+
+    @property
+    def index_key(self) -> str:
+        """The key of the issue in the existing issues index."""
+        return get_index_key(self.plan)
+
+
+def get_index_key(plan: IssuePlan) -> str:
+    """Create the key of a planned issue in the existing issues index.
+
+    Parameters
+    ----------
+    plan : `IssuePlan`
+        The planned issue.
+
+    Returns
+    -------
+    `str`
+        The project and summary of the issue.
+    """
+    return f"{plan.fields['project']['key']}:{plan.fields['summary']}"
+
+
+def find_existing_issues(
+    server: "jira.client.JIRA", plans: list[IssuePlan], scope: str
+) -> dict[str, IssueResult]:
+    """Find the planned issues that already exist.
+
+    Issues are matched by project and exact summary. Issues recorded in the
+    local index for the scope are confirmed with a key search, as they can
+    be deleted by hand, and the ones that no longer exist are evicted. The
+    others are looked up in a single JQL search.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    plans : `list`
+        The planned issues.
+    scope : `str`
+        The name of the index scope, e.g. the cycle.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the plan roles to the existing issues.
+    """
+    index = cache_helpers.read_json_cache(EXISTING_INDEX_FILE)
+    known = index.setdefault(scope, {})
+    cached = {
+        get_index_key(plan): known[get_index_key(plan)]
+        for plan in plans
+        if get_index_key(plan) in known
+    }
+    if cached:
+        existing_keys = ticket_helpers.search_keys(server, None, list(cached.values()))
+        for index_key, key in cached.items():
+            if key not in existing_keys:
+                del known[index_key]
+    unknown_plans = [plan for plan in plans if get_index_key(plan) not in known]
+    if unknown_plans:
+        projects = sorted({plan.fields["project"]["key"] for plan in unknown_plans})
+        summaries = [
+            plan.fields["summary"].replace('"', '\\"') for plan in unknown_plans
+        ]
+        clauses = " OR ".join(f'summary ~ "\\"{summary}\\""' for summary in summaries)
+        query = f"project in ({', '.join(projects)}) AND ({clauses})"
+        wanted = {get_index_key(plan) for plan in unknown_plans}
+        for issue in server.search_issues(
+            query, maxResults=False, fields=["summary", "project"]
+        ):
+            index_key = f"{issue.fields.project.key}:{issue.fields.summary}"
+            if index_key in wanted:
+                known[index_key] = issue.key
+    if cached or unknown_plans:
+        cache_helpers.write_json_cache(EXISTING_INDEX_FILE, index)
+    return {
+        plan.role: IssueResult(plan, key=known[get_index_key(plan)], existed=True)
+        for plan in plans
+        if get_index_key(plan) in known
+    }
+
+
+def record_issues(scope: str, results: dict[str, IssueResult]) -> None:
+    """Record created issues in the local existing issues index.
+
+    Parameters
+    ----------
+    scope : `str`
+        The name of the index scope, e.g. the cycle.
+    results : `dict`
+        Mapping of the plan roles to the creation results.
+    """
+    index = cache_helpers.read_json_cache(EXISTING_INDEX_FILE)
+    known = index.setdefault(scope, {})
+    for result in results.values():
+        if result.ok:
+            known[result.index_key] = result.key
+    cache_helpers.write_json_cache(EXISTING_INDEX_FILE, index)
+
+
+def create_missing_version(
+    server: "jira.client.JIRA", project: str, name: str, description: str
+) -> bool:
+    """Create a project version unless it already exists.
+
+    The versions of a project are listed with a single request, so unlike
+    the issues they are not kept in the local index.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    project : `str`
+        The key of the Jira project.
+    name : `str`
+        The name of the version.
+    description : `str`
+        The description of the version.
+
+    Returns
+    -------
+    `bool`
+        True if the version was created.
+    """
+    for version in server.project_versions(project):
+        if version.name == name:
+            return False
+    server.create_version(name=name, project=project, description=description)
+    return True
+
+
+def print_version_plan(project: str, name: str, description: str) -> None:
+    """Print the payload for a planned project version without sending it.
+
+    Parameters
+    ----------
+    project : `str`
+        The key of the Jira project.
+    name : `str`
+        The name of the version.
+    description : `str`
+        The description of the version.
+    """
+    print("POST version")
+    payload = {"name": name, "project": project, "description": description}
+    print(json.dumps(payload, indent=2))
+
+
+def print_issue_plans(plans: list[IssuePlan]) -> None:
+    """Print the payloads for the planned issues without sending them.
+
+    Nothing is looked up, so the payloads include the issues that may already
+    exist.
+
+    Parameters
+    ----------
+    plans : `list`
+        The planned issues.
+    """
+    for start in range(0, len(plans), BULK_BATCH_SIZE):
+        end = start + BULK_BATCH_SIZE
+        batch = plans[start:end]
+        print(f"POST issue/bulk ({', '.join(plan.role for plan in batch)})")
+        payload = {"issueUpdates": [{"fields": plan.fields} for plan in batch]}
+        print(json.dumps(payload, indent=2))
+
+
+def apply_issue_plans(
+    server: "jira.client.JIRA", plans: list[IssuePlan]
+) -> dict[str, IssueResult]:
+    """Create the planned issues through the Jira bulk endpoint.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    plans : `list`
+        The planned issues.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the plan roles to the creation results.
+    """
+    results = {}
+    for start in range(0, len(plans), BULK_BATCH_SIZE):
+        end = start + BULK_BATCH_SIZE
+        batch = plans[start:end]
+        created = server.create_issues([plan.fields for plan in batch], prefetch=False)
+        for plan, outcome in zip(batch, created):
+            if outcome["status"] == "Success":
+                results[plan.role] = IssueResult(plan, key=outcome["issue"].key)
+            else:
+                results[plan.role] = IssueResult(plan, error=outcome["error"])
+    return results
+
+
+def create_missing_issues(
+    server: "jira.client.JIRA",
+    plans: list[IssuePlan],
+    scope: str,
+) -> dict[str, IssueResult]:
+    """Create the planned issues that do not exist yet.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    plans : `list`
+        The planned issues.
+    scope : `str`
+        The name of the index scope, e.g. the cycle.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the plan roles to the existing or created issues.
+    """
+    results = find_existing_issues(server, plans, scope)
+    missing_plans = [plan for plan in plans if plan.role not in results]
+    if missing_plans:
+        created = apply_issue_plans(server, missing_plans)
+        record_issues(scope, created)
+        results.update(created)
+    return {plan.role: results[plan.role] for plan in plans}
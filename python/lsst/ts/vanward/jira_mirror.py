@@ -0,0 +1,521 @@
+"""Local SQLite mirror of Jira tickets.
+
+Attributes
+----------
+DEFAULT_MIRROR_FILE : `str`
+    The name of the default mirror database within the cache directory.
+SCHEMA : `str`
+    The SQL schema for the mirror database.
+SYNC_MARGIN : `int`
+    Extra minutes added to the incremental sync window to cover clock skew.
+"""
+
+import datetime
+import json
+import math
+import pathlib
+import sqlite3
+from collections.abc import Callable
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+from . import cache_helpers, ticket_helpers
+
+if TYPE_CHECKING:
+    import jira
+
+DEFAULT_MIRROR_FILE = "jira_mirror.sqlite3"
+SYNC_MARGIN = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    key TEXT PRIMARY KEY,
+    summary TEXT,
+    status TEXT,
+    assignee TEXT,
+    labels TEXT,
+    fix_versions TEXT,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS links (
+    key TEXT,
+    id TEXT,
+    linked_key TEXT,
+    type_name TEXT,
+    inward TEXT,
+    outward TEXT,
+    direction TEXT,
+    PRIMARY KEY (key, id)
+);
+CREATE INDEX IF NOT EXISTS links_linked_key ON links (linked_key);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    last_sync TEXT
+);
+"""
+
+__all__ = [
+    "DEFAULT_MIRROR_FILE",
+    "JiraMirror",
+    "get_default_mirror_file",
+    "get_mirror_file",
+]
+
+
+def get_default_mirror_file() -> pathlib.Path:
+    """Get the default location of the mirror database.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The full path of the mirror database.
+    """
+    return cache_helpers.get_cache_dir() / DEFAULT_MIRROR_FILE
+
+
+def get_mirror_file(
+    jira_db: pathlib.Path | Callable[[], pathlib.Path] | None,
+) -> pathlib.Path | str:
+    """Get the database selected with the ``--jira-db`` option.
+
+    The option constant is `get_default_mirror_file` itself, which is only
+    called here, so that the cache directory is not created when the scripts
+    merely build their parser, e.g. for ``--help``.
+
+    Parameters
+    ----------
+    jira_db : `pathlib.Path`, `Callable` or None
+        The option value: the file given on the command line,
+        `get_default_mirror_file` if no file is given, or None without the
+        option.
+
+    Returns
+    -------
+    `pathlib.Path` or `str`
+        The database file, or ``:memory:`` for a throwaway database.
+    """
+    if jira_db is None:
+        return ":memory:"
+    if callable(jira_db):
+        return jira_db()
+    return jira_db
+
+
+def ticket_sort_key(ticket: ticket_helpers.TicketInfo) -> tuple[str, int]:
+    """Create a key that sorts tickets by project and number.
+
+    Parameters
+    ----------
+    ticket : `ticket_helpers.TicketInfo`
+        The ticket to create the sorting key for.
+
+    Returns
+    -------
+    `tuple`
+        The project and ticket number.
+    """
+    project, _, number = ticket.key.rpartition("-")
+    return (project, int(number) if number.isdigit() else 0)
+
+
+class JiraMirror:
+    """SQLite backed mirror of Jira tickets and their links.
+
+    The mirror is synchronized incrementally by only asking Jira for tickets
+    updated since the last synchronization of a given scope. All queries
+    afterwards are answered from the local database and work offline.
+
+    Parameters
+    ----------
+    db_file : `pathlib.Path` or `str`
+        The mirror database file. Use ``:memory:`` for a throwaway mirror.
+    """
+
+    def __init__(self, db_file: pathlib.Path | str) -> None:
+        if isinstance(db_file, pathlib.Path):
+            db_file = db_file.expanduser()
+        self.connection = sqlite3.connect(db_file)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "JiraMirror":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the mirror database."""
+        self.connection.close()
+
+    def store(self, tickets: list[ticket_helpers.TicketInfo]) -> None:
+        """Insert or replace tickets and their links in the mirror.
+
+        Parameters
+        ----------
+        tickets : `list`
+            The tickets to store.
+        """
+        with self.connection:
+            for ticket in tickets:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        ticket.key,
+                        ticket.summary,
+                        ticket.status,
+                        ticket.assignee,
+                        json.dumps(ticket.labels),
+                        json.dumps(ticket.fix_versions),
+                        ticket.updated,
+                    ),
+                )
+                self.connection.execute(
+                    "DELETE FROM links WHERE key = ?", (ticket.key,)
+                )
+                self.connection.executemany(
+                    "INSERT INTO links VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            ticket.key,
+                            link.id,
+                            link.key,
+                            link.type_name,
+                            link.inward,
+                            link.outward,
+                            link.direction,
+                        )
+                        for link in ticket.links
+                    ],
+                )
+
+    def remove(self, keys: list[str]) -> None:
+        """Remove tickets, their links and the links to them from the mirror.
+
+        Parameters
+        ----------
+        keys : `list`
+            The Jira keys of the tickets to remove.
+        """
+        with self.connection:
+            for key in keys:
+                self.connection.execute("DELETE FROM issues WHERE key = ?", (key,))
+                self.connection.execute(
+                    "DELETE FROM links WHERE key = ? OR linked_key = ?", (key, key)
+                )
+
+    def _make_tickets(self, rows: list[tuple]) -> list[ticket_helpers.TicketInfo]:
+        """Create ticket holders from issue table rows.
+
+        Parameters
+        ----------
+        rows : `list`
+            The rows from the issues table.
+
+        Returns
+        -------
+        `list`
+            The ticket holders including their links.
+        """
+        tickets = []
+        for key, summary, status, assignee, labels, fix_versions, updated in rows:
+            links = [
+                ticket_helpers.TicketLink(*link)
+                for link in self.connection.execute(
+                    "SELECT id, linked_key, type_name, inward, outward, direction "
+                    "FROM links WHERE key = ? ORDER BY rowid",
+                    (key,),
+                )
+            ]
+            tickets.append(
+                ticket_helpers.TicketInfo(
+                    key=key,
+                    summary=summary,
+                    status=status,
+                    assignee=assignee,
+                    labels=json.loads(labels),
+                    fix_versions=json.loads(fix_versions),
+                    links=links,
+                    updated=updated,
+                )
+            )
+        return tickets
+
+    def get_tickets(self, keys: list[str]) -> list[ticket_helpers.TicketInfo]:
+        """Get tickets from the mirror.
+
+        Parameters
+        ----------
+        keys : `list`
+            The Jira keys of the tickets to retrieve.
+
+        Returns
+        -------
+        `list`
+            The mirrored tickets in the order of the given keys. Tickets not
+            present in the mirror are left out.
+        """
+        tickets = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), ticket_helpers.KEY_BATCH_SIZE):
+            end = start + ticket_helpers.KEY_BATCH_SIZE
+            batch = unique_keys[start:end]
+            rows = self.connection.execute(
+                f"SELECT * FROM issues WHERE key IN ({', '.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            for ticket in self._make_tickets(rows):
+                tickets[ticket.key] = ticket
+        return [tickets[key] for key in unique_keys if key in tickets]
+
+    def get_release_tickets(
+        self, release: str, project: str = "CAP"
+    ) -> list[ticket_helpers.TicketInfo]:
+        """Get the mirrored tickets with a given fix version.
+
+        Parameters
+        ----------
+        release : `str`
+            The name of the fix version.
+        project : `str`, optional
+            The Jira project the release belongs to.
+
+        Returns
+        -------
+        `list`
+            The release tickets sorted by key.
+        """
+        rows = self.connection.execute(
+            "SELECT issues.* FROM issues, json_each(issues.fix_versions) "
+            "WHERE json_each.value = ? AND issues.key LIKE ?",
+            (release, f"{project}-%"),
+        ).fetchall()
+        return sorted(self._make_tickets(rows), key=ticket_sort_key)
+
+    def get_release_graph(
+        self,
+        release: str,
+        project: str = "CAP",
+        depth: int = 1,
+        skip_link_types: list[str] = ticket_helpers.SKIP_LINK_TYPES,
+        follow_link_types: list[str] | None = None,
+    ) -> ticket_helpers.TicketGraph:
+        """Get the mirrored release tickets and the tickets linked to them.
+
+        Parameters
+        ----------
+        release : `str`
+            The name of the fix version.
+        project : `str`, optional
+            The Jira project the release belongs to.
+        depth : `int`, optional
+            The number of link levels to follow.
+        skip_link_types : `list`, optional
+            The link types to ignore.
+        follow_link_types : `list` or None, optional
+            If given, only follow these link types.
+
+        Returns
+        -------
+        `ticket_helpers.TicketGraph`
+            The release tickets as roots and the linked tickets.
+        """
+        return ticket_helpers.get_link_graph(
+            self.get_release_tickets(release, project),
+            self.get_tickets,
+            depth=depth,
+            skip_link_types=skip_link_types,
+            follow_link_types=follow_link_types,
+        )
+
+    def get_last_sync(self, scope: str) -> datetime.datetime | None:
+        """Get the time of the last synchronization for a scope.
+
+        Parameters
+        ----------
+        scope : `str`
+            The name of the synchronization scope.
+
+        Returns
+        -------
+        `datetime.datetime` or None
+            The UTC time of the last synchronization, if any.
+        """
+        row = self.connection.execute(
+            "SELECT last_sync FROM sync_state WHERE scope = ?", (scope,)
+        ).fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.fromisoformat(row[0])
+
+    def set_last_sync(self, scope: str, sync_time: datetime.datetime) -> None:
+        """Record the time of the last synchronization for a scope.
+
+        Parameters
+        ----------
+        scope : `str`
+            The name of the synchronization scope.
+        sync_time : `datetime.datetime`
+            The UTC time the synchronization started.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?)",
+                (scope, sync_time.isoformat()),
+            )
+
+    def updated_since_clause(self, scope: str) -> str | None:
+        """Create a JQL clause selecting tickets updated since the last sync.
+
+        A relative time is used so that the clause does not depend on the time
+        zone of the Jira user profile.
+
+        Parameters
+        ----------
+        scope : `str`
+            The name of the synchronization scope.
+
+        Returns
+        -------
+        `str` or None
+            The JQL clause or None if the scope was never synchronized.
+        """
+        last_sync = self.get_last_sync(scope)
+        if last_sync is None:
+            return None
+        elapsed = datetime.datetime.now(datetime.timezone.utc) - last_sync
+        minutes = math.ceil(elapsed.total_seconds() / 60) + SYNC_MARGIN
+        return f"updated >= -{minutes}m"
+
+    def sync(
+        self, server: "jira.client.JIRA", query: str, scope: str | None = None
+    ) -> list[ticket_helpers.TicketInfo]:
+        """Incrementally synchronize the tickets matching a JQL query.
+
+        Parameters
+        ----------
+        server : `jira.client.JIRA`
+            The Jira server instance.
+        query : `str`
+            The JQL query selecting the tickets to mirror.
+        scope : `str`, optional
+            The name of the synchronization scope. Defaults to the query.
+
+        Returns
+        -------
+        `list`
+            The tickets that changed since the last synchronization.
+        """
+        scope = query if scope is None else scope
+        sync_time = datetime.datetime.now(datetime.timezone.utc)
+        since = self.updated_since_clause(scope)
+        if since is not None:
+            query = f"({query}) AND {since}"
+        tickets = ticket_helpers.search_tickets(server, query)
+        self.store(tickets)
+        self.set_last_sync(scope, sync_time)
+        return tickets
+
+    def sync_release(
+        self,
+        server: "jira.client.JIRA",
+        release: str,
+        project: str = "CAP",
+        depth: int = 1,
+        skip_link_types: list[str] = ticket_helpers.SKIP_LINK_TYPES,
+        follow_link_types: list[str] | None = None,
+    ) -> list[ticket_helpers.TicketInfo]:
+        """Incrementally synchronize release tickets and their linked tickets.
+
+        Already mirrored linked tickets are refreshed with batched searches
+        for the ones updated since the last synchronization. Newly linked
+        tickets are fetched with one batched search per link level. The
+        incremental queries cannot see tickets that left the release or were
+        deleted, so the other mirrored tickets are checked with key-only
+        queries. Release tickets that no longer match are refreshed, and
+        tickets that no longer exist are removed with the links to them.
+
+        Parameters
+        ----------
+        server : `jira.client.JIRA`
+            The Jira server instance.
+        release : `str`
+            The name of the fix version.
+        project : `str`, optional
+            The Jira project the release belongs to.
+        depth : `int`, optional
+            The number of link levels to follow.
+        skip_link_types : `list`, optional
+            The link types to ignore.
+        follow_link_types : `list` or None, optional
+            If given, only follow these link types.
+
+        Returns
+        -------
+        `list`
+            The tickets that changed since the last synchronization, including
+            the mirrored copies of the deleted tickets.
+        """
+        scope = f"release:{project}:{release}"
+        release_query = f'project = {project} AND fixVersion = "{release}"'
+        since = self.updated_since_clause(scope)
+        mirrored_keys = []
+        linked_keys = []
+        if since is not None:
+            mirrored_keys = [
+                ticket.key for ticket in self.get_release_tickets(release, project)
+            ]
+            linked_keys = self.get_release_graph(
+                release, project, depth, skip_link_types, follow_link_types
+            ).get_linked_keys()
+        changed = self.sync(server, release_query, scope=scope)
+        deleted_keys = []
+
+        changed_keys = {ticket.key for ticket in changed}
+        unchanged_keys = [key for key in mirrored_keys if key not in changed_keys]
+        if unchanged_keys:
+            release_keys = ticket_helpers.search_keys(
+                server, release_query, unchanged_keys
+            )
+            stale_keys = [key for key in unchanged_keys if key not in release_keys]
+            if stale_keys:
+                tickets = ticket_helpers.get_tickets(server, stale_keys)
+                self.store(tickets)
+                changed.extend(tickets)
+                found_keys = {ticket.key for ticket in tickets}
+                deleted_keys += [key for key in stale_keys if key not in found_keys]
+
+        if linked_keys:
+            existing_keys = ticket_helpers.search_keys(server, None, linked_keys)
+            deleted_keys += [key for key in linked_keys if key not in existing_keys]
+            tickets = ticket_helpers.get_tickets(
+                server, [key for key in linked_keys if key in existing_keys], since
+            )
+            self.store(tickets)
+            changed.extend(tickets)
+
+        changed.extend(self.get_tickets(deleted_keys))
+        self.remove(deleted_keys)
+
+        refreshed_keys = set(linked_keys)
+
+        def fetch(keys: list[str]) -> list[ticket_helpers.TicketInfo]:
+            missing_keys = [key for key in keys if key not in refreshed_keys]
+            if missing_keys:
+                new_tickets = ticket_helpers.get_tickets(server, missing_keys)
+                self.store(new_tickets)
+                changed.extend(new_tickets)
+            return self.get_tickets(keys)
+
+        ticket_helpers.get_link_graph(
+            self.get_release_tickets(release, project),
+            fetch,
+            depth=depth,
+            skip_link_types=skip_link_types,
+            follow_link_types=follow_link_types,
+        )
+        return changed
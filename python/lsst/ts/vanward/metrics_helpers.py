@@ -0,0 +1,176 @@
+"""Helpers for exporting check results as OpenMetrics text files.
+
+The files are meant for the node_exporter textfile collector, so the checks
+run from cron can be monitored and alerted on.
+
+Attributes
+----------
+METRIC_PREFIX : `str`
+    The prefix of all metric names.
+"""
+
+import contextlib
+import os
+import pathlib
+import tempfile
+import time
+from collections.abc import Iterator
+
+METRIC_PREFIX = "vanward_"
+
+__all__ = ["METRIC_PREFIX", "CheckMetrics"]
+
+
+def escape_label_value(value: str) -> str:
+    """Escape a label value for the text exposition format.
+
+    Parameters
+    ----------
+    value : `str`
+        The label value.
+
+    Returns
+    -------
+    `str`
+        The escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CheckMetrics:
+    """Collector of the metrics of a check run.
+
+    All metrics are gauges labelled with the name of the check.
+
+    Parameters
+    ----------
+    check : `str`
+        The name of the check.
+    """
+
+    def __init__(self, check: str) -> None:
+        self.check = check
+        self.start = time.perf_counter()
+        self.help: dict[str, str] = {}
+        self.samples: dict[str, list[tuple[dict[str, str], float]]] = {}
+
+    def set(
+        self,
+        name: str,
+        value: float,
+        help: str,
+        labels: dict[str, str] | None = None,
+    ) -> None:
+        """Set the value of a gauge.
+
+        Setting a gauge again with the same labels replaces its value.
+
+        Parameters
+        ----------
+        name : `str`
+            The metric name without the prefix.
+        value : `float`
+            The value of the gauge.
+        help : `str`
+            The description of the metric.
+        labels : `dict` or None, optional
+            Labels in addition to the check name.
+        """
+        self.help.setdefault(name, help)
+        all_labels = {"check": self.check}
+        all_labels.update(labels or {})
+        samples = self.samples.setdefault(name, [])
+        for i, (sample_labels, _) in enumerate(samples):
+            if sample_labels == all_labels:
+                samples[i] = (all_labels, value)
+                return
+        samples.append((all_labels, value))
+
+    def update(self, other: "CheckMetrics") -> None:
+        """Set the gauges collected by another collector.
+
+        A collector is not thread safe, so the stages of a check run in
+        threads collect their metrics separately and they are merged once the
+        threads are done.
+
+        Parameters
+        ----------
+        other : `CheckMetrics`
+            The other collector.
+        """
+        for name, samples in other.samples.items():
+            for labels, value in samples:
+                extra_labels = {
+                    key: label for key, label in labels.items() if key != "check"
+                }
+                self.set(name, value, other.help[name], extra_labels)
+
+    @contextlib.contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Record the duration of a stage of the check.
+
+        Parameters
+        ----------
+        stage : `str`
+            The name of the stage.
+        """
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.set(
+                "check_stage_duration_seconds",
+                time.perf_counter() - begin,
+                "Duration of a stage of the check.",
+                {"stage": stage},
+            )
+
+    def format(self) -> str:
+        """Format the metrics in the OpenMetrics text format.
+
+        Returns
+        -------
+        `str`
+            The metrics text, including the run duration and time.
+        """
+        self.set(
+            "check_duration_seconds",
+            time.perf_counter() - self.start,
+            "Duration of the check run.",
+        )
+        self.set(
+            "check_last_run_timestamp_seconds",
+            time.time(),
+            "Time the check run finished.",
+        )
+        lines = []
+        for name, samples in self.samples.items():
+            full_name = METRIC_PREFIX + name
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"# HELP {full_name} {self.help[name]}")
+            for labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{escape_label_value(str(label))}"'
+                    for key, label in labels.items()
+                )
+                lines.append(f"{full_name}{{{label_text}}} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_file: pathlib.Path) -> None:
+        """Atomically write the metrics file.
+
+        The collector never sees a partially written file.
+
+        Parameters
+        ----------
+        metrics_file : `pathlib.Path`
+            The output file.
+        """
+        metrics_file = metrics_file.expanduser()
+        with tempfile.NamedTemporaryFile(
+            "w", dir=metrics_file.parent, delete=False, suffix=".tmp"
+        ) as tfile:
+            tfile.write(self.format())
+        os.chmod(tfile.name, 0o644)
+        os.replace(tfile.name, metrics_file)
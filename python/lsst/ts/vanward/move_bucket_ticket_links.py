@@ -1,15 +1,296 @@
-"""Script to move bucket ticket links from one Jira ticket to another."""
+"""Script to move bucket ticket links from one Jira ticket to another.
+
+Attributes
+----------
+DEFAULT_JOBS : `int`
+    The default number of links moved concurrently.
+"""
 
 import argparse
+import concurrent.futures
+import dataclasses
+import datetime
+import json
+import os
 import pathlib
+import threading
+from typing import TYPE_CHECKING, Any
+
+from . import cache_helpers, instrumentation, ticket_helpers
 
-from jira import JIRA
+if TYPE_CHECKING:
+    import jira
+    import requests
 
-from . import ticket_helpers
+DEFAULT_JOBS = 8
 
 __all__ = ["runner"]
 
 
+class LinkJournal:
+    """Append-only journal of the link operations of a bucket move.
+
+    Each completed operation is written as one JSON line and flushed to disk
+    before the next operation that depends on it is started.
+
+    Parameters
+    ----------
+    journal_file : `pathlib.Path`
+        The journal file.
+    """
+
+    def __init__(self, journal_file: pathlib.Path) -> None:
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+
+    def read(self) -> list[dict[str, Any]]:
+        """Read all the journal entries.
+
+        Returns
+        -------
+        `list`
+            The journal entries in the order they were written.
+        """
+        if not self.journal_file.exists():
+            return []
+        entries = []
+        with open(self.journal_file) as jfile:
+            for line in jfile:
+                # A crash can leave a partially written last line behind.
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+    def record(self, op: str, link: ticket_helpers.TicketLink, **kwargs: Any) -> None:
+        """Append a completed operation to the journal.
+
+        Parameters
+        ----------
+        op : `str`
+            The name of the operation.
+        link : `ticket_helpers.TicketLink`
+            The original link the operation applies to.
+        **kwargs
+            Extra information to store with the entry.
+        """
+        entry = dict(
+            op=op,
+            time=datetime.datetime.now().isoformat(timespec="seconds"),
+            link=dataclasses.asdict(link),
+            **kwargs,
+        )
+        with self.lock:
+            with open(self.journal_file, "a") as jfile:
+                jfile.write(json.dumps(entry) + "\n")
+                jfile.flush()
+                os.fsync(jfile.fileno())
+
+    def get_done(self) -> dict[str, set[str]]:
+        """Get the link Ids for each operation that has been completed.
+
+        Returns
+        -------
+        `dict`
+            Mapping of operation names to the original link Ids.
+        """
+        done: dict[str, set[str]] = {}
+        for entry in self.read():
+            done.setdefault(entry["op"], set()).add(entry["link"]["id"])
+        return done
+
+    def get_copies(self) -> dict[str, str | None]:
+        """Get the Ids of the links created on the next bucket ticket.
+
+        Returns
+        -------
+        `dict`
+            Mapping of the original link Ids to the Ids of their copies, or
+            None if the Id of a copy is not known.
+        """
+        return {
+            entry["link"]["id"]: entry.get("link_id")
+            for entry in self.read()
+            if entry["op"] == "create"
+        }
+
+    def get_links(self) -> dict[str, ticket_helpers.TicketLink]:
+        """Get the original links that appear in the journal.
+
+        Returns
+        -------
+        `dict`
+            Mapping of the original link Ids to the links.
+        """
+        return {
+            entry["link"]["id"]: ticket_helpers.TicketLink(**entry["link"])
+            for entry in self.read()
+        }
+
+
+def get_default_journal_file(current_ticket: str, next_ticket: str) -> pathlib.Path:
+    """Get the default journal file for a bucket move.
+
+    Parameters
+    ----------
+    current_ticket : `str`
+        The Jira key of the current version's bucket ticket.
+    next_ticket : `str`
+        The Jira key of the next version's bucket ticket.
+
+    Returns
+    -------
+    `pathlib.Path`
+        The full path of the journal file.
+    """
+    return (
+        cache_helpers.get_cache_dir()
+        / f"move_links_{current_ticket}_{next_ticket}.jsonl"
+    )
+
+
+def get_created_link_id(response: "requests.Response") -> str | None:
+    """Get the Id of a link from the response to its creation.
+
+    Parameters
+    ----------
+    response : `requests.Response`
+        The response to the link creation request.
+
+    Returns
+    -------
+    `str` or None
+        The link Id, taken from the location of the new link, or None if the
+        response has no location.
+    """
+    location = response.headers.get("Location")
+    if not location:
+        return None
+    return location.rstrip("/").rsplit("/", 1)[-1]
+
+
+def link_ticket(
+    js: "jira.client.JIRA", link: ticket_helpers.TicketLink, ticket: str
+) -> None:
+    """Put a link back on a ticket, keeping its direction.
+
+    Parameters
+    ----------
+    js : `jira.client.JIRA`
+        The Jira server instance.
+    link : `ticket_helpers.TicketLink`
+        The link to copy.
+    ticket : `str`
+        The Jira key of the ticket to put the link on.
+    """
+    if link.direction == "inward":
+        js.create_issue_link(link.type_name, link.key, ticket)
+    else:
+        js.create_issue_link(link.type_name, ticket, link.key)
+
+
+def move_link(
+    js: "jira.client.JIRA",
+    journal: LinkJournal,
+    link: ticket_helpers.TicketLink,
+    next_ticket: str,
+    created: bool,
+) -> None:
+    """Move a link to the next bucket ticket.
+
+    The next bucket ticket is put on the inward side of the new link,
+    whatever the direction of the original link.
+
+    Parameters
+    ----------
+    js : `jira.client.JIRA`
+        The Jira server instance.
+    journal : `LinkJournal`
+        The journal of the move.
+    link : `ticket_helpers.TicketLink`
+        The link on the current bucket ticket.
+    next_ticket : `str`
+        The Jira key of the next version's bucket ticket.
+    created : `bool`
+        True if a previous run already created the link on the next ticket.
+    """
+    if not created:
+        response = js.create_issue_link(link.type_name, next_ticket, link.key)
+        journal.record(
+            "create", link, ticket=next_ticket, link_id=get_created_link_id(response)
+        )
+    js.delete_issue_link(link.id)
+    journal.record("delete", link)
+
+
+def rollback_link(
+    js: "jira.client.JIRA",
+    journal: LinkJournal,
+    link: ticket_helpers.TicketLink,
+    current_ticket: str,
+    next_link_id: str | None,
+    deleted: bool,
+) -> None:
+    """Put a moved link back on the current bucket ticket.
+
+    Parameters
+    ----------
+    js : `jira.client.JIRA`
+        The Jira server instance.
+    journal : `LinkJournal`
+        The journal of the move.
+    link : `ticket_helpers.TicketLink`
+        The original link on the current bucket ticket.
+    current_ticket : `str`
+        The Jira key of the current version's bucket ticket.
+    next_link_id : `str` or None
+        The Id of the copied link on the next bucket ticket, or None if it is
+        not known.
+    deleted : `bool`
+        True if the original link was deleted.
+    """
+    if deleted:
+        link_ticket(js, link, current_ticket)
+        journal.record("restore", link)
+    if next_link_id is None:
+        print(
+            f"Cannot find the copy of the {link.type_name} link to {link.key}, "
+            "remove it by hand."
+        )
+    else:
+        js.delete_issue_link(next_link_id)
+    journal.record("unlink", link)
+
+
+def run_concurrently(jobs: int, tasks: list[tuple]) -> None:
+    """Run link tasks with bounded concurrency.
+
+    Parameters
+    ----------
+    jobs : `int`
+        The maximum number of concurrent tasks.
+    tasks : `list`
+        The tasks as tuples of a function and its arguments.
+    """
+    if not tasks:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(*task) for task in tasks]
+        errors = [
+            future.exception()
+            for future in concurrent.futures.as_completed(futures)
+            if future.exception() is not None
+        ]
+    if errors:
+        for error in errors:
+            print(f"Link operation failed: {error}")
+        raise RuntimeError(
+            f"{len(errors)} of {len(tasks)} link operations failed. "
+            "Rerun to resume or use --rollback."
+        )
+
+
 def main(opts: argparse.Namespace) -> None:
     """
     Parameters
@@ -17,23 +298,71 @@ def main(opts: argparse.Namespace) -> None:
     opts : `argparse.Namespace`
         The script command-line arguments and options.
     """
-    jira_auth = ticket_helpers.get_jira_credentials(opts.token_file)
-    js = JIRA(server=ticket_helpers.JIRA_SERVER, basic_auth=jira_auth)
+    js = ticket_helpers.get_jira_client(opts.token_file, pool_size=opts.jobs)
+
+    journal_file = opts.journal
+    if journal_file is None:
+        journal_file = get_default_journal_file(opts.current_ticket, opts.next_ticket)
+    journal = LinkJournal(journal_file)
+    done = journal.get_done()
+
+    if opts.rollback:
+        rolled_back = done.get("unlink", set())
+        links = [
+            link
+            for link_id, link in journal.get_links().items()
+            if link_id in done.get("create", set()) and link_id not in rolled_back
+        ]
+        copies = journal.get_copies()
+        for link in links:
+            print(f"Restore {link.type_name} link to {link.key}")
+        if opts.dry_run:
+            return
+        run_concurrently(
+            opts.jobs,
+            [
+                (
+                    rollback_link,
+                    js,
+                    journal,
+                    link,
+                    opts.current_ticket,
+                    copies[link.id],
+                    link.id in done.get("delete", set()),
+                )
+                for link in links
+            ],
+        )
+        return
 
-    current = js.issue(opts.current_ticket)
+    current = ticket_helpers.TicketInfo.from_issue(js.issue(opts.current_ticket))
     keep_ticket_keys = opts.keep_tickets.split(",")
 
-    links = current.fields.issuelinks
     move_links = []
-    for link in links:
-        link_key = ticket_helpers.get_link_key(link)
-        if link_key not in keep_ticket_keys:
+    for link in current.links:
+        if link.key not in keep_ticket_keys:
             move_links.append(link)
 
-    for move_link in move_links:
-        link_key = ticket_helpers.get_link_key(move_link)
-        js.create_issue_link(move_link.type, opts.next_ticket, link_key)
-        js.delete_issue_link(move_link.id)
+    for link in move_links:
+        print(f"Move {link.type_name} link to {link.key}")
+    if opts.dry_run:
+        return
+
+    run_concurrently(
+        opts.jobs,
+        [
+            (
+                move_link,
+                js,
+                journal,
+                link,
+                opts.next_ticket,
+                link.id in done.get("create", set()),
+            )
+            for link in move_links
+        ],
+    )
+    print(f"Moved {len(move_links)} links. Journal: {journal_file}")
 
 
 def runner() -> None:
@@ -65,6 +394,32 @@ def runner() -> None:
         help="Specify path to Jira credentials file.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"The number of links to move concurrently. Default: {DEFAULT_JOBS}.",
+    )
+
+    parser.add_argument(
+        "--journal",
+        type=pathlib.Path,
+        default=None,
+        help="The journal file of the move. Default: a file named after both "
+        "tickets in the vanward cache directory.",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the links that would be moved without changing anything.",
+    )
+
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Put the links recorded in the journal back on the current ticket.",
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
@@ -0,0 +1,537 @@
+"""Record and replay of the HTTP traffic of the scripts.
+
+The Jira, Confluence and GitHub clients all send their requests through the
+``requests`` transport adapters. While recording, every response is saved in
+a cassette file with the credentials removed and the email addresses and
+account Ids replaced by stable pseudonyms, so cassettes can be shared. While
+replaying, the responses are served from the cassette instead of the network,
+so the scripts can be run offline and deterministically, e.g. for benchmarks
+and regression tests.
+
+Attributes
+----------
+ACCOUNT_KEYS : `frozenset`
+    The JSON keys of the response bodies whose values are pseudonymized
+    wherever they appear.
+CASSETTE_VERSION : `int`
+    The version of the cassette file format.
+EMAIL_REGEX : `re.Pattern`
+    Regular expression matching the email addresses to pseudonymize.
+PSEUDONYM_DOMAIN : `str`
+    The domain of the pseudonymized email addresses.
+PSEUDONYM_PREFIX : `str`
+    The prefix of the pseudonyms.
+REMOVED_BODY_KEYS : `frozenset`
+    The JSON keys of the response bodies that are not saved.
+REPLAYED_RESPONSE_HEADERS : `frozenset`
+    The lower case names of the response headers that are saved, the only
+    ones the clients need. Other headers, such as cookies or the account
+    headers of Atlassian, are not saved.
+SENSITIVE_PARAM_REGEX : `re.Pattern`
+    Regular expression matching the query parameters whose values are
+    replaced in the saved URLs.
+"""
+
+import base64
+import contextlib
+import hashlib
+import json
+import pathlib
+import re
+import threading
+import time
+import urllib.parse
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import requests
+
+ACCOUNT_KEYS = frozenset(["accountId", "email", "emailAddress"])
+CASSETTE_VERSION = 1
+EMAIL_REGEX = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PSEUDONYM_DOMAIN = "example.invalid"
+PSEUDONYM_PREFIX = "redacted-"
+REMOVED_BODY_KEYS = frozenset(["avatarUrls", "locale", "timeZone"])
+REPLAYED_RESPONSE_HEADERS = frozenset(
+    ["content-type", "link", "location", "retry-after"]
+)
+SENSITIVE_PARAM_REGEX = re.compile(
+    r"token|key|password|secret|signature|auth", re.IGNORECASE
+)
+
+__all__ = ["CASSETTE_VERSION", "Cassette", "recording", "replaying"]
+
+
+def sanitize_url(url: str) -> str:
+    """Remove the credentials from a URL.
+
+    Parameters
+    ----------
+    url : `str`
+        The request URL.
+
+    Returns
+    -------
+    `str`
+        The URL without user information and with the values of sensitive
+        query parameters replaced.
+    """
+    parts = urllib.parse.urlsplit(url)
+    netloc = parts.netloc.rpartition("@")[2]
+    query = urllib.parse.urlencode(
+        [
+            (name, "REDACTED" if SENSITIVE_PARAM_REGEX.search(name) else value)
+            for name, value in urllib.parse.parse_qsl(
+                parts.query, keep_blank_values=True
+            )
+        ]
+    )
+    return urllib.parse.urlunsplit(
+        (parts.scheme, netloc, parts.path, query, parts.fragment)
+    )
+
+
+def pseudonymize(value: str) -> str:
+    """Replace an email address or account Id by a stable pseudonym.
+
+    Parameters
+    ----------
+    value : `str`
+        The email address or account Id.
+
+    Returns
+    -------
+    `str`
+        The pseudonym, the same for every occurrence of the value. Values
+        that already are pseudonyms are returned as they are.
+    """
+    if value.startswith(PSEUDONYM_PREFIX):
+        return value
+    pseudonym = PSEUDONYM_PREFIX + hashlib.sha256(value.encode()).hexdigest()[:12]
+    return f"{pseudonym}@{PSEUDONYM_DOMAIN}" if "@" in value else pseudonym
+
+
+def filter_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    """Keep the response headers needed to replay a response.
+
+    Parameters
+    ----------
+    headers : `collections.abc.Mapping`
+        The response headers.
+
+    Returns
+    -------
+    `dict`
+        The headers in `REPLAYED_RESPONSE_HEADERS`.
+    """
+    return {
+        name: value
+        for name, value in headers.items()
+        if name.lower() in REPLAYED_RESPONSE_HEADERS
+    }
+
+
+def scrub_text(text: str, account_values: set[str]) -> str:
+    """Pseudonymize the account values and email addresses in a text.
+
+    Parameters
+    ----------
+    text : `str`
+        The text to scrub.
+    account_values : `set`
+        The account Ids and email addresses already seen.
+
+    Returns
+    -------
+    `str`
+        The scrubbed text.
+    """
+    for value in account_values:
+        if value in text:
+            text = text.replace(value, pseudonymize(value))
+    return EMAIL_REGEX.sub(lambda match: pseudonymize(match.group()), text)
+
+
+def collect_account_values(data: Any, account_values: set[str]) -> None:
+    """Collect the account Ids and email addresses of decoded JSON.
+
+    Parameters
+    ----------
+    data : `Any`
+        The decoded JSON.
+    account_values : `set`
+        The set to add the values to.
+    """
+    if isinstance(data, dict):
+        for name, value in data.items():
+            if name in ACCOUNT_KEYS and isinstance(value, str) and value:
+                account_values.add(value)
+            else:
+                collect_account_values(value, account_values)
+    elif isinstance(data, list):
+        for item in data:
+            collect_account_values(item, account_values)
+
+
+def scrub_data(data: Any, account_values: set[str]) -> Any:
+    """Scrub decoded JSON.
+
+    Parameters
+    ----------
+    data : `Any`
+        The decoded JSON.
+    account_values : `set`
+        The account Ids and email addresses to pseudonymize.
+
+    Returns
+    -------
+    `Any`
+        The JSON without the removed keys and with the account values and
+        email addresses pseudonymized.
+    """
+    if isinstance(data, dict):
+        return {
+            name: scrub_data(value, account_values)
+            for name, value in data.items()
+            if name not in REMOVED_BODY_KEYS
+        }
+    if isinstance(data, list):
+        return [scrub_data(item, account_values) for item in data]
+    if isinstance(data, str):
+        return scrub_text(data, account_values)
+    return data
+
+
+def scrub_body(content: bytes, account_values: set[str]) -> bytes:
+    """Remove the personal data from a response body.
+
+    Parameters
+    ----------
+    content : `bytes`
+        The response body.
+    account_values : `set`
+        The account Ids and email addresses seen so far, updated with the
+        ones of a JSON body.
+
+    Returns
+    -------
+    `bytes`
+        The scrubbed body. Binary bodies are returned as they are.
+    """
+    try:
+        text = content.decode()
+    except UnicodeDecodeError:
+        return content
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return scrub_text(text, account_values).encode()
+    collect_account_values(data, account_values)
+    return json.dumps(scrub_data(data, account_values)).encode()
+
+
+def get_body_hash(body: str | bytes | None) -> str:
+    """Create the hash used to match request bodies.
+
+    Parameters
+    ----------
+    body : `str`, `bytes` or None
+        The request body.
+
+    Returns
+    -------
+    `str`
+        The hex digest of the body.
+    """
+    if isinstance(body, str):
+        body = body.encode()
+    return hashlib.sha256(body or b"").hexdigest()
+
+
+def encode_body(content: bytes) -> dict[str, str]:
+    """Encode a response body for the cassette.
+
+    Parameters
+    ----------
+    content : `bytes`
+        The response body.
+
+    Returns
+    -------
+    `dict`
+        The body as text when it is UTF-8, otherwise base64 encoded.
+    """
+    try:
+        return {"text": content.decode()}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode()}
+
+
+def decode_body(body: dict[str, str]) -> bytes:
+    """Decode a response body from the cassette.
+
+    Parameters
+    ----------
+    body : `dict`
+        The encoded body.
+
+    Returns
+    -------
+    `bytes`
+        The response body.
+    """
+    if "base64" in body:
+        return base64.b64decode(body["base64"])
+    return body["text"].encode()
+
+
+class Cassette:
+    """Collection of recorded HTTP interactions.
+
+    Interactions are matched on method and sanitized URL. When several
+    interactions match, the first unused one with the same request body is
+    served, falling back to the first unused one, so repeated requests are
+    replayed in the recorded order. The account values pseudonymized in the
+    recorded responses are also pseudonymized in the later recorded URLs,
+    which the replayed scripts build from the pseudonyms.
+
+    Parameters
+    ----------
+    interactions : `list`, optional
+        The recorded interactions.
+    """
+
+    def __init__(self, interactions: list[dict[str, Any]] | None = None) -> None:
+        self.interactions = interactions if interactions is not None else []
+        self.used: set[int] = set()
+        self.account_values: set[str] = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def read(cls, cassette_file: pathlib.Path) -> "Cassette":
+        """Read a cassette file.
+
+        Parameters
+        ----------
+        cassette_file : `pathlib.Path`
+            The cassette file.
+
+        Returns
+        -------
+        `Cassette`
+            The recorded interactions.
+
+        Raises
+        ------
+        ValueError
+            If the cassette has an unsupported format version.
+        """
+        with open(cassette_file.expanduser()) as cfile:
+            content = json.load(cfile)
+        if content.get("version") != CASSETTE_VERSION:
+            raise ValueError(
+                f"Unsupported cassette version {content.get('version')} "
+                f"in {cassette_file}."
+            )
+        return cls(content["interactions"])
+
+    def write(self, cassette_file: pathlib.Path) -> None:
+        """Write the cassette file.
+
+        Parameters
+        ----------
+        cassette_file : `pathlib.Path`
+            The cassette file.
+        """
+        with open(cassette_file.expanduser(), "w") as cfile:
+            json.dump(
+                {"version": CASSETTE_VERSION, "interactions": self.interactions},
+                cfile,
+                indent=1,
+            )
+
+    def add(
+        self, request: "requests.PreparedRequest", response: "requests.Response"
+    ) -> None:
+        """Add an interaction.
+
+        Parameters
+        ----------
+        request : `requests.PreparedRequest`
+            The sent request.
+        response : `requests.Response`
+            The received response.
+        """
+        with self.lock:
+            url = scrub_text(sanitize_url(request.url or ""), self.account_values)
+            body = scrub_body(response.content, self.account_values)
+            self.interactions.append(
+                {
+                    "request": {
+                        "method": request.method,
+                        "url": url,
+                        "body_sha256": get_body_hash(request.body),
+                    },
+                    "response": {
+                        "status": response.status_code,
+                        "reason": response.reason,
+                        "headers": filter_headers(response.headers),
+                        "body": encode_body(body),
+                    },
+                }
+            )
+
+    def find(self, request: "requests.PreparedRequest") -> dict[str, Any]:
+        """Find the recorded response to a request.
+
+        Parameters
+        ----------
+        request : `requests.PreparedRequest`
+            The request to answer.
+
+        Returns
+        -------
+        `dict`
+            The recorded response.
+
+        Raises
+        ------
+        requests.ConnectionError
+            If the request was not recorded.
+        """
+        import requests
+
+        url = scrub_text(sanitize_url(request.url or ""), set())
+        body_hash = get_body_hash(request.body)
+        with self.lock:
+            candidates = [
+                i
+                for i, interaction in enumerate(self.interactions)
+                if i not in self.used
+                and interaction["request"]["method"] == request.method
+                and interaction["request"]["url"] == url
+            ]
+            same_body = [
+                i
+                for i in candidates
+                if self.interactions[i]["request"]["body_sha256"] == body_hash
+            ]
+            if not candidates:
+                raise requests.ConnectionError(
+                    f"No recorded response for {request.method} {url}.",
+                    request=request,
+                )
+            index = (same_body or candidates)[0]
+            self.used.add(index)
+        return self.interactions[index]["response"]
+
+
+def create_response(
+    request: "requests.PreparedRequest", recorded: dict[str, Any]
+) -> "requests.Response":
+    """Create a response from a recorded one.
+
+    Parameters
+    ----------
+    request : `requests.PreparedRequest`
+        The request being answered.
+    recorded : `dict`
+        The recorded response.
+
+    Returns
+    -------
+    `requests.Response`
+        The response.
+    """
+    import requests
+    import requests.structures
+    import requests.utils
+
+    response = requests.Response()
+    response.status_code = recorded["status"]
+    response.reason = recorded["reason"]
+    response.headers = requests.structures.CaseInsensitiveDict(recorded["headers"])
+    response._content = decode_body(recorded["body"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url or ""
+    response.request = request
+    return response
+
+
+@contextlib.contextmanager
+def recording(cassette_file: pathlib.Path) -> Iterator[Cassette]:
+    """Record the HTTP responses received inside the context.
+
+    The cassette is written when the context exits, even on errors.
+
+    Parameters
+    ----------
+    cassette_file : `pathlib.Path`
+        The cassette file to write.
+
+    Yields
+    ------
+    `Cassette`
+        The recorded interactions.
+    """
+    import requests.adapters
+
+    cassette = Cassette()
+    send = requests.adapters.HTTPAdapter.send
+
+    def recorded_send(
+        adapter: requests.adapters.HTTPAdapter,
+        request: requests.PreparedRequest,
+        *args: Any,
+        **kwargs: Any,
+    ) -> requests.Response:
+        response = send(adapter, request, *args, **kwargs)
+        cassette.add(request, response)
+        return response
+
+    setattr(requests.adapters.HTTPAdapter, "send", recorded_send)
+    try:
+        yield cassette
+    finally:
+        setattr(requests.adapters.HTTPAdapter, "send", send)
+        cassette.write(cassette_file)
+
+
+@contextlib.contextmanager
+def replaying(cassette_file: pathlib.Path, latency: float = 0.0) -> Iterator[Cassette]:
+    """Serve the HTTP requests sent inside the context from a cassette.
+
+    Parameters
+    ----------
+    cassette_file : `pathlib.Path`
+        The cassette file to read.
+    latency : `float`, optional
+        The delay, in seconds, added to every response.
+
+    Yields
+    ------
+    `Cassette`
+        The recorded interactions.
+    """
+    import requests.adapters
+
+    cassette = Cassette.read(cassette_file)
+    send = requests.adapters.HTTPAdapter.send
+
+    def replayed_send(
+        adapter: requests.adapters.HTTPAdapter,
+        request: requests.PreparedRequest,
+        *args: Any,
+        **kwargs: Any,
+    ) -> requests.Response:
+        recorded = cassette.find(request)
+        if latency > 0:
+            time.sleep(latency)
+        return create_response(request, recorded)
+
+    setattr(requests.adapters.HTTPAdapter, "send", replayed_send)
+    try:
+        yield cassette
+    finally:
+        setattr(requests.adapters.HTTPAdapter, "send", send)
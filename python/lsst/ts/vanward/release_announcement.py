@@ -1,6 +1,8 @@
 import argparse
 from datetime import datetime
 
+from . import instrumentation
+
 __all__ = ["runner"]
 
 
@@ -120,6 +122,4 @@ def runner() -> None:
     )
     parser.add_argument("upgrade_cycle", help="The cycle number for the deployment.")
 
-    args = parser.parse_args()
-
-    main(args)
+    instrumentation.run(parser, main)
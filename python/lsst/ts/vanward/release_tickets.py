@@ -7,48 +7,200 @@ CLOSED_TICKET_STATUS : `list`
 """
 
 import argparse
+import datetime
 import pathlib
+import time
+from typing import TYPE_CHECKING
 
-from jira import JIRA
+from . import instrumentation, jira_mirror, ticket_helpers
 
-from . import ticket_helpers
+if TYPE_CHECKING:
+    from jira import JIRA
 
 CLOSED_TICKET_STATUS = ["Done", "Won't Fix", "Invalid", "Resolved"]
 
 __all__ = ["runner"]
 
 
-def main(opts: argparse.Namespace) -> None:
+def is_xml_done(ticket: ticket_helpers.TicketInfo) -> bool:
+    """Check if the XML work of a linked ticket is finished.
+
+    Parameters
+    ----------
+    ticket : `ticket_helpers.TicketInfo`
+        The linked ticket to check.
+
+    Returns
+    -------
+    `bool`
+        True if the ticket is closed or carries the xmldone label.
     """
+    if f"{ticket.status}" not in CLOSED_TICKET_STATUS:
+        return "xmldone" in ticket.labels
+    return True
+
+
+def get_release_graph(
+    mirror: jira_mirror.JiraMirror, opts: argparse.Namespace
+) -> ticket_helpers.TicketGraph:
+    """Get the release tickets and their linked tickets from the mirror.
+
     Parameters
     ----------
+    mirror : `jira_mirror.JiraMirror`
+        The mirror holding the release tickets.
     opts : `argparse.Namespace`
         The script command-line arguments and options.
+
+    Returns
+    -------
+    `ticket_helpers.TicketGraph`
+        The release tickets and the tickets linked to them.
+    """
+    return mirror.get_release_graph(
+        f"ts_xml {opts.xml_version}", **ticket_helpers.get_link_options(opts)
+    )
+
+
+def get_release_rows(graph: ticket_helpers.TicketGraph) -> list[str]:
+    """Create the report rows for the release tickets and linked tickets.
+
+    Parameters
+    ----------
+    graph : `ticket_helpers.TicketGraph`
+        The release tickets and the tickets linked to them.
+
+    Returns
+    -------
+    `list`
+        The report rows in display order.
     """
-    jira_auth = ticket_helpers.get_jira_credentials(opts.token_file)
-    js = JIRA(server=ticket_helpers.JIRA_SERVER, basic_auth=jira_auth)
 
+    def add_linked_rows(key: str, indent: str) -> None:
+        for ticket in graph.get_children(key):
+            if is_xml_done(ticket):
+                donechar = "\u2713"
+            else:
+                donechar = "\u2717"
+            rows.append(
+                f"{indent}* {ticket} ({ticket.assignee}): {ticket.status} ({donechar})"
+            )
+            add_linked_rows(ticket.key, indent + "  ")
+
+    rows = []
+    for key in graph.roots:
+        issue = graph.tickets[key]
+        rows.append(f"{issue.key} ({issue.assignee}): {issue.status}")
+        add_linked_rows(key, " ")
+    return rows
+
+
+def get_done_counts(graph: ticket_helpers.TicketGraph) -> tuple[int, int]:
+    """Count the done and not done linked tickets of a release.
+
+    Parameters
+    ----------
+    graph : `ticket_helpers.TicketGraph`
+        The release tickets and the tickets linked to them.
+
+    Returns
+    -------
+    `tuple`
+        The number of done and not done linked tickets.
+    """
+    keys = graph.get_linked_keys()
+    done = sum(is_xml_done(graph.tickets[key]) for key in keys)
+    return done, len(keys) - done
+
+
+def print_release_tickets(graph: ticket_helpers.TicketGraph) -> None:
+    """Print the release tickets and the state of their linked tickets.
+
+    Parameters
+    ----------
+    graph : `ticket_helpers.TicketGraph`
+        The release tickets and the tickets linked to them.
+    """
+    print(f"Number of issues: {len(graph.roots)}")
+    for row in get_release_rows(graph):
+        print(row)
+
+
+def print_done_counts(graph: ticket_helpers.TicketGraph) -> None:
+    """Print the summary of done and not done linked tickets.
+
+    Parameters
+    ----------
+    graph : `ticket_helpers.TicketGraph`
+        The release tickets and the tickets linked to them.
+    """
+    done, not_done = get_done_counts(graph)
+    print(f"Done: {done}, Not done: {not_done}")
+
+
+def watch_release_tickets(
+    js: "JIRA", mirror: jira_mirror.JiraMirror, opts: argparse.Namespace
+) -> None:
+    """Poll Jira for updated tickets and print the rows that changed.
+
+    Parameters
+    ----------
+    js : `JIRA`
+        The Jira server instance, kept alive between polls.
+    mirror : `jira_mirror.JiraMirror`
+        The mirror holding the release tickets.
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
     xml_version = f"ts_xml {opts.xml_version}"
+    graph = get_release_graph(mirror, opts)
+    rows = get_release_rows(graph)
+    print_done_counts(graph)
+    try:
+        while True:
+            time.sleep(opts.watch)
+            if not mirror.sync_release(
+                js, xml_version, **ticket_helpers.get_link_options(opts)
+            ):
+                continue
+            graph = get_release_graph(mirror, opts)
+            new_rows = get_release_rows(graph)
+            changed_rows = [row for row in new_rows if row not in rows]
+            removed_rows = [row for row in rows if row not in new_rows]
+            rows = new_rows
+            if not changed_rows and not removed_rows:
+                continue
+            print()
+            print(f"Updated at {datetime.datetime.now().strftime('%H:%M:%S')}")
+            for row in changed_rows:
+                print(row)
+            for row in removed_rows:
+                print(f"Removed: {row.lstrip(' *')}")
+            print_done_counts(graph)
+    except KeyboardInterrupt:
+        pass
 
-    query = f'project = CAP AND fixVersion = "{xml_version}"'
-    issues = js.search_issues(query)
-    print(f"Number of issues: {len(issues)}")
-    for issue in issues:
-        print(f"{issue.key} ({issue.fields.assignee}): {issue.fields.status}")
-        more_tickets = ticket_helpers.get_linked_tickets(issue, js)
-        if more_tickets:
-            for ticket in more_tickets:
-                if f"{ticket.fields.status}" not in CLOSED_TICKET_STATUS:
-                    xmldone = "xmldone" in ticket.fields.labels
-                else:
-                    xmldone = True
-                if xmldone:
-                    donechar = "\u2713"
-                else:
-                    donechar = "\u2717"
-                print(
-                    f" * {ticket} ({ticket.fields.assignee}): {ticket.fields.status} ({donechar})"
-                )
+
+def main(opts: argparse.Namespace) -> None:
+    """
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+    """
+    xml_version = f"ts_xml {opts.xml_version}"
+
+    # Without a mirror database, a throwaway one is filled from Jira.
+    db_file = jira_mirror.get_mirror_file(opts.jira_db)
+    with jira_mirror.JiraMirror(db_file) as mirror:
+        if opts.jira_db is None or opts.sync or opts.watch is not None:
+            js = ticket_helpers.get_jira_client(opts.token_file)
+            mirror.sync_release(
+                js, xml_version, **ticket_helpers.get_link_options(opts)
+            )
+        print_release_tickets(get_release_graph(mirror, opts))
+        if opts.watch is not None:
+            watch_release_tickets(js, mirror, opts)
 
 
 def runner() -> None:
@@ -63,9 +215,34 @@ def runner() -> None:
     )
 
     parser.add_argument(
-        "xml_version", type=str, help="Provide the XML version to check."
+        "--jira-db",
+        type=pathlib.Path,
+        nargs="?",
+        const=jira_mirror.get_default_mirror_file,
+        default=None,
+        help="Answer from a local Jira mirror database. Without a file, "
+        "the default mirror in the vanward cache directory is used.",
+    )
+
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Incrementally synchronize the Jira mirror before reporting.",
+    )
+
+    ticket_helpers.add_link_arguments(parser)
+
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=None,
+        metavar="INTERVAL",
+        help="Keep polling Jira every INTERVAL seconds and print the tickets "
+        "that changed.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "xml_version", type=str, help="Provide the XML version to check."
+    )
 
-    main(args)
+    instrumentation.run(parser, main)
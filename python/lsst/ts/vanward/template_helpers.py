@@ -0,0 +1,68 @@
+"""Template rendering helpers.
+
+Attributes
+----------
+BYTECODE_CACHE_DIR : `str`
+    The name of the compiled template cache within the cache directory.
+TEMPLATES_DIR : `pathlib.Path`
+    The directory containing the package templates.
+"""
+
+import functools
+import pathlib
+from typing import TYPE_CHECKING, Any
+
+from . import cache_helpers
+
+if TYPE_CHECKING:
+    import jinja2
+
+BYTECODE_CACHE_DIR = "jinja"
+TEMPLATES_DIR = pathlib.Path(__file__).resolve().parent / "templates"
+
+__all__ = [
+    "BYTECODE_CACHE_DIR",
+    "TEMPLATES_DIR",
+    "get_environment",
+    "render_template",
+]
+
+
+@functools.cache
+def get_environment() -> "jinja2.Environment":
+    """Get the template environment shared by all renderers.
+
+    The environment is created once per process and stores the compiled
+    templates in the cache directory, so later runs skip the compilation.
+
+    Returns
+    -------
+    `jinja2.Environment`
+        The template environment.
+    """
+    import jinja2
+
+    bytecode_dir = cache_helpers.get_cache_dir() / BYTECODE_CACHE_DIR
+    bytecode_dir.mkdir(exist_ok=True)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(str(bytecode_dir)),
+    )
+
+
+def render_template(template_name: str, context: dict[str, Any]) -> str:
+    """Render a package template.
+
+    Parameters
+    ----------
+    template_name : `str`
+        The file name of the template.
+    context : `dict`
+        The template variables.
+
+    Returns
+    -------
+    `str`
+        The rendered template.
+    """
+    return get_environment().get_template(template_name).render(context)
@@ -2,25 +2,344 @@
 
 Attributes
 ----------
+BACKOFF_FACTOR : `float`
+    The exponential backoff factor in seconds between request retries.
+DEFAULT_TIMEOUT : `tuple`
+    The default connect and read timeouts in seconds for server requests.
 JIRA_SERVER : `str`
     The URL for the RubinObs project Jira server.
+JIRA_SERVER_ENV : `str`
+    The environment variable that overrides the Jira server URL, e.g. to use
+    a local fake Jira server.
+KEY_BATCH_SIZE : `int`
+    The maximum number of ticket keys to place in a single JQL search.
+MAX_RETRIES : `int`
+    The maximum number of retries for a failed server request.
+POOL_SIZE : `int`
+    The number of pooled connections kept alive per host.
+RETRY_STATUS_CODES : `list`
+    The HTTP status codes that cause a server request to be retried.
+SKIP_LINK_TYPES : `list`
+    The link types that are not followed for linked tickets.
+TICKET_FIELDS : `list`
+    The Jira fields retrieved for ticket summaries.
+USER_CACHE_FILE : `str`
+    The name of the Jira user Id cache within the cache directory.
+USER_CACHE_TTL : `float`
+    The number of seconds a cached Jira user Id stays valid.
 """
 
+import argparse
+import concurrent.futures
+import functools
+import os
 import pathlib
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 
-import jira
-import jira.resources
+from . import cache_helpers
+
+# The client libraries are slow to import, so they are only imported by the
+# functions that need them at runtime.
+if TYPE_CHECKING:
+    import atlassian
+    import jira
+    import jira.resources
+    import requests
+    import urllib3.util
 
 __all__ = [
+    "add_link_arguments",
+    "create_confluence_client",
+    "create_jira_client",
+    "create_session",
+    "get_client_session",
+    "get_confluence_client",
+    "get_jira_client",
     "get_jira_credentials",
+    "get_jira_server",
+    "get_link_options",
+    "get_link_graph",
     "get_link_key",
     "get_linked_tickets",
+    "get_tickets",
     "get_user_ids",
+    "resolve_user_ids",
+    "search_keys",
+    "search_tickets",
+    "BACKOFF_FACTOR",
+    "DEFAULT_TIMEOUT",
     "JIRA_SERVER",
+    "JIRA_SERVER_ENV",
+    "KEY_BATCH_SIZE",
+    "MAX_RETRIES",
+    "POOL_SIZE",
+    "RETRY_STATUS_CODES",
+    "SKIP_LINK_TYPES",
+    "TICKET_FIELDS",
+    "TicketGraph",
+    "TicketInfo",
+    "TicketLink",
+    "USER_CACHE_FILE",
+    "USER_CACHE_TTL",
 ]
 
 
 JIRA_SERVER = "https://rubinobs.atlassian.net/"
+JIRA_SERVER_ENV = "VANWARD_JIRA_SERVER"
+BACKOFF_FACTOR = 1.0
+DEFAULT_TIMEOUT = (10.0, 60.0)
+MAX_RETRIES = 5
+POOL_SIZE = 16
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+USER_CACHE_FILE = "jira_users.json"
+USER_CACHE_TTL = 30 * 24 * 3600
+KEY_BATCH_SIZE = 100
+SKIP_LINK_TYPES = ["is triggering"]
+TICKET_FIELDS = [
+    "summary",
+    "status",
+    "assignee",
+    "labels",
+    "fixVersions",
+    "issuelinks",
+    "updated",
+]
+
+
+@dataclass
+class TicketLink:
+    """Holder for a Jira issue link as seen from one of its tickets."""
+
+    id: str
+    key: str
+    type_name: str
+    inward: str
+    outward: str
+    direction: str
+
+    def matches(self, link_types: list[str]) -> bool:
+        """Check if the link is of one of the given types.
+
+        Parameters
+        ----------
+        link_types : `list`
+            Link type names or inward/outward link descriptions.
+
+        Returns
+        -------
+        `bool`
+            True if the name or one of the descriptions is in the list.
+        """
+        return bool({self.type_name, self.inward, self.outward} & set(link_types))
+
+    @classmethod
+    def from_issue_link(cls, link: "jira.resources.IssueLink") -> "TicketLink":
+        """Create a link holder from a Jira issue link.
+
+        Parameters
+        ----------
+        link : `jira.resources.IssueLink`
+            The Jira issue link to convert.
+
+        Returns
+        -------
+        `TicketLink`
+            The link holder.
+        """
+        direction = "inward" if hasattr(link, "inwardIssue") else "outward"
+        return cls(
+            id=str(link.id),
+            key=get_link_key(link),
+            type_name=link.type.name,
+            inward=link.type.inward,
+            outward=link.type.outward,
+            direction=direction,
+        )
+
+
+@dataclass
+class TicketInfo:
+    """Holder for the summary information of a Jira ticket."""
+
+    key: str
+    summary: str
+    status: str
+    assignee: str | None = None
+    labels: list[str] = field(default_factory=list)
+    fix_versions: list[str] = field(default_factory=list)
+    links: list[TicketLink] = field(default_factory=list)
+    updated: str = ""
+
+    def __str__(self) -> str:
+        return self.key
+
+    @classmethod
+    def from_issue(cls, issue: "jira.resources.Issue") -> "TicketInfo":
+        """Create a ticket holder from a Jira issue.
+
+        Parameters
+        ----------
+        issue : `jira.resources.Issue`
+            The Jira issue to convert.
+
+        Returns
+        -------
+        `TicketInfo`
+            The ticket holder.
+        """
+        fields = issue.fields
+        assignee = getattr(fields, "assignee", None)
+        return cls(
+            key=issue.key,
+            summary=fields.summary,
+            status=f"{fields.status}",
+            assignee=None if assignee is None else f"{assignee}",
+            labels=list(getattr(fields, "labels", [])),
+            fix_versions=[v.name for v in getattr(fields, "fixVersions", [])],
+            links=[
+                TicketLink.from_issue_link(link)
+                for link in getattr(fields, "issuelinks", [])
+            ],
+            updated=getattr(fields, "updated", ""),
+        )
+
+    def linked_keys(
+        self,
+        skip_link_types: list[str] = SKIP_LINK_TYPES,
+        follow_link_types: list[str] | None = None,
+    ) -> list[str]:
+        """Get the keys of the linked tickets.
+
+        Parameters
+        ----------
+        skip_link_types : `list`, optional
+            The link types to ignore.
+        follow_link_types : `list` or None, optional
+            If given, only follow these link types.
+
+        Returns
+        -------
+        `list`
+            The linked ticket keys in link order.
+        """
+        return [
+            link.key
+            for link in self.links
+            if not link.matches(skip_link_types)
+            and (follow_link_types is None or link.matches(follow_link_types))
+        ]
+
+
+@dataclass
+class TicketGraph:
+    """Holder for tickets reached through links and the links between them.
+
+    The graph is built breadth-first, so each ticket has the depth at which
+    it was first reached. The root tickets have a depth of zero.
+    """
+
+    roots: list[str] = field(default_factory=list)
+    tickets: dict[str, TicketInfo] = field(default_factory=dict)
+    depths: dict[str, int] = field(default_factory=dict)
+    edges: dict[str, list[str]] = field(default_factory=dict)
+
+    def get_children(self, key: str) -> list[TicketInfo]:
+        """Get the tickets first reached from a given ticket.
+
+        Parameters
+        ----------
+        key : `str`
+            The Jira key of the ticket.
+
+        Returns
+        -------
+        `list`
+            The tickets one level deeper that are linked to the ticket.
+        """
+        depth = self.depths[key] + 1
+        return [
+            self.tickets[child]
+            for child in self.edges.get(key, [])
+            if child in self.tickets and self.depths[child] == depth
+        ]
+
+    def get_linked_keys(self) -> list[str]:
+        """Get the keys of all tickets reached from the root tickets.
+
+        Returns
+        -------
+        `list`
+            The retrieved ticket keys in breadth-first order, without the
+            roots.
+        """
+        return [
+            key
+            for key, depth in self.depths.items()
+            if depth > 0 and key in self.tickets
+        ]
+
+    def get_keys(self) -> list[str]:
+        """Get the keys of all tickets in the graph.
+
+        Returns
+        -------
+        `list`
+            The retrieved ticket keys in breadth-first order.
+        """
+        return [key for key in self.depths if key in self.tickets]
+
+
+def get_link_graph(
+    roots: list[TicketInfo],
+    fetch: Callable[[list[str]], list[TicketInfo]],
+    depth: int = 1,
+    skip_link_types: list[str] = SKIP_LINK_TYPES,
+    follow_link_types: list[str] | None = None,
+) -> TicketGraph:
+    """Follow ticket links breadth-first, fetching one level at a time.
+
+    Parameters
+    ----------
+    roots : `list`
+        The tickets to start from.
+    fetch : `Callable`
+        Function that retrieves a list of tickets by key in one batch.
+    depth : `int`, optional
+        The number of link levels to follow.
+    skip_link_types : `list`, optional
+        The link types to ignore.
+    follow_link_types : `list` or None, optional
+        If given, only follow these link types.
+
+    Returns
+    -------
+    `TicketGraph`
+        The tickets reached and the links between them.
+    """
+    graph = TicketGraph()
+    for ticket in roots:
+        graph.roots.append(ticket.key)
+        graph.tickets[ticket.key] = ticket
+        graph.depths[ticket.key] = 0
+    level = roots
+    for level_depth in range(1, depth + 1):
+        next_keys = []
+        for ticket in level:
+            linked_keys = ticket.linked_keys(skip_link_types, follow_link_types)
+            graph.edges[ticket.key] = linked_keys
+            for key in linked_keys:
+                if key not in graph.depths:
+                    graph.depths[key] = level_depth
+                    next_keys.append(key)
+        if not next_keys:
+            break
+        level = fetch(next_keys)
+        for ticket in level:
+            graph.tickets[ticket.key] = ticket
+    return graph
 
 
 def get_jira_credentials(token_file: pathlib.Path) -> tuple[str, str]:
@@ -42,7 +361,311 @@ def get_jira_credentials(token_file: pathlib.Path) -> tuple[str, str]:
     return (uname, pwd)
 
 
-def get_link_key(ticket_link: jira.resources.IssueLink) -> str:
+def get_jira_server() -> str:
+    """Get the URL of the Jira server to use.
+
+    Returns
+    -------
+    `str`
+        The URL from the override environment variable, if set, or the
+        project Jira server.
+    """
+    return os.environ.get(JIRA_SERVER_ENV, JIRA_SERVER)
+
+
+def add_link_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options controlling how ticket links are followed.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script argument parser.
+    """
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=1,
+        help="The number of ticket link levels to follow. Default: 1.",
+    )
+
+    parser.add_argument(
+        "--follow-link-type",
+        action="append",
+        default=None,
+        help="Only follow this link type (name or description). "
+        "Can be given multiple times.",
+    )
+
+    parser.add_argument(
+        "--skip-link-type",
+        action="append",
+        default=None,
+        help="Do not follow this link type (name or description). "
+        f"Can be given multiple times. Default: {', '.join(SKIP_LINK_TYPES)}.",
+    )
+
+
+def get_link_options(opts: argparse.Namespace) -> dict[str, Any]:
+    """Get the link following options for a link graph.
+
+    Parameters
+    ----------
+    opts : `argparse.Namespace`
+        The script command-line arguments and options.
+
+    Returns
+    -------
+    `dict`
+        The depth, skip_link_types and follow_link_types keyword arguments.
+    """
+    skip_link_types = opts.skip_link_type
+    if skip_link_types is None:
+        skip_link_types = SKIP_LINK_TYPES
+    return dict(
+        depth=opts.depth,
+        skip_link_types=skip_link_types,
+        follow_link_types=opts.follow_link_type,
+    )
+
+
+@functools.cache
+def get_retry_class() -> type["urllib3.util.Retry"]:
+    """Get the retry policy used by the server sessions.
+
+    The policy also retries any request rejected with HTTP 429. Requests that
+    were rate limited were never processed by the server, so it is safe to
+    retry them even if they are not idempotent.
+
+    Returns
+    -------
+    `type`
+        The retry policy class.
+    """
+    import urllib3.util
+
+    class RateLimitRetry(urllib3.util.Retry):
+        def is_retry(
+            self, method: str, status_code: int, has_retry_after: bool = False
+        ) -> bool:
+            if status_code == 429:
+                return bool(self.total)
+            return super().is_retry(method, status_code, has_retry_after)
+
+    return RateLimitRetry
+
+
+def create_session(pool_size: int = POOL_SIZE) -> "requests.Session":
+    """Create an HTTP session with a connection pool and a retry policy.
+
+    Failed requests are retried with exponential backoff, honoring the
+    Retry-After header sent with HTTP 429 and 503 responses.
+
+    Parameters
+    ----------
+    pool_size : `int`, optional
+        The number of connections kept alive per host.
+
+    Returns
+    -------
+    `requests.Session`
+        The configured session.
+    """
+    import requests
+
+    session = requests.Session()
+    mount_pooled_adapter(session, pool_size)
+    return session
+
+
+def mount_pooled_adapter(session: "requests.Session", pool_size: int) -> None:
+    """Mount a pooled and retrying HTTP adapter on a session.
+
+    Parameters
+    ----------
+    session : `requests.Session`
+        The session to configure.
+    pool_size : `int`
+        The number of connections kept alive per host.
+    """
+    import requests.adapters
+
+    retry = get_retry_class()(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def get_jira_client(
+    token_file: pathlib.Path,
+    pool_size: int = POOL_SIZE,
+    timeout: tuple[float, float] = DEFAULT_TIMEOUT,
+) -> "jira.client.JIRA":
+    """Get a Jira client backed by a pooled and retrying session.
+
+    The client is created once per process, server, credentials and set of
+    arguments, so a long running process such as the vanward daemon keeps its
+    connections warm, but picks up a changed server or credentials file.
+
+    Parameters
+    ----------
+    token_file : `pathlib.Path`
+        The full path of the Jira credentials file.
+    pool_size : `int`, optional
+        The number of connections kept alive per host.
+    timeout : `tuple`, optional
+        The connect and read timeouts in seconds.
+
+    Returns
+    -------
+    `jira.client.JIRA`
+        The Jira server instance.
+    """
+    return create_jira_client(
+        get_jira_server(), get_jira_credentials(token_file), pool_size, timeout
+    )
+
+
+@functools.cache
+def create_jira_client(
+    server_url: str,
+    jira_auth: tuple[str, str],
+    pool_size: int,
+    timeout: tuple[float, float],
+) -> "jira.client.JIRA":
+    """Create a Jira client backed by a pooled and retrying session.
+
+    Parameters
+    ----------
+    server_url : `str`
+        The URL of the Jira server.
+    jira_auth : `tuple`
+        The username and password.
+    pool_size : `int`
+        The number of connections kept alive per host.
+    timeout : `tuple`
+        The connect and read timeouts in seconds.
+
+    Returns
+    -------
+    `jira.client.JIRA`
+        The Jira server instance.
+    """
+    import jira
+
+    # Retries are handled by the session adapter, not the Jira client, so the
+    # server information asked for by the constructor is the only request
+    # that is not retried.
+    server = jira.JIRA(
+        server=server_url, basic_auth=jira_auth, max_retries=0, timeout=timeout
+    )
+    mount_pooled_adapter(get_client_session(server), pool_size)
+    return server
+
+
+def get_client_session(server: "jira.client.JIRA") -> "requests.Session":
+    """Get the HTTP session of a Jira client.
+
+    The Jira client neither exposes the session it creates nor accepts one,
+    so this is the only place relying on its private ``_session`` attribute.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+
+    Returns
+    -------
+    `requests.Session`
+        The session of the client.
+
+    Raises
+    ------
+    RuntimeError
+        If the client has no such session, e.g. in another version of the
+        jira package.
+    """
+    import requests
+
+    session = getattr(server, "_session", None)
+    if not isinstance(session, requests.Session):
+        raise RuntimeError("Cannot find the HTTP session of the Jira client.")
+    return session
+
+
+def get_confluence_client(
+    token_file: pathlib.Path,
+    pool_size: int = POOL_SIZE,
+    timeout: tuple[float, float] = DEFAULT_TIMEOUT,
+) -> "atlassian.Confluence":
+    """Get a Confluence client backed by a pooled and retrying session.
+
+    The client is created once per process, server, credentials and set of
+    arguments.
+
+    Parameters
+    ----------
+    token_file : `pathlib.Path`
+        The full path of the Jira credentials file.
+    pool_size : `int`, optional
+        The number of connections kept alive per host.
+    timeout : `tuple`, optional
+        The connect and read timeouts in seconds.
+
+    Returns
+    -------
+    `atlassian.Confluence`
+        The Confluence server instance.
+    """
+    return create_confluence_client(
+        get_jira_server(), get_jira_credentials(token_file), pool_size, timeout
+    )
+
+
+@functools.cache
+def create_confluence_client(
+    server_url: str,
+    confluence_auth: tuple[str, str],
+    pool_size: int,
+    timeout: tuple[float, float],
+) -> "atlassian.Confluence":
+    """Create a Confluence client backed by a pooled and retrying session.
+
+    Parameters
+    ----------
+    server_url : `str`
+        The URL of the Confluence server.
+    confluence_auth : `tuple`
+        The username and password.
+    pool_size : `int`
+        The number of connections kept alive per host.
+    timeout : `tuple`
+        The connect and read timeouts in seconds.
+
+    Returns
+    -------
+    `atlassian.Confluence`
+        The Confluence server instance.
+    """
+    import atlassian
+
+    return atlassian.Confluence(
+        url=server_url,
+        username=confluence_auth[0],
+        password=confluence_auth[1],
+        session=create_session(pool_size),
+        timeout=timeout,
+    )
+
+
+def get_link_key(ticket_link: "jira.resources.IssueLink") -> str:
     """Find the Jira issue key from the link.
 
     Parameters
@@ -64,8 +687,8 @@ def get_link_key(ticket_link: jira.resources.IssueLink) -> str:
 
 
 def get_linked_tickets(
-    issue: jira.resources.Issue, server: jira.client.JIRA
-) -> list[jira.resources.Issue]:
+    issue: "jira.resources.Issue", server: "jira.client.JIRA"
+) -> list["jira.resources.Issue"]:
     """Get ticket links from a specific ticket.
 
     Parameters
@@ -93,7 +716,230 @@ def get_linked_tickets(
     return linked_tickets
 
 
-def get_user_ids(users: str, server: jira.client.JIRA) -> str | list[str]:
+def search_tickets(server: "jira.client.JIRA", query: str) -> list[TicketInfo]:
+    """Get the summary information of all tickets matching a JQL query.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    query : `str`
+        The JQL query to run.
+
+    Returns
+    -------
+    `list`
+        The matching tickets.
+    """
+    issues = server.search_issues(
+        query, maxResults=False, fields=TICKET_FIELDS, use_post=True
+    )
+    return [TicketInfo.from_issue(issue) for issue in issues]
+
+
+def search_key_batches(
+    server: "jira.client.JIRA",
+    keys: list[str],
+    query: str | None = None,
+    fields: list[str] = TICKET_FIELDS,
+) -> list["jira.resources.Issue"]:
+    """Search tickets by key in bounded batches.
+
+    Keys of tickets that no longer exist are left out. A search naming a
+    missing key can be rejected as a whole, as Jira Cloud ignores the query
+    validation option, so a rejected batch is split until the missing keys
+    are isolated and confirmed one by one.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    keys : `list`
+        The Jira keys of the tickets to search.
+    query : `str` or None, optional
+        A JQL query the tickets should also match.
+    fields : `list`, optional
+        The Jira fields to retrieve.
+
+    Returns
+    -------
+    `list`
+        The found issues.
+
+    Raises
+    ------
+    jira.JIRAError
+        If a search fails for another reason than a missing ticket.
+    """
+    import jira
+
+    unique_keys = list(dict.fromkeys(keys))
+    batches = []
+    for start in range(0, len(unique_keys), KEY_BATCH_SIZE):
+        end = start + KEY_BATCH_SIZE
+        batches.append(unique_keys[start:end])
+    issues: list["jira.resources.Issue"] = []
+    while batches:
+        batch = batches.pop()
+        key_clause = f"key in ({', '.join(batch)})"
+        try:
+            issues.extend(
+                server.search_issues(
+                    key_clause if query is None else f"({query}) AND {key_clause}",
+                    maxResults=False,
+                    validate_query=False,
+                    fields=fields,
+                    use_post=True,
+                )
+            )
+        except jira.JIRAError as e:
+            if e.status_code != 400:
+                raise
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                batches += [batch[:middle], batch[middle:]]
+                continue
+            try:
+                server.issue(batch[0], fields="key")
+            except jira.JIRAError as issue_error:
+                if issue_error.status_code == 404:
+                    continue
+            raise
+    return issues
+
+
+def search_keys(
+    server: "jira.client.JIRA", query: str | None, keys: list[str]
+) -> set[str]:
+    """Find which of the given tickets exist and match a JQL query.
+
+    Only the keys are requested, using batched searches. Keys of tickets
+    that no longer exist are left out.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    query : `str` or None
+        The JQL query the tickets should match. If None, only check that the
+        tickets exist.
+    keys : `list`
+        The Jira keys of the tickets to check.
+
+    Returns
+    -------
+    `set`
+        The keys of the matching tickets.
+    """
+    return {issue.key for issue in search_key_batches(server, keys, query, ["key"])}
+
+
+def get_tickets(
+    server: "jira.client.JIRA", keys: list[str], query: str | None = None
+) -> list[TicketInfo]:
+    """Get the summary information of tickets using batched searches.
+
+    Parameters
+    ----------
+    server : `jira.client.JIRA`
+        The Jira server instance.
+    keys : `list`
+        The Jira keys of the tickets to retrieve.
+    query : `str` or None, optional
+        A JQL query the tickets should also match, e.g. to only retrieve the
+        recently updated ones.
+
+    Returns
+    -------
+    `list`
+        The retrieved tickets in the order of the given keys. Tickets that do
+        not exist or do not match the query are left out.
+    """
+    tickets = {
+        issue.key: TicketInfo.from_issue(issue)
+        for issue in search_key_batches(server, keys, query)
+    }
+    return [tickets[key] for key in dict.fromkeys(keys) if key in tickets]
+
+
+def search_user_id(user: str, server: "jira.client.JIRA") -> str:
+    """Search Jira for the Id of a single user.
+
+    Parameters
+    ----------
+    user : `str`
+        The name or email of the user.
+    server : `jira.client.JIRA`
+        The Jira server instance.
+
+    Returns
+    -------
+    `str`
+        The Jira account Id of the user.
+
+    Raises
+    ------
+    ValueError
+        If no Jira user matches the name.
+    """
+    found_users = server.search_users(query=user, maxResults=1)
+    if not found_users:
+        raise ValueError(f"Cannot find Jira user {user}.")
+    return found_users[0].accountId
+
+
+def resolve_user_ids(users: list[str], server: "jira.client.JIRA") -> dict[str, str]:
+    """Resolve Jira user Ids from names using a persistent cache.
+
+    Users that are not cached, or whose cache entry expired, are searched
+    concurrently and stored in the cache.
+
+    Parameters
+    ----------
+    users : `list`
+        The names or emails of the users.
+    server : `jira.client.JIRA`
+        The Jira server instance.
+
+    Returns
+    -------
+    `dict`
+        Mapping of the user names to their Jira account Ids.
+
+    Raises
+    ------
+    ValueError
+        If some users are not found. The users that were found are cached
+        nonetheless.
+    """
+    cache = cache_helpers.read_json_cache(USER_CACHE_FILE)
+    now = time.time()
+    unknown_users = [
+        user
+        for user in dict.fromkeys(users)
+        if user not in cache or now - cache[user]["time"] > USER_CACHE_TTL
+    ]
+    missing_users = []
+    if unknown_users:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(len(unknown_users), POOL_SIZE)
+        ) as executor:
+            futures = {
+                user: executor.submit(search_user_id, user, server)
+                for user in unknown_users
+            }
+            for user, future in futures.items():
+                try:
+                    cache[user] = {"id": future.result(), "time": now}
+                except ValueError:
+                    missing_users.append(user)
+        cache_helpers.write_json_cache(USER_CACHE_FILE, cache)
+    if missing_users:
+        raise ValueError(f"Cannot find Jira users {', '.join(missing_users)}.")
+    return {user: cache[user]["id"] for user in users}
+
+
+def get_user_ids(users: str, server: "jira.client.JIRA") -> list[str]:
     """Get Jira user Ids from names.
 
     Parameters
@@ -106,13 +952,9 @@ def get_user_ids(users: str, server: jira.client.JIRA) -> str | list[str]:
 
     Returns
     -------
-    user_ids : `str` or `list[str]`
-        The resolved Jira Ids for the users.
+    user_ids : `list[str]`
+        The resolved Jira Ids for the users, in the order of their names.
     """
-    ids = server.search_users(query=users)
-    if "," in users:
-        id = [x.accountId for x in ids]
-    else:
-        id = ids[0].accountId
-
-    return id
+    names = [user.strip() for user in users.split(",") if user.strip()]
+    user_ids = resolve_user_ids(names, server)
+    return [user_ids[name] for name in names]
@@ -0,0 +1,264 @@
+"""Helpers for deriving the CSCs affected by an XML release.
+
+The CSCs are found from the interface files changed between two ts_xml
+versions, with a single ``git diff --name-only``. A change to a file shared by
+all CSCs, such as ``SALGenerics.xml``, affects every CSC. The results are
+cached per pair of resolved commits.
+
+Attributes
+----------
+AUTO : `str`
+    The value of the CSC options that derives the CSCs from ts_xml.
+CSC_CACHE_FILE : `str`
+    The name of the cache file of the affected CSCs.
+SAL_INTERFACES_DIR : `str`
+    The directory of the CSC interface files in ts_xml.
+XML_DIR : `str`
+    The name of the XML repository.
+"""
+
+import argparse
+import pathlib
+import subprocess
+import sys
+
+from . import cache_helpers, git_helpers, git_mirror, instrumentation
+
+AUTO = "auto"
+CSC_CACHE_FILE = "affected_cscs.json"
+SAL_INTERFACES_DIR = "python/lsst/ts/xml/data/sal_interfaces"
+XML_DIR = "ts_xml"
+
+__all__ = [
+    "AUTO",
+    "CSC_CACHE_FILE",
+    "SAL_INTERFACES_DIR",
+    "XML_DIR",
+    "add_xml_arguments",
+    "get_affected_cscs",
+    "get_all_cscs",
+    "get_csc_from_path",
+    "get_xml_tag",
+    "resolve_cscs",
+]
+
+
+def get_xml_tag(version: str) -> str:
+    """Get the ts_xml tag of a version.
+
+    Parameters
+    ----------
+    version : `str`
+        The version, with or without the leading v.
+
+    Returns
+    -------
+    `str`
+        The tag name.
+    """
+    return version if version.startswith("v") else f"v{version}"
+
+
+def get_csc_from_path(path: str) -> str | None:
+    """Get the CSC of a ts_xml file.
+
+    Parameters
+    ----------
+    path : `str`
+        The path of the file relative to the repository root.
+
+    Returns
+    -------
+    `str` or None
+        The CSC name or None if the file is not in a CSC interface directory.
+    """
+    prefix = f"{SAL_INTERFACES_DIR}/"
+    if not path.startswith(prefix):
+        return None
+    parts = path.removeprefix(prefix).split("/")
+    # Files directly in the interfaces directory are shared by all CSCs.
+    return parts[0] if len(parts) > 1 else None
+
+
+def get_all_cscs(repository_dir: pathlib.Path, commit: str) -> list[str]:
+    """List the CSCs with an interface directory in a ts_xml commit.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The ts_xml repository, a clone or a bare repository.
+    commit : `str`
+        The commit to list.
+
+    Returns
+    -------
+    `list`
+        The sorted CSC names.
+    """
+    proc = subprocess.run(
+        [
+            "git",
+            "-C",
+            str(repository_dir),
+            "ls-tree",
+            "-d",
+            "--name-only",
+            commit,
+            f"{SAL_INTERFACES_DIR}/",
+        ],
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    return sorted(path.rsplit("/", 1)[-1] for path in proc.stdout.splitlines())
+
+
+def get_affected_cscs(
+    repository_dir: pathlib.Path, previous_ref: str, ref: str
+) -> list[str]:
+    """Find the CSCs whose interfaces changed between two ts_xml refs.
+
+    Parameters
+    ----------
+    repository_dir : `pathlib.Path`
+        The ts_xml repository, a clone or a bare repository.
+    previous_ref : `str`
+        The branch, tag or commit of the previous version.
+    ref : `str`
+        The branch, tag or commit of the new version.
+
+    Returns
+    -------
+    `list`
+        The sorted CSC names, all of them if a shared file changed.
+
+    Raises
+    ------
+    ValueError
+        If a ref does not exist.
+    """
+    proc = subprocess.run(
+        [
+            "git",
+            "-C",
+            str(repository_dir),
+            "rev-parse",
+            f"{previous_ref}^{{commit}}",
+            f"{ref}^{{commit}}",
+        ],
+        text=True,
+        capture_output=True,
+    )
+    if proc.returncode != 0:
+        raise ValueError(
+            f"Cannot find {previous_ref} and {ref} in {repository_dir}: "
+            f"{proc.stderr.strip().splitlines()[0]}"
+        )
+    previous_commit, commit = proc.stdout.split()
+
+    # Branches move, so the cache is keyed by commits rather than names.
+    key = f"{previous_commit}..{commit}"
+    cache = cache_helpers.read_json_cache(CSC_CACHE_FILE)
+    if key in cache:
+        return cache[key]
+
+    proc = subprocess.run(
+        [
+            "git",
+            "-C",
+            str(repository_dir),
+            "diff",
+            "--name-only",
+            "--no-renames",
+            previous_commit,
+            commit,
+            "--",
+            SAL_INTERFACES_DIR,
+        ],
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    changed_cscs = list(map(get_csc_from_path, proc.stdout.splitlines()))
+    if None in changed_cscs:
+        cscs = get_all_cscs(repository_dir, commit)
+    else:
+        cscs = sorted({csc for csc in changed_cscs if csc is not None})
+    cache[key] = cscs
+    cache_helpers.write_json_cache(CSC_CACHE_FILE, cache)
+    return cscs
+
+
+def add_xml_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options locating ts_xml for deriving the CSCs.
+
+    Parameters
+    ----------
+    parser : `argparse.ArgumentParser`
+        The script parser.
+    """
+    parser.add_argument(
+        "--previous-xml-version",
+        default=None,
+        help=f"The previous XML version, needed to derive the CSCs with {AUTO}.",
+    )
+
+    parser.add_argument(
+        "--xml-dir",
+        type=pathlib.Path,
+        default=None,
+        help=f"Path to where the {XML_DIR} directory lives, needed to derive "
+        f"the CSCs with {AUTO} unless --git-mirror is given.",
+    )
+
+    git_mirror.add_mirror_arguments(parser)
+
+
+def resolve_cscs(cscs: str, opts: argparse.Namespace, xml_version: str | None) -> str:
+    """Resolve a comma-delimited CSC option.
+
+    Parameters
+    ----------
+    cscs : `str`
+        The value of the option.
+    opts : `argparse.Namespace`
+        The script options added by `add_xml_arguments`.
+    xml_version : `str` or None
+        The XML version being deployed.
+
+    Returns
+    -------
+    `str`
+        The option value, or the comma-delimited CSCs whose interfaces changed
+        since the previous XML version if it is ``auto``, which is empty if
+        no CSC changed.
+
+    Raises
+    ------
+    instrumentation.UsageError
+        If the versions or the repository needed to derive the CSCs are
+        missing.
+    """
+    if cscs != AUTO:
+        return cscs
+    if opts.previous_xml_version is None or xml_version is None:
+        raise instrumentation.UsageError(
+            f"the previous and new XML versions are needed to derive the CSCs "
+            f"with {AUTO}"
+        )
+    xml_dir = git_mirror.resolve_parent_dir(opts.xml_dir, opts.git_mirror, [XML_DIR])
+    try:
+        affected_cscs = get_affected_cscs(
+            git_helpers.get_repository_dir(xml_dir, XML_DIR),
+            get_xml_tag(opts.previous_xml_version),
+            get_xml_tag(xml_version),
+        )
+    except ValueError as e:
+        raise instrumentation.UsageError(str(e))
+    if not affected_cscs:
+        print(
+            f"No CSCs changed between ts_xml {opts.previous_xml_version} "
+            f"and {xml_version}.",
+            file=sys.stderr,
+        )
+    return ",".join(affected_cscs)
@@ -0,0 +1,35 @@
+import pathlib
+import threading
+from collections.abc import Iterator
+
+import fake_jira
+import pytest
+from lsst.ts.vanward import cache_helpers, ticket_helpers
+
+
+@pytest.fixture
+def token_file(tmp_path: pathlib.Path) -> pathlib.Path:
+    token_file = tmp_path / "jira_token"
+    token_file.write_text("user\npassword\n")
+    return token_file
+
+
+@pytest.fixture
+def fake_jira_server(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> Iterator[fake_jira.FakeJiraServer]:
+    """Start a fake Jira server on a free port and point the scripts to it."""
+    server = fake_jira.FakeJiraServer(("127.0.0.1", 0), seed=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    monkeypatch.setenv(ticket_helpers.JIRA_SERVER_ENV, server.url)
+    monkeypatch.setenv(cache_helpers.CACHE_DIR_ENV, str(tmp_path / "cache"))
+    monkeypatch.setattr(ticket_helpers, "BACKOFF_FACTOR", 0.0)
+    # The clients are cached per process, and a later server can get the same
+    # port.
+    ticket_helpers.create_jira_client.cache_clear()
+    yield server
+    ticket_helpers.create_jira_client.cache_clear()
+    server.shutdown()
+    thread.join()
+    server.server_close()
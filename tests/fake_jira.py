@@ -0,0 +1,1052 @@
+"""Local fake Jira server for the tests of the ticket scripts.
+
+The server keeps its tickets, versions, users and links in memory and
+implements the part of the Jira REST API version 2 used by the tests: server
+information, fields, issues, bulk issue creation, JQL searches, issue links
+and their types, and user searches. Errors can be injected into every request
+to test the retries.
+
+Attributes
+----------
+DEFAULT_LINK_TYPES : `list`
+    The issue link types known to the server as name, inward and outward
+    descriptions.
+ERROR_STATUS : `int`
+    The HTTP status of the injected errors.
+JQL_TOKEN_REGEX : `re.Pattern`
+    Regular expression splitting a JQL query into tokens.
+"""
+
+import dataclasses
+import datetime
+import http.server
+import itertools
+import json
+import random
+import re
+import threading
+import urllib.parse
+from collections.abc import Callable
+from typing import Any
+
+from lsst.ts.vanward import ticket_helpers
+
+DEFAULT_LINK_TYPES = [
+    ("Blocks", "is blocked by", "blocks"),
+    ("Cloners", "is cloned by", "clones"),
+    ("Duplicate", "is duplicated by", "duplicates"),
+    ("Relates", "relates to", "relates to"),
+    ("Triggers", "is triggered by", "is triggering"),
+]
+ERROR_STATUS = 503
+JQL_TOKEN_REGEX = re.compile(
+    r'\s*(?:(?P<string>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+    r"|(?P<op>!=|!~|>=|<=|=|~|>|<|\(|\)|,)"
+    r'|(?P<word>[^\s"\'=!~<>(),]+))'
+)
+
+
+class JiraError(Exception):
+    """Error answered to a request with a Jira error payload.
+
+    Parameters
+    ----------
+    status : `int`
+        The HTTP status of the response.
+    message : `str`
+        The error message.
+    errors : `dict`, optional
+        The errors of individual fields.
+    """
+
+    def __init__(
+        self, status: int, message: str = "", errors: dict[str, str] | None = None
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.payload = {
+            "errorMessages": [message] if message else [],
+            "errors": errors or {},
+        }
+
+
+def format_time(timestamp: datetime.datetime) -> str:
+    """Format a time the way Jira does.
+
+    Parameters
+    ----------
+    timestamp : `datetime.datetime`
+        The time to format.
+
+    Returns
+    -------
+    `str`
+        The time with milliseconds and numeric UTC offset.
+    """
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%S.") + (
+        f"{timestamp.microsecond // 1000:03d}{timestamp.strftime('%z')}"
+    )
+
+
+def parse_time(value: str) -> datetime.datetime:
+    """Parse a JQL date value.
+
+    Parameters
+    ----------
+    value : `str`
+        Either a relative time like ``-15m``, ``-2h``, ``-1d`` or ``-1w`` or
+        an absolute ``yyyy-mm-dd`` date with an optional ``HH:MM`` time.
+
+    Returns
+    -------
+    `datetime.datetime`
+        The time in UTC.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    match = re.fullmatch(r"([-+]?\d+)([mhdw])", value)
+    if match is not None:
+        units = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+        delta = datetime.timedelta(**{units[match.group(2)]: int(match.group(1))})
+        return now + delta
+    for date_format in ("%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M", "%Y-%m-%d", "%Y/%m/%d"):
+        try:
+            timestamp = datetime.datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+        return timestamp.replace(tzinfo=datetime.timezone.utc)
+    raise JiraError(400, f"Invalid date in the JQL query: {value!r}.")
+
+
+def tokenize_jql(query: str) -> list[tuple[str, str]]:
+    """Split a JQL query into tokens.
+
+    Parameters
+    ----------
+    query : `str`
+        The JQL query.
+
+    Returns
+    -------
+    `list`
+        The kind (string, op or word) and text of each token. Strings are
+        unquoted and unescaped.
+    """
+    tokens = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = JQL_TOKEN_REGEX.match(query, position)
+        if match is None or match.end() == position:
+            raise JiraError(400, f"Error in the JQL query at {query[position:]!r}.")
+        kind = match.lastgroup or "word"
+        text = match.group(kind)
+        if kind == "string":
+            text = re.sub(r"\\(.)", r"\1", text[1:-1])
+        tokens.append((kind, text))
+        position = match.end()
+        while position < len(query) and query[position].isspace():
+            position += 1
+    return tokens
+
+
+JqlPredicate = Callable[[dict[str, Any]], bool]
+
+
+class JqlParser:
+    """Recursive descent parser of the JQL subset used by the scripts.
+
+    Clauses compare a field to a value with ``=``, ``!=``, ``~``, ``!~``,
+    ``>``, ``>=``, ``<``, ``<=``, ``in``, ``not in``, ``is`` and ``is not``,
+    and are combined with ``AND``, ``OR``, ``NOT`` and parentheses. An
+    ``ORDER BY`` clause is ignored.
+
+    Parameters
+    ----------
+    query : `str`
+        The JQL query.
+    """
+
+    def __init__(self, query: str) -> None:
+        self.tokens = tokenize_jql(query)
+        for i, (kind, text) in enumerate(self.tokens):
+            if kind == "word" and text.lower() == "order":
+                self.tokens = self.tokens[:i]
+                break
+        self.position = 0
+        self.keys: list[str] = []
+
+    def peek(self) -> str:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1]
+        return ""
+
+    def peek_keyword(self) -> str:
+        if self.position < len(self.tokens) and self.tokens[self.position][0] != (
+            "string"
+        ):
+            return self.tokens[self.position][1].lower()
+        return ""
+
+    def next(self) -> str:
+        if self.position >= len(self.tokens):
+            raise JiraError(400, "Unexpected end of the JQL query.")
+        text = self.tokens[self.position][1]
+        self.position += 1
+        return text
+
+    def expect(self, text: str) -> None:
+        token = self.next()
+        if token.lower() != text:
+            raise JiraError(400, f"Expected {text!r} in the JQL query, got {token!r}.")
+
+    def parse(self) -> JqlPredicate:
+        """Parse the query.
+
+        Returns
+        -------
+        `Callable`
+            Function that tells if an issue matches the query.
+        """
+        if not self.tokens:
+            return lambda issue: True
+        predicate = self.parse_or()
+        if self.position != len(self.tokens):
+            raise JiraError(400, f"Unexpected {self.peek()!r} in the JQL query.")
+        return predicate
+
+    def parse_or(self) -> JqlPredicate:
+        predicates = [self.parse_and()]
+        while self.peek_keyword() == "or":
+            self.next()
+            predicates.append(self.parse_and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda issue: any(predicate(issue) for predicate in predicates)
+
+    def parse_and(self) -> JqlPredicate:
+        predicates = [self.parse_not()]
+        while self.peek_keyword() == "and":
+            self.next()
+            predicates.append(self.parse_not())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda issue: all(predicate(issue) for predicate in predicates)
+
+    def parse_not(self) -> JqlPredicate:
+        if self.peek_keyword() == "not":
+            self.next()
+            predicate = self.parse_not()
+            return lambda issue: not predicate(issue)
+        if self.peek() == "(":
+            self.next()
+            predicate = self.parse_or()
+            self.expect(")")
+            return predicate
+        return self.parse_clause()
+
+    def parse_values(self) -> list[str]:
+        self.expect("(")
+        values = [self.next()]
+        while self.peek() == ",":
+            self.next()
+            values.append(self.next())
+        self.expect(")")
+        return values
+
+    def parse_clause(self) -> JqlPredicate:
+        field = self.next().lower()
+        operator = self.next().lower()
+        if operator in ("not", "is") and self.peek_keyword() in ("in", "not"):
+            operator = f"{operator} {self.next().lower()}"
+        if operator in ("in", "not in"):
+            values = self.parse_values()
+        else:
+            values = [self.next()]
+        if field in ("key", "issue", "issuekey") and operator in ("=", "in"):
+            self.keys += [value for value in values if not value.isdigit()]
+        return get_clause_predicate(field, operator, values)
+
+
+def get_field_values(issue: dict[str, Any], field: str) -> list[Any]:
+    """Get the values of an issue field as compared by JQL.
+
+    Parameters
+    ----------
+    issue : `dict`
+        The stored issue.
+    field : `str`
+        The lower case JQL field name.
+
+    Returns
+    -------
+    `list`
+        The values of the field. Text values are lower case.
+    """
+    fields = issue["fields"]
+    if field in ("key", "issue", "issuekey", "id"):
+        return [issue["key"].lower(), issue["id"]]
+    if field == "project":
+        project = fields["project"]
+        return [project["key"].lower(), project["id"], project["name"].lower()]
+    if field in ("fixversion", "fixversions"):
+        return [version["name"].lower() for version in fields["fixVersions"]]
+    if field in ("labels", "label"):
+        return [label.lower() for label in fields["labels"]]
+    if field in ("status", "issuetype", "type"):
+        name = "issuetype" if field == "type" else field
+        return [fields[name]["name"].lower()] if fields.get(name) else []
+    if field in ("assignee", "reporter"):
+        user = fields.get(field)
+        if not user:
+            return []
+        return [
+            str(user.get(attribute, "")).lower()
+            for attribute in ("accountId", "displayName", "emailAddress")
+        ]
+    if field in ("updated", "created"):
+        return [datetime.datetime.fromisoformat(fields[field])]
+    value = fields.get(field)
+    if value is None:
+        return []
+    return [value.lower() if isinstance(value, str) else value]
+
+
+def get_clause_predicate(field: str, operator: str, values: list[str]) -> JqlPredicate:
+    """Create the predicate of a single JQL clause.
+
+    Parameters
+    ----------
+    field : `str`
+        The lower case JQL field name.
+    operator : `str`
+        The lower case comparison operator.
+    values : `list`
+        The compared values.
+
+    Returns
+    -------
+    `Callable`
+        Function that tells if an issue matches the clause.
+    """
+    if operator in ("is", "is not"):
+        if values[0].lower() not in ("empty", "null"):
+            raise JiraError(400, f"Only EMPTY can be compared with {operator!r}.")
+        empty = operator == "is"
+        return lambda issue: (not get_field_values(issue, field)) == empty
+
+    if operator in ("~", "!~"):
+        text = values[0].strip('"').lower()
+        contains = operator == "~"
+
+        def matches_text(issue: dict[str, Any]) -> bool:
+            found = any(text in str(value) for value in get_field_values(issue, field))
+            return found == contains
+
+        return matches_text
+
+    if field in ("updated", "created"):
+        times = [parse_time(value) for value in values]
+        comparisons: dict[str, Callable[[Any, Any], bool]] = {
+            "=": lambda a, b: a == b,
+            "!=": lambda a, b: a != b,
+            ">": lambda a, b: a > b,
+            ">=": lambda a, b: a >= b,
+            "<": lambda a, b: a < b,
+            "<=": lambda a, b: a <= b,
+        }
+        if operator not in comparisons:
+            raise JiraError(400, f"Unsupported operator {operator!r} for {field}.")
+        compare = comparisons[operator]
+        return lambda issue: any(
+            compare(value, times[0]) for value in get_field_values(issue, field)
+        )
+
+    wanted = {value.lower() for value in values}
+    if operator in ("=", "in"):
+        return lambda issue: bool(wanted & set(get_field_values(issue, field)))
+    if operator in ("!=", "not in"):
+        return lambda issue: not wanted & set(get_field_values(issue, field))
+    raise JiraError(400, f"Unsupported operator {operator!r} for {field}.")
+
+
+@dataclasses.dataclass
+class RequestStats:
+    """Holder for the request statistics of the fake server."""
+
+    requests: int = 0
+    errors: int = 0
+
+
+class FakeJira:
+    """In memory state of the fake Jira server.
+
+    Parameters
+    ----------
+    base_url : `str`
+        The URL of the server, used for the self links.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.lock = threading.RLock()
+        self.ids = itertools.count(10000)
+        self.projects: dict[str, dict[str, Any]] = {}
+        self.issues: dict[str, dict[str, Any]] = {}
+        self.issue_counters: dict[str, itertools.count] = {}
+        self.versions: dict[str, dict[str, Any]] = {}
+        self.users: dict[str, dict[str, Any]] = {}
+        self.links: dict[str, dict[str, Any]] = {}
+        self.link_types = {
+            name: {"id": str(i + 1), "name": name, "inward": inward, "outward": outward}
+            for i, (name, inward, outward) in enumerate(DEFAULT_LINK_TYPES)
+        }
+
+    def new_id(self) -> str:
+        return str(next(self.ids))
+
+    def get_self(self, path: str) -> str:
+        return f"{self.base_url}/rest/api/2/{path}"
+
+    def get_project(self, key: str) -> dict[str, Any]:
+        """Get a project, creating it if needed.
+
+        Parameters
+        ----------
+        key : `str`
+            The project key or Id.
+
+        Returns
+        -------
+        `dict`
+            The project.
+        """
+        with self.lock:
+            for project in self.projects.values():
+                if project["id"] == key:
+                    return project
+            key = key.upper()
+            if key not in self.projects:
+                project_id = self.new_id()
+                self.projects[key] = {
+                    "id": project_id,
+                    "key": key,
+                    "name": key,
+                    "self": self.get_self(f"project/{project_id}"),
+                }
+                self.issue_counters[key] = itertools.count(1)
+            return self.projects[key]
+
+    def add_user(self, display_name: str, email: str = "") -> dict[str, Any]:
+        """Add a user.
+
+        Parameters
+        ----------
+        display_name : `str`
+            The name of the user.
+        email : `str`, optional
+            The email address of the user.
+
+        Returns
+        -------
+        `dict`
+            The user.
+        """
+        with self.lock:
+            account_id = f"fake-{len(self.users) + 1:04d}"
+            user = {
+                "accountId": account_id,
+                "displayName": display_name,
+                "emailAddress": email,
+                "active": True,
+                "self": self.get_self(f"user?accountId={account_id}"),
+            }
+            self.users[account_id] = user
+            return user
+
+    def get_user(self, account_id: str) -> dict[str, Any]:
+        if account_id not in self.users:
+            raise JiraError(400, errors={"assignee": f"User {account_id} not found."})
+        return self.users[account_id]
+
+    def search_users(self, query: str) -> list[dict[str, Any]]:
+        """Find the users matching a query.
+
+        Parameters
+        ----------
+        query : `str`
+            Part of the display name, email or account Id.
+
+        Returns
+        -------
+        `list`
+            The matching users.
+        """
+        query = query.lower()
+        with self.lock:
+            return [
+                user
+                for user in self.users.values()
+                if any(
+                    query in str(user[attribute]).lower()
+                    for attribute in ("accountId", "displayName", "emailAddress")
+                )
+            ]
+
+    def create_version(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Create a project version.
+
+        Parameters
+        ----------
+        data : `dict`
+            The version name, project key or Id and optional description.
+
+        Returns
+        -------
+        `dict`
+            The version.
+        """
+        name = data.get("name")
+        project_key = data.get("project") or data.get("projectId")
+        if not name or not project_key:
+            raise JiraError(400, errors={"name": "The version name is required."})
+        with self.lock:
+            project = self.get_project(str(project_key))
+            for version in self.versions.values():
+                if version["projectId"] == project["id"] and version["name"] == name:
+                    raise JiraError(
+                        400,
+                        errors={
+                            "name": "A version with this name already exists "
+                            "in this project."
+                        },
+                    )
+            version_id = self.new_id()
+            version = {
+                "id": version_id,
+                "name": name,
+                "description": data.get("description", ""),
+                "projectId": project["id"],
+                "archived": False,
+                "released": bool(data.get("released", False)),
+                "self": self.get_self(f"version/{version_id}"),
+            }
+            self.versions[version_id] = version
+            return version
+
+    def find_version(self, project: dict[str, Any], name: str) -> dict[str, Any]:
+        for version in self.versions.values():
+            if version["projectId"] == project["id"] and version["name"] == name:
+                return version
+        return self.create_version({"name": name, "project": project["key"]})
+
+    def create_issue(self, fields: dict[str, Any]) -> dict[str, Any]:
+        """Create an issue.
+
+        Parameters
+        ----------
+        fields : `dict`
+            The issue fields as sent to the issue creation endpoint.
+
+        Returns
+        -------
+        `dict`
+            The Id, key and self link of the new issue.
+        """
+        errors = {}
+        if not fields.get("summary"):
+            errors["summary"] = "You must specify a summary of the issue."
+        project_field = fields.get("project") or {}
+        project_key = project_field.get("key") or project_field.get("id")
+        if not project_key:
+            errors["project"] = "Specify a valid project ID or key."
+        if errors:
+            raise JiraError(400, errors=errors)
+
+        with self.lock:
+            project = self.get_project(str(project_key))
+            key = f"{project['key']}-{next(self.issue_counters[project['key']])}"
+            now = format_time(datetime.datetime.now(datetime.timezone.utc))
+            assignee = fields.get("assignee")
+            issue_fields = dict(fields)
+            issue_fields.update(
+                project={name: project[name] for name in ("id", "key", "name", "self")},
+                issuetype={"name": (fields.get("issuetype") or {}).get("name", "Task")},
+                status={"name": "To Do"},
+                assignee=None if not assignee else self.get_user(assignee["id"]),
+                labels=list(fields.get("labels", [])),
+                fixVersions=[
+                    self.find_version(project, version["name"])
+                    for version in fields.get("fixVersions", [])
+                ],
+                created=now,
+                updated=now,
+            )
+            issue = {
+                "id": self.new_id(),
+                "key": key,
+                "fields": issue_fields,
+            }
+            self.issues[key] = issue
+            return {
+                "id": issue["id"],
+                "key": key,
+                "self": self.get_self(f"issue/{issue['id']}"),
+            }
+
+    def get_issue(self, key: str) -> dict[str, Any]:
+        with self.lock:
+            issue = self.issues.get(key.upper())
+            if issue is None:
+                for candidate in self.issues.values():
+                    if candidate["id"] == key:
+                        return candidate
+                raise JiraError(
+                    404,
+                    "Issue does not exist or you do not have " "permission to see it.",
+                )
+            return issue
+
+    def delete_issue(self, key: str) -> None:
+        with self.lock:
+            issue = self.get_issue(key)
+            del self.issues[issue["key"]]
+            for link_id, link in list(self.links.items()):
+                if issue["key"] in (link["inward"], link["outward"]):
+                    del self.links[link_id]
+
+    def touch(self, issue: dict[str, Any]) -> None:
+        issue["fields"]["updated"] = format_time(
+            datetime.datetime.now(datetime.timezone.utc)
+        )
+
+    def get_issue_links(self, issue: dict[str, Any]) -> list[dict[str, Any]]:
+        """Get the links of an issue as shown in its fields.
+
+        Parameters
+        ----------
+        issue : `dict`
+            The issue.
+
+        Returns
+        -------
+        `list`
+            The links, with the other issue as ``inwardIssue`` or
+            ``outwardIssue``.
+        """
+        links = []
+        for link in self.links.values():
+            if link["outward"] == issue["key"]:
+                side, other_key = "inwardIssue", link["inward"]
+            elif link["inward"] == issue["key"]:
+                side, other_key = "outwardIssue", link["outward"]
+            else:
+                continue
+            other = self.issues[other_key]
+            links.append(
+                {
+                    "id": link["id"],
+                    "self": self.get_self(f"issueLink/{link['id']}"),
+                    "type": link["type"],
+                    side: {
+                        "id": other["id"],
+                        "key": other_key,
+                        "fields": {
+                            "summary": other["fields"]["summary"],
+                            "status": other["fields"]["status"],
+                        },
+                    },
+                }
+            )
+        return links
+
+    def format_issue(
+        self, issue: dict[str, Any], fields: list[str] | None = None
+    ) -> dict[str, Any]:
+        """Create the JSON representation of an issue.
+
+        Parameters
+        ----------
+        issue : `dict`
+            The issue.
+        fields : `list` or None, optional
+            The fields to include. All fields are included if None or if it
+            contains ``*all``.
+
+        Returns
+        -------
+        `dict`
+            The issue representation.
+        """
+        with self.lock:
+            all_fields = dict(issue["fields"])
+            all_fields["issuelinks"] = self.get_issue_links(issue)
+        if fields and "*all" not in fields and "*navigable" not in fields:
+            all_fields = {
+                name: value for name, value in all_fields.items() if name in fields
+            }
+        return {
+            "id": issue["id"],
+            "key": issue["key"],
+            "self": self.get_self(f"issue/{issue['id']}"),
+            "fields": all_fields,
+        }
+
+    def search(self, query: str, validate_query: bool = True) -> list[dict[str, Any]]:
+        """Find the issues matching a JQL query.
+
+        Parameters
+        ----------
+        query : `str`
+            The JQL query.
+        validate_query : `bool`, optional
+            If True, reject queries naming issue keys that do not exist, as
+            Jira does.
+
+        Returns
+        -------
+        `list`
+            The matching issues in creation order.
+
+        Raises
+        ------
+        JiraError
+            If the query is not valid.
+        """
+        parser = JqlParser(query)
+        predicate = parser.parse()
+        with self.lock:
+            if validate_query:
+                for key in parser.keys:
+                    if key.upper() not in self.issues:
+                        raise JiraError(
+                            400,
+                            f"An issue with key '{key}' does not exist for field "
+                            "'key'.",
+                        )
+            return [issue for issue in self.issues.values() if predicate(issue)]
+
+    def create_link(self, data: dict[str, Any]) -> str:
+        """Create an issue link.
+
+        Parameters
+        ----------
+        data : `dict`
+            The link type and the inward and outward issues.
+
+        Returns
+        -------
+        `str`
+            The Id of the new link.
+        """
+        type_data = data.get("type") or {}
+        with self.lock:
+            link_type = self.link_types.get(type_data.get("name", ""))
+            if link_type is None:
+                for candidate in self.link_types.values():
+                    if candidate["id"] == type_data.get("id"):
+                        link_type = candidate
+            if link_type is None:
+                raise JiraError(404, f"No issue link type named {type_data}.")
+            inward = self.get_issue((data.get("inwardIssue") or {}).get("key", ""))
+            outward = self.get_issue((data.get("outwardIssue") or {}).get("key", ""))
+            link_id = self.new_id()
+            self.links[link_id] = {
+                "id": link_id,
+                "type": link_type,
+                "inward": inward["key"],
+                "outward": outward["key"],
+            }
+            self.touch(inward)
+            self.touch(outward)
+            return link_id
+
+    def delete_link(self, link_id: str) -> None:
+        with self.lock:
+            link = self.links.pop(link_id, None)
+            if link is None:
+                raise JiraError(404, f"No issue link with id {link_id}.")
+            self.touch(self.issues[link["inward"]])
+            self.touch(self.issues[link["outward"]])
+
+    def load(self, data: dict[str, Any]) -> None:
+        """Load users, versions, issues and links.
+
+        Parameters
+        ----------
+        data : `dict`
+            Lists of ``users`` (display name and email), ``versions`` (as
+            sent to the version endpoint), ``issues`` (fields as sent to the
+            issue endpoint) and ``links`` (as sent to the issue link
+            endpoint).
+        """
+        for user in data.get("users", []):
+            self.add_user(user["displayName"], user.get("emailAddress", ""))
+        for version in data.get("versions", []):
+            self.create_version(version)
+        for fields in data.get("issues", []):
+            self.create_issue(fields)
+        for link in data.get("links", []):
+            self.create_link(link)
+
+    def add_bucket_links(self, project: str, count: int) -> tuple[str, str]:
+        """Create two bucket tickets, the first linked to many tickets.
+
+        Parameters
+        ----------
+        project : `str`
+            The project of the tickets.
+        count : `int`
+            The number of tickets linked to the first bucket ticket.
+
+        Returns
+        -------
+        `tuple`
+            The keys of the current and next bucket tickets.
+        """
+        current = self.create_issue(
+            {"project": {"key": project}, "summary": "Current bucket ticket"}
+        )["key"]
+        next_bucket = self.create_issue(
+            {"project": {"key": project}, "summary": "Next bucket ticket"}
+        )["key"]
+        for i in range(count):
+            key = self.create_issue(
+                {"project": {"key": project}, "summary": f"Linked ticket {i + 1}"}
+            )["key"]
+            inward, outward = (key, current) if i % 2 else (current, key)
+            self.create_link(
+                {
+                    "type": {"name": "Relates"},
+                    "inwardIssue": {"key": inward},
+                    "outwardIssue": {"key": outward},
+                }
+            )
+        return current, next_bucket
+
+
+def get_list_param(value: Any) -> list[str]:
+    """Normalize a list parameter given as a list or comma separated text.
+
+    Parameters
+    ----------
+    value : `Any`
+        The parameter value.
+
+    Returns
+    -------
+    `list`
+        The list items.
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [item.strip() for entry in value for item in entry.split(",") if item]
+
+
+class FakeJiraHandler(http.server.BaseHTTPRequestHandler):
+    """Answer a request to the fake Jira REST API."""
+
+    server: "FakeJiraServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def send_json(
+        self, status: int, payload: Any = None, headers: dict[str, str] | None = None
+    ) -> None:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            raise JiraError(400, "The request body is not valid JSON.")
+
+    def handle_request(self, method: str) -> None:
+        server = self.server
+        with server.stats_lock:
+            server.stats.requests += 1
+        if server.error_rate > 0 and server.random.random() < server.error_rate:
+            with server.stats_lock:
+                server.stats.errors += 1
+            # The body has to be read to keep the connection usable.
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_json(
+                ERROR_STATUS,
+                {"errorMessages": ["Injected error."], "errors": {}},
+                {"Retry-After": "1"},
+            )
+            return
+        parts = urllib.parse.urlsplit(self.path)
+        path = re.sub(r"^/+rest/api/(?:2|latest)/", "", parts.path).strip("/")
+        params = urllib.parse.parse_qs(parts.query)
+        # Set by the routes answering with extra headers.
+        self.response_headers: dict[str, str] = {}
+        try:
+            status, payload = self.route(method, path, params)
+        except JiraError as e:
+            status, payload = e.status, e.payload
+        except Exception as e:
+            status = 500
+            payload = {"errorMessages": [f"{type(e).__name__}: {e}"], "errors": {}}
+        self.send_json(status, payload, self.response_headers)
+
+    def do_GET(self) -> None:
+        self.handle_request("GET")
+
+    def do_POST(self) -> None:
+        self.handle_request("POST")
+
+    def do_DELETE(self) -> None:
+        self.handle_request("DELETE")
+
+    def route(
+        self, method: str, path: str, params: dict[str, list[str]]
+    ) -> tuple[int, Any]:
+        """Dispatch a request to the fake Jira state.
+
+        Parameters
+        ----------
+        method : `str`
+            The HTTP method.
+        path : `str`
+            The path below the REST API root.
+        params : `dict`
+            The query parameters.
+
+        Returns
+        -------
+        `tuple`
+            The HTTP status and the response payload.
+        """
+        jira = self.server.jira
+        segments = path.split("/")
+        body = self.read_json() if method == "POST" else {}
+
+        def param(name: str, default: Any = None) -> Any:
+            if name in body:
+                return body[name]
+            return params[name][0] if name in params else default
+
+        if (method, path) == ("GET", "serverInfo"):
+            return 200, {
+                "baseUrl": jira.base_url,
+                "version": "1001.0.0",
+                "versionNumbers": [1001, 0, 0],
+                "deploymentType": "Cloud",
+                "serverTitle": "Fake Jira",
+            }
+        if (method, path) == ("GET", "field"):
+            return 200, [
+                {"id": name, "name": name, "clauseNames": [name]}
+                for name in ticket_helpers.TICKET_FIELDS + ["project", "issuetype"]
+            ]
+        if (method, path) == ("GET", "issueLinkType"):
+            return 200, {"issueLinkTypes": list(jira.link_types.values())}
+        if (method, path) == ("GET", "user/search"):
+            query = param("query") or param("username") or ""
+            users = jira.search_users(query)
+            start = int(param("startAt", 0))
+            end = start + int(param("maxResults", 50))
+            return 200, users[start:end]
+        if path == "search/jql" and method in ("GET", "POST"):
+            validate_query = str(param("validateQuery", True)).lower()
+            issues = jira.search(
+                param("jql", ""), validate_query not in ("false", "none", "warn")
+            )
+            fields = get_list_param(
+                body["fields"] if "fields" in body else params.get("fields")
+            )
+            max_results = min(int(param("maxResults", 50) or 50), 100)
+            start = int(param("nextPageToken") or 0)
+            end = start + max_results
+            payload: dict[str, Any] = {
+                "issues": [
+                    jira.format_issue(issue, fields) for issue in issues[start:end]
+                ],
+                "isLast": end >= len(issues),
+            }
+            if end < len(issues):
+                payload["nextPageToken"] = str(end)
+            return 200, payload
+        if (method, path) == ("POST", "issue"):
+            return 201, jira.create_issue(body.get("fields", {}))
+        if (method, path) == ("POST", "issue/bulk"):
+            created, errors = [], []
+            for i, update in enumerate(body.get("issueUpdates", [])):
+                try:
+                    created.append(jira.create_issue(update.get("fields", {})))
+                except JiraError as e:
+                    errors.append(
+                        {
+                            "status": e.status,
+                            "elementErrors": e.payload,
+                            "failedElementNumber": i,
+                        }
+                    )
+            return (201 if created or not errors else 400), {
+                "issues": created,
+                "errors": errors,
+            }
+        if method == "GET" and len(segments) == 2 and segments[0] == "issue":
+            fields = get_list_param(params.get("fields"))
+            return 200, jira.format_issue(jira.get_issue(segments[1]), fields)
+        if method == "DELETE" and len(segments) == 2 and segments[0] == "issue":
+            jira.delete_issue(segments[1])
+            return 204, None
+        if (method, path) == ("POST", "issueLink"):
+            # Jira only tells the Id of the new link in its location.
+            link_id = jira.create_link(body)
+            self.response_headers["Location"] = jira.get_self(f"issueLink/{link_id}")
+            return 201, None
+        if method == "DELETE" and len(segments) == 2 and segments[0] == "issueLink":
+            jira.delete_link(segments[1])
+            return 204, None
+        raise JiraError(404, f"The fake Jira does not implement {method} {path}.")
+
+
+class FakeJiraServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server answering with the fake Jira state.
+
+    Parameters
+    ----------
+    address : `tuple`
+        The host and port to listen on. Port 0 selects a free port.
+    seed : `int` or None, optional
+        The seed of the error injection.
+
+    Attributes
+    ----------
+    error_rate : `float`
+        The fraction of requests answered with an injected error.
+    """
+
+    daemon_threads = True
+    # Bulk link moves open many connections at once.
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], seed: int | None = None) -> None:
+        self.host = address[0]
+        super().__init__(address, FakeJiraHandler)
+        self.jira = FakeJira(self.url)
+        self.error_rate = 0.0
+        self.random = random.Random(seed)
+        self.stats = RequestStats()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """The URL to use as the Jira server."""
+        return f"http://{self.host}:{self.server_port}/"
@@ -0,0 +1,43 @@
+from lsst.ts.vanward import confluence_helpers
+
+
+def make_anchor(name: str) -> str:
+    return (
+        '<ac:structured-macro ac:name="anchor"><ac:parameter ac:name="">'
+        f"{confluence_helpers.ANCHOR_PREFIX}{name}"
+        "</ac:parameter></ac:structured-macro>"
+    )
+
+
+def make_section(name: str, text: str) -> str:
+    return (
+        f"{make_anchor(name)}\n<h2>{text}</h2>\n<h2>Changelog</h2>\n"
+        f"{make_anchor(confluence_helpers.END_ANCHOR_PREFIX + name)}\n"
+    )
+
+
+def test_replace_section_keeps_following_content() -> None:
+    footer = "<h2>Notes</h2>\n<p>Added by hand.</p>\n"
+    body = "<h2>Schedule</h2>\n" + make_section("requests", "Requests") + footer
+    sections = confluence_helpers.PageSections(body)
+    assert sections.body == body
+    assert sections.get_names() == ["requests"]
+
+    new_section = make_section("requests", "New requests")
+    assert sections.set_section("requests", new_section, replace=True)
+    assert sections.body == "<h2>Schedule</h2>\n" + new_section + footer
+
+    # Replacing the section again does not change the page.
+    sections = confluence_helpers.PageSections(sections.body)
+    sections.set_section("requests", new_section, replace=True)
+    assert sections.body == "<h2>Schedule</h2>\n" + new_section + footer
+
+
+def test_section_without_end_anchor() -> None:
+    legacy = "<h2>\n  <u>Requests for next incremental upgrade</u>\n</h2>\n<p>Old</p>\n"
+    sections = confluence_helpers.PageSections("<p>Head</p>\n" + legacy)
+    assert sections.get_names() == ["requests"]
+
+    new_section = make_section("requests", "Requests")
+    sections.set_section("requests", new_section, replace=True)
+    assert sections.body == "<p>Head</p>\n" + new_section
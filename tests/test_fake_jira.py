@@ -0,0 +1,95 @@
+import argparse
+import pathlib
+
+import fake_jira
+import jira
+from lsst.ts.vanward import issue_plans, move_bucket_ticket_links, ticket_helpers
+
+MAX_ATTEMPTS = 10
+
+
+def get_links(token_file: pathlib.Path, key: str) -> set[tuple[str, str, str]]:
+    js = ticket_helpers.get_jira_client(token_file)
+    issue = ticket_helpers.TicketInfo.from_issue(js.issue(key))
+    return {(link.key, link.type_name, link.direction) for link in issue.links}
+
+
+def test_move_and_rollback_bucket_links(
+    fake_jira_server: fake_jira.FakeJiraServer,
+    token_file: pathlib.Path,
+    tmp_path: pathlib.Path,
+) -> None:
+    current, next_bucket = fake_jira_server.jira.add_bucket_links("CAP", 10)
+    links = get_links(token_file, current)
+    assert len(links) == 10
+    keep_link = min(links)
+    # A link already on the next bucket ticket, of the same type and to the
+    # same ticket as a moved link, is left alone by the rollback.
+    moved_key = max(links)[0]
+    fake_jira_server.jira.create_link(
+        {
+            "type": {"name": "Relates"},
+            "inwardIssue": {"key": moved_key},
+            "outwardIssue": {"key": next_bucket},
+        }
+    )
+    existing_link = (moved_key, "Relates", "inward")
+
+    opts = argparse.Namespace(
+        current_ticket=current,
+        next_ticket=next_bucket,
+        keep_tickets=keep_link[0],
+        token_file=token_file,
+        jobs=4,
+        journal=tmp_path / "journal.jsonl",
+        dry_run=False,
+        rollback=False,
+    )
+    move_bucket_ticket_links.main(opts)
+    assert get_links(token_file, current) == {keep_link}
+    # The next bucket ticket is on the inward side of the moved links.
+    assert get_links(token_file, next_bucket) == {existing_link} | {
+        (key, type_name, "outward") for key, type_name, _ in links - {keep_link}
+    }
+
+    opts.rollback = True
+    move_bucket_ticket_links.main(opts)
+    assert get_links(token_file, current) == links
+    assert get_links(token_file, next_bucket) == {existing_link}
+
+
+def test_bulk_creation_with_errors(
+    fake_jira_server: fake_jira.FakeJiraServer, token_file: pathlib.Path
+) -> None:
+    js = ticket_helpers.get_jira_client(token_file)
+    plans = [
+        issue_plans.IssuePlan(
+            f"ticket{i}",
+            {
+                "project": {"key": "CAP"},
+                "issuetype": {"name": "Task"},
+                "summary": f"Ticket {i}",
+            },
+        )
+        for i in range(2 * issue_plans.BULK_BATCH_SIZE + 1)
+    ]
+
+    # Bulk requests are not retried, as they are not idempotent, so the
+    # creation is run again until it gets through.
+    fake_jira_server.error_rate = 0.5
+    results: dict[str, issue_plans.IssueResult] = {}
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            results = issue_plans.create_missing_issues(js, plans, "test")
+            break
+        except jira.JIRAError as e:
+            assert e.status_code == 503
+    fake_jira_server.error_rate = 0.0
+
+    assert fake_jira_server.stats.errors > 0
+    assert len(results) == len(plans)
+    assert all(result.ok for result in results.values())
+    issues = js.search_issues("project = CAP", maxResults=False)
+    assert sorted(issue.fields.summary for issue in issues) == sorted(
+        plan.fields["summary"] for plan in plans
+    )
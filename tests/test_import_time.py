@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from lsst.ts.vanward import cli, daemon
+
+# Generous for slow machines; importing the Jira client alone takes longer.
+IMPORT_BUDGET_MS = 250
+HEAVY_PACKAGES = ["atlassian", "git", "gql", "jira"]
+START_MARKER = "import-time-start"
+
+
+def get_import_times(code: str) -> list[tuple[str, int]]:
+    """Run Python code with ``-X importtime``.
+
+    Parameters
+    ----------
+    code : `str`
+        The code to run.
+
+    Returns
+    -------
+    `list`
+        The names of the modules imported by the code, indented by their
+        nesting as in the ``-X importtime`` output, and their cumulative
+        import times in microseconds. Modules imported at startup are left
+        out.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    env[daemon.NO_DAEMON_ENV] = "1"
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys; print({START_MARKER!r}, file=sys.stderr); {code}",
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = proc.stderr.splitlines()
+    start = lines.index(START_MARKER) + 1
+    import_times = []
+    for line in lines[start:]:
+        if line.startswith("import time:"):
+            _, cumulative, name = line.split("|")
+            import_times.append((name.removeprefix(" "), int(cumulative)))
+    return import_times
+
+
+def get_packages(import_times: list[tuple[str, int]]) -> set[str]:
+    return {name.split(".")[0].strip() for name, _ in import_times}
+
+
+def check_imports(code: str) -> None:
+    import_times = get_import_times(code)
+
+    # Nested imports are indented and included in their parent time.
+    total = sum(time for name, time in import_times if not name.startswith(" "))
+    assert total / 1000 < IMPORT_BUDGET_MS
+    assert get_packages(import_times) & set(HEAVY_PACKAGES) == set()
+
+
+def test_cli_import() -> None:
+    check_imports("import lsst.ts.vanward.cli")
+
+
+def test_vanward_help() -> None:
+    check_imports(
+        "from lsst.ts.vanward.cli import runner; sys.argv[1:] = ['--help']; runner()"
+    )
+
+
+@pytest.mark.parametrize("command", list(cli.COMMANDS))
+def test_command_help(command: str) -> None:
+    code = (
+        "from lsst.ts.vanward.cli import runner; "
+        f"sys.argv[1:] = [{command!r}, '--help']\n"
+        "try:\n    runner()\nexcept SystemExit:\n    pass"
+    )
+    assert get_packages(get_import_times(code)) & set(HEAVY_PACKAGES) == set()
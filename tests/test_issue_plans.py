@@ -0,0 +1,35 @@
+import pathlib
+
+import fake_jira
+from lsst.ts.vanward import issue_plans, ticket_helpers
+
+
+def test_recreate_deleted_issue(
+    fake_jira_server: fake_jira.FakeJiraServer, token_file: pathlib.Path
+) -> None:
+    js = ticket_helpers.get_jira_client(token_file)
+    plans = [
+        issue_plans.IssuePlan(
+            site,
+            {
+                "project": {"key": "OSW"},
+                "issuetype": {"name": "Story"},
+                "summary": f"Ready {site} deployment configuration",
+            },
+        )
+        for site in ("summit", "base")
+    ]
+    results = issue_plans.create_missing_issues(js, plans, "Cycle 40")
+    summit_key = results["summit"].key
+    base_key = results["base"].key
+
+    js.issue(summit_key).delete()
+    results = issue_plans.create_missing_issues(js, plans, "Cycle 40")
+    assert not results["summit"].existed
+    assert results["summit"].key not in (summit_key, base_key)
+    assert results["base"].existed
+    assert results["base"].key == base_key
+
+    # The index now holds the new ticket.
+    results = issue_plans.create_missing_issues(js, plans, "Cycle 40")
+    assert all(result.existed for result in results.values())
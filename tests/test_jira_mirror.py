@@ -0,0 +1,73 @@
+import argparse
+import pathlib
+
+import fake_jira
+import pytest
+from lsst.ts.vanward import cache_helpers, jira_mirror, ticket_helpers
+
+
+def test_sync_release_with_deleted_linked_ticket(
+    fake_jira_server: fake_jira.FakeJiraServer, token_file: pathlib.Path
+) -> None:
+    fake_jira_server.jira.load(
+        {
+            "versions": [{"name": "23.0", "project": "CAP"}],
+            "issues": [
+                {
+                    "project": {"key": "CAP"},
+                    "summary": "Release ticket",
+                    "fixVersions": [{"name": "23.0"}],
+                },
+                {"project": {"key": "DM"}, "summary": "Linked ticket 1"},
+                {"project": {"key": "DM"}, "summary": "Linked ticket 2"},
+            ],
+            "links": [
+                {
+                    "type": {"name": "Relates"},
+                    "inwardIssue": {"key": "CAP-1"},
+                    "outwardIssue": {"key": key},
+                }
+                for key in ("DM-1", "DM-2")
+            ],
+        }
+    )
+    js = ticket_helpers.get_jira_client(token_file)
+    with jira_mirror.JiraMirror(":memory:") as mirror:
+        mirror.sync_release(js, "23.0")
+        graph = mirror.get_release_graph("23.0")
+        assert sorted(graph.get_linked_keys()) == ["DM-1", "DM-2"]
+
+        js.issue("DM-1").delete()
+        changed = mirror.sync_release(js, "23.0")
+        assert "DM-1" in [ticket.key for ticket in changed]
+        assert mirror.get_tickets(["DM-1"]) == []
+        assert mirror.get_release_graph("23.0").get_linked_keys() == ["DM-2"]
+        release_ticket = mirror.get_release_tickets("23.0")[0]
+        assert [link.key for link in release_ticket.links] == ["DM-2"]
+
+        # Later synchronizations keep working.
+        mirror.sync_release(js, "23.0")
+        assert mirror.get_release_graph("23.0").get_linked_keys() == ["DM-2"]
+
+
+def test_get_mirror_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv(cache_helpers.CACHE_DIR_ENV, str(cache_dir))
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--jira-db",
+        type=pathlib.Path,
+        nargs="?",
+        const=jira_mirror.get_default_mirror_file,
+    )
+
+    # Parsing alone does not create the cache directory.
+    opts = parser.parse_args(["--jira-db"])
+    assert not cache_dir.exists()
+    assert jira_mirror.get_mirror_file(opts.jira_db).parent == cache_dir
+    opts = parser.parse_args(["--jira-db", "jira.db"])
+    assert jira_mirror.get_mirror_file(opts.jira_db) == pathlib.Path("jira.db")
+    opts = parser.parse_args([])
+    assert jira_mirror.get_mirror_file(opts.jira_db) == ":memory:"
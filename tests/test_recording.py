@@ -0,0 +1,75 @@
+import json
+import pathlib
+
+import fake_jira
+import pytest
+import requests
+from lsst.ts.vanward import recording
+
+
+def test_scrub_body() -> None:
+    account_values: set[str] = set()
+    body = recording.scrub_body(
+        json.dumps(
+            {
+                "accountId": "5b10a2844c20165700ede21g",
+                "emailAddress": "ann@example.com",
+                "avatarUrls": {"48x48": "https://avatar/5b10a2844c20165700ede21g"},
+                "self": "https://jira/user?accountId=5b10a2844c20165700ede21g",
+                "description": "Ask bob@example.org",
+            }
+        ).encode(),
+        account_values,
+    )
+    data = json.loads(body)
+    account_id = recording.pseudonymize("5b10a2844c20165700ede21g")
+    assert data["accountId"] == account_id
+    assert data["emailAddress"].endswith(f"@{recording.PSEUDONYM_DOMAIN}")
+    assert "avatarUrls" not in data
+    assert data["self"] == f"https://jira/user?accountId={account_id}"
+    assert "bob@example.org" not in data["description"]
+
+    headers = recording.filter_headers(
+        {
+            "Content-Type": "application/json",
+            "Set-Cookie": "atlassian.xsrf.token=secret",
+            "X-AACCOUNTID": "5b10a2844c20165700ede21g",
+            "X-AUSERNAME": "ann",
+        }
+    )
+    assert headers == {"Content-Type": "application/json"}
+
+    # Later URLs with the same account Id get the same pseudonym.
+    assert (
+        recording.scrub_text(
+            "https://jira/rest/api/2/user?accountId=5b10a2844c20165700ede21g",
+            account_values,
+        )
+        == f"https://jira/rest/api/2/user?accountId={account_id}"
+    )
+
+
+def test_record_and_replay(
+    fake_jira_server: fake_jira.FakeJiraServer, tmp_path: pathlib.Path
+) -> None:
+    user = fake_jira_server.jira.add_user("Ann Example", "ann@example.com")
+    cassette_file = tmp_path / "cassette.json"
+    url = f"{fake_jira_server.url}rest/api/2/user/search?query=Ann"
+    with recording.recording(cassette_file):
+        recorded = requests.get(url).json()
+    assert recorded[0]["emailAddress"] == "ann@example.com"
+
+    cassette_text = cassette_file.read_text()
+    assert "ann@example.com" not in cassette_text
+    assert user["accountId"] not in cassette_text
+
+    # The replay works without the server. Stopping it again when the
+    # fixture is torn down does nothing.
+    fake_jira_server.shutdown()
+    fake_jira_server.server_close()
+    with recording.replaying(cassette_file):
+        replayed = requests.get(url).json()
+        with pytest.raises(requests.ConnectionError):
+            requests.get(f"{fake_jira_server.url}rest/api/2/serverInfo")
+    assert replayed[0]["displayName"] == "Ann Example"
+    assert replayed[0]["accountId"] == recording.pseudonymize(user["accountId"])
@@ -0,0 +1,20 @@
+import pathlib
+
+import fake_jira
+import pytest
+from lsst.ts.vanward import cache_helpers, ticket_helpers
+
+
+def test_resolve_user_ids_with_missing_users(
+    fake_jira_server: fake_jira.FakeJiraServer, token_file: pathlib.Path
+) -> None:
+    user = fake_jira_server.jira.add_user("Jane Doe", "jdoe@example.com")
+    js = ticket_helpers.get_jira_client(token_file)
+
+    with pytest.raises(ValueError, match="nobody, noone"):
+        ticket_helpers.get_user_ids("jdoe, nobody, noone", js)
+
+    # The user that was found is cached regardless.
+    cache = cache_helpers.read_json_cache(ticket_helpers.USER_CACHE_FILE)
+    assert list(cache) == ["jdoe"]
+    assert ticket_helpers.get_user_ids("jdoe", js) == [user["accountId"]]